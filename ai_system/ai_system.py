@@ -2,7 +2,7 @@ import asyncio
 from dataclasses import dataclass
 import os
 from typing import Callable, List, Tuple
-from ai_system.vectordb import retrieve_documents_milvus
+from ai_system.vectordb import format_document_source, retrieve_documents_milvus
 from langchain_ollama import ChatOllama
 from langgraph.graph import START, END, StateGraph
 from langchain_core.messages.system import SystemMessage
@@ -91,7 +91,7 @@ def initialize_langchain(config: AppConfig):
             documents = [
                 {
                     "role": "system",
-                    "content": f"Reference document (Source: {doc['entity']['metadata']}): {doc['entity']['text']}",
+                    "content": f"Reference document (Source: {format_document_source(doc['entity']['metadata'])}): {doc['entity']['text']}",
                 }
                 for doc in retrieved_data
             ]
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from custom_types import DocumentManifestEntry
+
+logger = logging.getLogger("DOCUMENT_MANIFEST " + __name__)
+
+# Version 2: chunks carry page metadata, older manifests are re-ingested
+MANIFEST_VERSION = 2
+
+
+class DirectoryDiff(NamedTuple):
+    added: List[Path]
+    changed: List[Path]
+    deleted: List[str]
+
+
+def file_sha256(file_path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint_file(
+    file_path, chunk_ids: List[int], chunk_hashes: List[str]
+) -> DocumentManifestEntry:
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": file_sha256(file_path),
+        "chunk_ids": chunk_ids,
+        "chunk_hashes": chunk_hashes,
+    }
+
+
+class DocumentManifest:
+    # Persistent record of what collection_rag holds per document: file name, size,
+    # mtime, content hash and the ids of its chunks. Diffing it against the folder on
+    # startup finds the documents that were added, changed or deleted in the meantime.
+    def __init__(self, path: str, files: Optional[Dict[str, DocumentManifestEntry]] = None):
+        self.path = path
+        self.files: Dict[str, DocumentManifestEntry] = files or {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentManifest":
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                content = json.load(file)
+            if content.get("version") != MANIFEST_VERSION:
+                logger.info(
+                    f"Document manifest {path} has version {content.get('version')}, "
+                    "all documents are re-ingested."
+                )
+                return cls(path)
+            return cls(path, content["files"])
+        except FileNotFoundError:
+            return cls(path)
+        except Exception as e:
+            # Every document is re-ingested, its old chunks are replaced by file name
+            logger.warning(f"Ignoring unreadable document manifest {path}: {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        # Watcher workers save concurrently, the file writes are serialized
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                content = json.dumps({"version": MANIFEST_VERSION, "files": self.files})
+                self._dirty = False
+            # Write and rename, so a crash never leaves a truncated manifest behind
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(temporary_path, self.path)
+
+    def get(self, file_name: str) -> Optional[DocumentManifestEntry]:
+        return self.files.get(file_name)
+
+    def stored_chunks(self, file_name: str) -> Dict[str, List[int]]:
+        # Chunk text hash -> ids of the stored chunks with that text
+        entry = self.files.get(file_name)
+        chunks: Dict[str, List[int]] = {}
+        if entry is not None:
+            for chunk_id, chunk_hash in zip(entry["chunk_ids"], entry.get("chunk_hashes", [])):
+                chunks.setdefault(chunk_hash, []).append(chunk_id)
+        return chunks
+
+    def set(self, file_name: str, entry: DocumentManifestEntry) -> None:
+        with self._lock:
+            self.files[file_name] = entry
+            self._dirty = True
+
+    def remove(self, file_name: str) -> Optional[DocumentManifestEntry]:
+        with self._lock:
+            entry = self.files.pop(file_name, None)
+            self._dirty = self._dirty or entry is not None
+            return entry
+
+    def diff(self, directory: str) -> DirectoryDiff:
+        # Size and mtime decide for unchanged files, the content hash is only computed
+        # when they differ (e.g. a copy that preserved the content but not the mtime)
+        on_disk = {path.name: path for path in sorted(Path(directory).glob("*.pdf"))}
+        added: List[Path] = []
+        changed: List[Path] = []
+        for file_name, path in on_disk.items():
+            entry = self.files.get(file_name)
+            if entry is None:
+                added.append(path)
+                continue
+            stat = path.stat()
+            if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+                continue
+            if file_sha256(path) == entry["sha256"]:
+                self.set(file_name, {**entry, "size": stat.st_size, "mtime": stat.st_mtime})
+                continue
+            changed.append(path)
+        deleted = [file_name for file_name in self.files if file_name not in on_disk]
+        return DirectoryDiff(added, changed, deleted)
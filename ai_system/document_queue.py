@@ -0,0 +1,162 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from custom_types import DocumentQueueStats
+
+logger = logging.getLogger("DOCUMENT_QUEUE " + __name__)
+
+
+class _PendingDocument:
+    def __init__(self, action: str, due: float, first_event_at: float):
+        self.action = action
+        self.due = due
+        self.first_event_at = first_event_at
+
+
+class DocumentEventQueue:
+    # Coalesces file system events per path. Every event restarts the path's debounce
+    # window and replaces its pending action, so a save storm or a create/modify/delete
+    # burst ends in one final action once the file has been quiet for debounce_seconds.
+    # Workers never handle the same path concurrently; an event for a path in progress
+    # waits until that run has finished.
+    def __init__(
+        self,
+        handle: Callable[[str, str], None],
+        debounce_seconds: float,
+        workers: int,
+    ):
+        self.handle = handle
+        self.debounce_seconds = debounce_seconds
+        self.workers = workers
+        self._pending: Dict[str, _PendingDocument] = {}
+        self._in_flight: Set[str] = set()
+        # (due, sequence, path), entries whose due no longer matches _pending are skipped
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self.events = 0
+        self.coalesced = 0
+        self.processed = 0
+        self.failed = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def start(self) -> None:
+        self._stopped = False
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"document-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, file_path: str, action: str) -> None:
+        now = time.monotonic()
+        with self._condition:
+            self.events += 1
+            pending = self._pending.get(file_path)
+            if pending is None:
+                pending = _PendingDocument(action, 0, now)
+                self._pending[file_path] = pending
+            else:
+                self.coalesced += 1
+                pending.action = action
+            pending.due = now + self.debounce_seconds
+            self._push(file_path, pending.due)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        # Waits until every submitted event has been handled
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def stats(self) -> DocumentQueueStats:
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "events": self.events,
+                "coalesced": self.coalesced,
+                "processed": self.processed,
+                "failed": self.failed,
+                "latency_avg_seconds": (
+                    self._latency_total / self.processed if self.processed else 0.0
+                ),
+                "latency_max_seconds": self._latency_max,
+            }
+
+    def _push(self, file_path: str, due: float) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, file_path))
+        self._condition.notify_all()
+
+    def _take(self) -> Optional[Tuple[str, _PendingDocument]]:
+        # Called with the condition held, blocks until a path is due or the queue stops
+        while not self._stopped:
+            while self._heap:
+                due, _, file_path = self._heap[0]
+                pending = self._pending.get(file_path)
+                if pending is None or pending.due != due or file_path in self._in_flight:
+                    # Superseded, or re-queued once the running action has finished
+                    heapq.heappop(self._heap)
+                    continue
+                break
+            if not self._heap:
+                self._condition.wait()
+                continue
+            wait_seconds = self._heap[0][0] - time.monotonic()
+            if wait_seconds > 0:
+                self._condition.wait(wait_seconds)
+                continue
+            _, _, file_path = heapq.heappop(self._heap)
+            self._in_flight.add(file_path)
+            if self._heap:
+                # More paths may be due, wake another worker
+                self._condition.notify_all()
+            return file_path, self._pending.pop(file_path)
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                taken = self._take()
+            if taken is None:
+                return
+            file_path, pending = taken
+            try:
+                self.handle(file_path, pending.action)
+                failed = False
+            except Exception as e:
+                logger.error(
+                    f"Handling {pending.action} of {file_path} failed: {e}",
+                    exc_info=True,
+                )
+                failed = True
+            latency = time.monotonic() - pending.first_event_at
+            with self._condition:
+                self._in_flight.discard(file_path)
+                self.processed += 1
+                self.failed += failed
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                queued = self._pending.get(file_path)
+                if queued is not None:
+                    self._push(file_path, queued.due)
+                self._condition.notify_all()
@@ -0,0 +1,440 @@
+import ctypes
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from PyPDF2 import PdfReader
+from ai_system.document_manifest import chunk_sha256
+from custom_types import DocumentChunk, IngestionConfig, IngestionStats
+
+logger = logging.getLogger("INGESTION " + __name__)
+
+FILE_ATTRIBUTE_HIDDEN = 0x2
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+# Same as the RecursiveCharacterTextSplitter defaults used before
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
+PAGE_SEPARATOR = "\n"
+
+# Marks the end of a stage's input
+_DONE = object()
+
+_text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+)
+
+
+def unhide_file(file_path: str) -> None:
+    # Documents synced into the folder on Windows can arrive hidden. Clears the flag
+    # in-process instead of spawning "attrib -h", does nothing on other platforms
+    if sys.platform != "win32":
+        return
+    kernel32 = ctypes.windll.kernel32
+    attributes = kernel32.GetFileAttributesW(str(file_path))
+    if attributes == INVALID_FILE_ATTRIBUTES or not attributes & FILE_ATTRIBUTE_HIDDEN:
+        return
+    if not kernel32.SetFileAttributesW(
+        str(file_path), attributes & ~FILE_ATTRIBUTE_HIDDEN
+    ):
+        logger.warning(f"Could not unhide file: {file_path}")
+
+
+def iter_pdf_pages(
+    reader: PdfReader, first_page: int = 1, last_page: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    # Yields (page number, text), one page is extracted at a time
+    last_page = len(reader.pages) if last_page is None else last_page
+    for page_number in range(first_page, last_page + 1):
+        yield page_number, reader.pages[page_number - 1].extract_text() or ""
+
+
+class PageSplitter:
+    # Splits a document page by page without building its text. Only the text from
+    # the start of the last, possibly incomplete chunk onwards is kept between pages,
+    # so memory stays around two chunks plus one page. Offsets refer to the document
+    # text, i.e. all pages joined by PAGE_SEPARATOR. The state is small and picklable,
+    # an extraction worker hands it on with the next page range of the document.
+    def __init__(self, source: str):
+        self.source = source
+        self.buffer = ""
+        self.buffer_start = 0
+        self.page_starts: List[int] = []
+        self.page_numbers: List[int] = []
+        self.document_length = 0
+
+    def add_page(self, page_number: int, page_text: str) -> List[DocumentChunk]:
+        if self.page_numbers:
+            self.buffer += PAGE_SEPARATOR
+            self.document_length += len(PAGE_SEPARATOR)
+        self.page_starts.append(self.document_length)
+        self.page_numbers.append(page_number)
+        self.buffer += page_text
+        self.document_length += len(page_text)
+        if len(self.buffer) >= 2 * CHUNK_SIZE:
+            return self._split(final=False)
+        return []
+
+    def finish(self) -> List[DocumentChunk]:
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> List[DocumentChunk]:
+        texts = _text_splitter.split_text(self.buffer)
+        starts: List[int] = []
+        search_from = 0
+        for text in texts:
+            index = self.buffer.find(text, search_from)
+            if index < 0:
+                index = search_from
+            starts.append(index)
+            search_from = index + 1
+        # The last chunk may continue on the next page, it is split again with it
+        emitted = len(texts) if final else len(texts) - 1
+        chunks: List[DocumentChunk] = []
+        for text, index in zip(texts[:emitted], starts):
+            start = self.buffer_start + index
+            end = start + len(text)
+            first_page = bisect_right(self.page_starts, start) - 1
+            last_page = bisect_right(self.page_starts, end - 1) - 1
+            chunks.append(
+                {
+                    "text": text,
+                    "metadata": {
+                        "source": self.source,
+                        "pages": self.page_numbers[first_page : last_page + 1],
+                        "start": start,
+                        "end": end,
+                    },
+                }
+            )
+        if not final and emitted > 0:
+            self.buffer_start += starts[emitted]
+            self.buffer = self.buffer[starts[emitted] :]
+            while len(self.page_starts) > 1 and self.page_starts[1] <= self.buffer_start:
+                self.page_starts.pop(0)
+                self.page_numbers.pop(0)
+        return chunks
+
+
+def split_pages(
+    pages: Iterable[Tuple[int, str]], source: str
+) -> Iterator[DocumentChunk]:
+    splitter = PageSplitter(source)
+    for page_number, page_text in pages:
+        yield from splitter.add_page(page_number, page_text)
+    yield from splitter.finish()
+
+
+def open_pdf_chunks(file_path: str) -> Tuple[str, Iterator[DocumentChunk]]:
+    # Returns (file name, chunks). The PDF is opened right away, so unreadable files
+    # fail here; pages are extracted and split while the chunks are consumed.
+    unhide_file(file_path)
+    reader = PdfReader(file_path)
+    file_name = os.path.basename(file_path)
+    return file_name, split_pages(iter_pdf_pages(reader), file_name)
+
+
+class PageBatch(NamedTuple):
+    file_name: str
+    pages: int
+    chunks: List[DocumentChunk]
+    # Continues the document at the next page range, None after its last page
+    splitter: Optional[PageSplitter]
+
+
+def extract_pdf_page_batch(
+    file_path: str,
+    first_page: int,
+    page_count: int,
+    splitter: Optional[PageSplitter] = None,
+) -> PageBatch:
+    # Runs in an extraction worker process and extracts one page range, so neither the
+    # worker nor the result ever holds a whole document
+    file_name = os.path.basename(file_path)
+    if splitter is None:
+        unhide_file(file_path)
+        splitter = PageSplitter(file_name)
+    reader = PdfReader(file_path)
+    last_page = min(first_page + page_count - 1, len(reader.pages))
+    chunks: List[DocumentChunk] = []
+    for page_number, page_text in iter_pdf_pages(reader, first_page, last_page):
+        chunks.extend(splitter.add_page(page_number, page_text))
+    pages = max(last_page - first_page + 1, 0)
+    if last_page < len(reader.pages):
+        return PageBatch(file_name, pages, chunks, splitter)
+    chunks.extend(splitter.finish())
+    return PageBatch(file_name, pages, chunks, None)
+
+
+class _DocumentProgress:
+    def __init__(self):
+        # Chunks queued but not stored yet
+        self.remaining = 0
+        self.extracted = False
+        self.failed = False
+        self.chunk_ids: List[Optional[int]] = []
+        self.chunk_hashes: List[str] = []
+
+
+class IngestionPipeline:
+    # PDF extraction in a process pool -> bounded chunk queue -> fixed-size embedding
+    # batches -> bounded row queue -> batched inserts. Embedding and inserting run on
+    # their own threads, so all three stages overlap and memory is bounded by the queues.
+    # Documents are extracted in page ranges of extract_page_batch_size pages.
+    # insert_rows returns the ids of the inserted rows. Once all chunks of a document
+    # are stored, on_document_ingested is called with its file name, chunk ids and chunk
+    # text hashes. If a later page range fails, on_document_failed is called with the
+    # ids of the chunks that were already stored.
+    def __init__(
+        self,
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        insert_rows: Callable[[List[dict]], Optional[List[int]]],
+        ingestion_config: IngestionConfig,
+        executor_factory: Optional[Callable[[int], Executor]] = None,
+        on_document_ingested: Optional[
+            Callable[[str, List[int], List[str]], None]
+        ] = None,
+        on_document_failed: Optional[Callable[[str, List[int]], None]] = None,
+    ):
+        self.embed_documents = embed_documents
+        self.insert_rows = insert_rows
+        self.config = ingestion_config
+        self.on_document_ingested = on_document_ingested
+        self.on_document_failed = on_document_failed
+        self.executor_factory = executor_factory or (
+            lambda workers: ProcessPoolExecutor(max_workers=workers)
+        )
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    def run(self, file_paths: Iterable) -> IngestionStats:
+        file_paths = [str(file_path) for file_path in file_paths]
+        self._error = None
+        self._total_files = len(file_paths)
+        self._files = self._failed_files = self._pages = self._chunks = 0
+        self._documents: Dict[str, _DocumentProgress] = {}
+        self._started = self._last_report = time.perf_counter()
+
+        chunk_queue: queue.Queue = queue.Queue(self.config["queue_max_chunks"])
+        row_queue: queue.Queue = queue.Queue(self.config["queue_max_chunks"])
+        stages = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._embed_stage, chunk_queue, row_queue),
+                name="ingestion-embed",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._insert_stage, row_queue),
+                name="ingestion-insert",
+                daemon=True,
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            self._run_stage(self._extract_stage, file_paths, chunk_queue)
+        finally:
+            self._put(chunk_queue, _DONE)
+            for stage in stages:
+                stage.join()
+
+        if self._error is not None:
+            raise RuntimeError(f"Document ingestion failed: {self._error}") from self._error
+        stats = self.stats()
+        logger.info(
+            f"Ingested {stats['files']} documents ({stats['failed_files']} failed), "
+            f"{stats['pages']} pages, {stats['chunks']} chunks in {stats['seconds']:.1f} s "
+            f"({stats['pages_per_second']:.1f} pages/s, {stats['chunks_per_second']:.1f} chunks/s)"
+        )
+        return stats
+
+    def stats(self) -> IngestionStats:
+        with self._lock:
+            seconds = time.perf_counter() - self._started
+            return {
+                "files": self._files,
+                "failed_files": self._failed_files,
+                "pages": self._pages,
+                "chunks": self._chunks,
+                "seconds": seconds,
+                "pages_per_second": self._pages / seconds if seconds else 0.0,
+                "chunks_per_second": self._chunks / seconds if seconds else 0.0,
+            }
+
+    def _run_stage(self, stage: Callable, *args) -> None:
+        try:
+            stage(*args)
+        except BaseException as e:
+            # The first failure stops all stages
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        # Blocks while the next stage is busy, gives up once any stage has failed
+        while self._error is None:
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: queue.Queue):
+        while self._error is None:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _extract_stage(self, file_paths: List[str], chunk_queue: queue.Queue) -> None:
+        workers = self.config["extract_workers"]
+        page_batch_size = self.config["extract_page_batch_size"]
+        pending_paths = iter(file_paths)
+        executor = self.executor_factory(workers)
+        # future -> (file path, first page of its range)
+        running: Dict = {}
+
+        def submit(file_path: str, first_page: int = 1, splitter=None) -> None:
+            future = executor.submit(
+                extract_pdf_page_batch, file_path, first_page, page_batch_size, splitter
+            )
+            running[future] = (file_path, first_page)
+
+        try:
+            # At most two page ranges per worker are in flight, so extracted text that
+            # the embedding stage has not caught up with does not pile up in memory.
+            # A document's next range is submitted once the previous one is back.
+            for file_path in pending_paths:
+                submit(file_path)
+                if len(running) >= 2 * workers:
+                    break
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, first_page = running.pop(future)
+                    try:
+                        batch = future.result()
+                    except Exception as e:
+                        logger.warning(
+                            f"Error on reading PDF file {file_path}: {e}",
+                            exc_info=True,
+                        )
+                        batch = None
+                    if batch is not None and batch.splitter is not None:
+                        submit(file_path, first_page + batch.pages, batch.splitter)
+                    else:
+                        next_path = next(pending_paths, None)
+                        if next_path is not None:
+                            submit(next_path)
+                    if batch is None:
+                        self._extraction_finished(os.path.basename(file_path), failed=True)
+                        continue
+                    with self._lock:
+                        document = self._documents.setdefault(
+                            batch.file_name, _DocumentProgress()
+                        )
+                        document.remaining += len(batch.chunks)
+                        self._pages += batch.pages
+                    for chunk in batch.chunks:
+                        if not self._put(chunk_queue, chunk):
+                            return
+                    if batch.splitter is None:
+                        self._extraction_finished(batch.file_name)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _embed_stage(self, chunk_queue: queue.Queue, row_queue: queue.Queue) -> None:
+        batch_size = self.config["embedding_batch_size"]
+        batch: List[DocumentChunk] = []
+        while True:
+            chunk = self._get(chunk_queue)
+            if self._error is not None:
+                return
+            if chunk is not _DONE:
+                batch.append(chunk)
+            if batch and (chunk is _DONE or len(batch) >= batch_size):
+                embeddings = self.embed_documents([item["text"] for item in batch])
+                for embedding, item in zip(embeddings, batch):
+                    if not self._put(row_queue, {"embedding": embedding, **item}):
+                        return
+                batch = []
+            if chunk is _DONE:
+                self._put(row_queue, _DONE)
+                return
+
+    def _insert_stage(self, row_queue: queue.Queue) -> None:
+        batch_size = self.config["insert_batch_size"]
+        rows: List[dict] = []
+        while True:
+            row = self._get(row_queue)
+            if self._error is not None:
+                return
+            if row is not _DONE:
+                rows.append(row)
+            if rows and (row is _DONE or len(rows) >= batch_size):
+                chunk_ids = self.insert_rows(rows)
+                if chunk_ids is None:
+                    chunk_ids = [None] * len(rows)
+                finished = []
+                with self._lock:
+                    self._chunks += len(rows)
+                    for stored_row, chunk_id in zip(rows, chunk_ids):
+                        file_name = stored_row["metadata"]["source"]
+                        document = self._documents[file_name]
+                        document.remaining -= 1
+                        document.chunk_ids.append(chunk_id)
+                        document.chunk_hashes.append(chunk_sha256(stored_row["text"]))
+                        if document.remaining == 0 and document.extracted:
+                            finished.append((file_name, self._documents.pop(file_name)))
+                for file_name, document in finished:
+                    self._document_finished(file_name, document)
+                rows = []
+                self._report_progress()
+            if row is _DONE:
+                return
+
+    def _extraction_finished(self, file_name: str, failed: bool = False) -> None:
+        with self._lock:
+            document = self._documents.setdefault(file_name, _DocumentProgress())
+            document.extracted = True
+            document.failed = failed
+            if failed:
+                self._failed_files += 1
+            else:
+                self._files += 1
+            finished = document.remaining == 0
+            if finished:
+                del self._documents[file_name]
+        if finished:
+            self._document_finished(file_name, document)
+
+    def _document_finished(self, file_name: str, document: _DocumentProgress) -> None:
+        if not document.failed:
+            if self.on_document_ingested is not None:
+                self.on_document_ingested(
+                    file_name, document.chunk_ids, document.chunk_hashes
+                )
+        elif document.chunk_ids and self.on_document_failed is not None:
+            self.on_document_failed(file_name, document.chunk_ids)
+
+    def _report_progress(self) -> None:
+        now = time.perf_counter()
+        if now - self._last_report < self.config["progress_interval_seconds"]:
+            return
+        self._last_report = now
+        stats = self.stats()
+        logger.info(
+            f"Ingestion progress: {stats['files'] + stats['failed_files']}/{self._total_files} documents, "
+            f"{stats['pages']} pages, {stats['chunks']} chunks stored "
+            f"({stats['pages_per_second']:.1f} pages/s, {stats['chunks_per_second']:.1f} chunks/s)"
+        )
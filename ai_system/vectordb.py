@@ -1,20 +1,37 @@
-from typing import Callable, List, Tuple
+from typing import Iterable, List, Set, Tuple
 from langchain_ollama import OllamaEmbeddings
 from pymilvus import MilvusClient, DataType
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import os
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
-from PyPDF2 import PdfReader
-from pathlib import Path
 import threading
-from custom_types import AppConfig
+from custom_types import AppConfig, ChunkMetadata, DocumentChunk
+from ai_system.document_manifest import (
+    DocumentManifest,
+    chunk_sha256,
+    fingerprint_file,
+)
+from ai_system.document_queue import DocumentEventQueue
+from ai_system.ingestion import IngestionPipeline, open_pdf_chunks
+from utils import LRUCache
 import logging
 
 logger = logging.getLogger("VECTOR_DB " + __name__)
 
+APP_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 observer_started = False
 
+# What collection_rag holds per document, see ai_system.document_manifest
+document_manifest: DocumentManifest | None = None
+directory_watcher: "DirectoryWatcher | None" = None
+
+# Similar tickets per ticket id. Results only change when tickets enter or leave
+# collection_ticket (close/reopen), so entries are invalidated on those events only.
+similar_ticket_cache: LRUCache | None = None
+# Incremented whenever the membership of collection_ticket changes
+collection_ticket_generation = 0
+
 
 def _create_user_and_schema():
     try:
@@ -126,57 +143,213 @@ def _create_user_and_schema():
         raise RuntimeError(f"Creating Milvus User and Collections failed: {e}") from e
 
 
+def _document_filter(file_name: str) -> str:
+    # Chunks stored before page metadata existed carry the plain file name
+    return f'(metadata["source"] == "{file_name}" or metadata == "{file_name}")'
+
+
+def _delete_document_chunks(
+    milvus_client: MilvusClient, file_name: str, keep_chunk_ids: List[int] | None = None
+) -> None:
+    # Deletes by file name, so chunks the manifest does not know about (left by an
+    # interrupted ingestion or stored before the manifest existed) are removed as well
+    filter = _document_filter(file_name)
+    if keep_chunk_ids:
+        filter += f" and id not in {[int(chunk_id) for chunk_id in keep_chunk_ids]}"
+    milvus_client.delete(collection_name="collection_rag", filter=filter)
+
+
+def _replace_document(
+    milvus_client: MilvusClient,
+    file_path: str,
+    file_name: str,
+    chunks: Iterable[DocumentChunk],
+) -> None:
+    # Chunks are handled in embedding batches while they are extracted, so memory does
+    # not grow with the document. Chunks whose text is already stored for this document
+    # keep their vector, only new texts are embedded. A kept chunk that moved to other
+    # pages or offsets is stored again with its old vector. New chunks are inserted
+    # before the stale ones are deleted, so searches see either version of the document
+    # but never neither.
+    stored_chunks = document_manifest.stored_chunks(file_name)
+    chunk_ids: List[int] = []
+    chunk_hashes: List[str] = []
+    inserted_chunk_ids: List[int] = []
+    stale_chunk_ids: List[int] = []
+    embedded = 0
+
+    def store_batch(batch: List[DocumentChunk]) -> None:
+        nonlocal embedded
+        batch_hashes = [chunk_sha256(chunk["text"]) for chunk in batch]
+        batch_ids: List[int | None] = []
+        new_positions: List[int] = []
+        for position, chunk_hash in enumerate(batch_hashes):
+            if stored_chunks.get(chunk_hash):
+                batch_ids.append(stored_chunks[chunk_hash].pop())
+            else:
+                batch_ids.append(None)
+                new_positions.append(position)
+
+        kept_positions = [
+            position for position, chunk_id in enumerate(batch_ids) if chunk_id is not None
+        ]
+        vectors = {}
+        if kept_positions:
+            stored_rows = {
+                row["id"]: row
+                for row in milvus_client.query(
+                    collection_name="collection_rag",
+                    filter=f"id in {[int(batch_ids[position]) for position in kept_positions]}",
+                    output_fields=["embedding", "metadata"],
+                )
+            }
+            for position in kept_positions:
+                row = stored_rows.get(batch_ids[position])
+                if row is not None and row["metadata"] == batch[position]["metadata"]:
+                    continue
+                if row is None:
+                    new_positions.append(position)
+                else:
+                    vectors[position] = row["embedding"]
+                    stale_chunk_ids.append(int(batch_ids[position]))
+                batch_ids[position] = None
+
+        if new_positions:
+            embeddings = embedding_model.embed_documents(
+                [batch[position]["text"] for position in new_positions]
+            )
+            vectors.update(zip(new_positions, embeddings))
+            embedded += len(new_positions)
+        if vectors:
+            positions = sorted(vectors)
+            res = milvus_client.insert(
+                collection_name="collection_rag",
+                data=[{"embedding": vectors[position], **batch[position]} for position in positions],
+            )
+            for position, chunk_id in zip(positions, res["ids"]):
+                batch_ids[position] = chunk_id
+                inserted_chunk_ids.append(int(chunk_id))
+        chunk_ids.extend(batch_ids)
+        chunk_hashes.extend(batch_hashes)
+
+    batch_size = config["ingestion"]["embedding_batch_size"]
+    batch: List[DocumentChunk] = []
+    try:
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                store_batch(batch)
+                batch = []
+        if batch:
+            store_batch(batch)
+    except Exception:
+        # The stored version of the document stays, only this run's chunks are removed
+        if inserted_chunk_ids:
+            milvus_client.delete(
+                collection_name="collection_rag", filter=f"id in {inserted_chunk_ids}"
+            )
+        raise
+    stale_chunk_ids.extend(
+        int(chunk_id) for ids in stored_chunks.values() for chunk_id in ids
+    )
+
+    if document_manifest.get(file_name) is None:
+        # Unknown to the manifest, chunks of earlier versions can only be found by name
+        _delete_document_chunks(milvus_client, file_name, chunk_ids)
+    elif stale_chunk_ids:
+        milvus_client.delete(
+            collection_name="collection_rag", filter=f"id in {stale_chunk_ids}"
+        )
+    milvus_client.flush("collection_rag")
+    document_manifest.set(file_name, fingerprint_file(file_path, chunk_ids, chunk_hashes))
+    document_manifest.save()
+    logger.info(
+        f"Replaced RAG document {file_name}: {embedded} of {len(chunk_ids)} chunks embedded.",
+    )
+
+
+def _forget_document(file_name: str) -> None:
+    document_manifest.remove(file_name)
+    document_manifest.save()
+
+
 def _initialize_directory(milvus_client: MilvusClient, directory: str):
+    global document_manifest
     try:
-        res = milvus_client.query(
-            collection_name="collection_rag",
-            limit=1,
-            filter="id >= 0",
+        collection_has_rows = bool(
+            milvus_client.query(
+                collection_name="collection_rag",
+                limit=1,
+                filter="id >= 0",
+            )
+        )
+        manifest = DocumentManifest.load(
+            os.path.join(APP_PATH, config["ingestion"]["manifest_path"])
+        )
+        diff = manifest.diff(directory)
+        logger.info(
+            f"RAG documents directory: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.deleted)} deleted since the last run.",
         )
 
-        # Abort if there are already entries in the vector db
-        if res:
-            return
+        document_manifest = manifest
 
-        path = Path(directory)
-        pdf_files = list(path.glob("*.pdf"))
+        for file_name in diff.deleted:
+            _delete_document_chunks(milvus_client, file_name)
+            manifest.remove(file_name)
 
-        for file in pdf_files:
-            file_path = path / file
-            file_name = os.path.basename(file_path)
-            os.system(f'attrib -h "{file_path}"')
+        # Changed documents only re-embed the chunks whose text changed. A document
+        # that fails keeps its stored version and is retried on the next start.
+        for path in diff.changed:
             try:
-                reader = PdfReader(file_path)
+                file_name, chunks = open_pdf_chunks(str(path))
+                _replace_document(milvus_client, str(path), file_name, chunks)
             except Exception as e:
-                logger.warning(
-                    f"Error on reading PDF file: {e}",
-                    exc_info=True,
-                )
-                return
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            text_splitter = RecursiveCharacterTextSplitter()
-            text_chunks = []
-            metadata_list = []
-
-            for text_chunk in text_splitter.split_text(text):
-                text_chunks.append(text_chunk)
-                metadata_list.append(file_name)
-
-            embeddings = embedding_model.embed_documents(text_chunks)
-
-            data = [
-                {"embedding": embedding, "text": text, "metadata": metadata}
-                for embedding, text, metadata in zip(
-                    embeddings, text_chunks, metadata_list
-                )
-            ]
+                logger.warning(f"Error on replacing PDF file {path}: {e}", exc_info=True)
+
+        def on_document_ingested(
+            file_name: str, chunk_ids: List[int], chunk_hashes: List[str]
+        ) -> None:
+            # Chunks of an interrupted run or stored before the manifest existed
+            if collection_has_rows:
+                _delete_document_chunks(milvus_client, file_name, chunk_ids)
+            manifest.set(
+                file_name,
+                fingerprint_file(
+                    os.path.join(directory, file_name), chunk_ids, chunk_hashes
+                ),
+            )
 
-            res = milvus_client.insert(collection_name="collection_rag", data=data)
+        def on_document_failed(file_name: str, chunk_ids: List[int]) -> None:
+            # Chunks of the page ranges extracted before the failure
+            milvus_client.delete(
+                collection_name="collection_rag",
+                filter=f"id in {[int(chunk_id) for chunk_id in chunk_ids]}",
+            )
+
+        if diff.added:
+            pipeline = IngestionPipeline(
+                embedding_model.embed_documents,
+                lambda rows: list(
+                    milvus_client.insert(collection_name="collection_rag", data=rows)[
+                        "ids"
+                    ]
+                ),
+                config["ingestion"],
+                on_document_ingested=on_document_ingested,
+                on_document_failed=on_document_failed,
+            )
+            try:
+                stats = pipeline.run(diff.added)
+            finally:
+                # Keeps the documents that made it, even if the run failed
+                manifest.save()
             logger.info(
-                f"Initialized RAG documents directory: {res}",
+                f"Initialized RAG documents directory: {stats}",
             )
+        if diff.deleted:
+            milvus_client.flush("collection_rag")
+        manifest.save()
     except Exception as e:
         logger.error(
             f"Milvus Directory Initialization failed: {e}",
@@ -186,78 +359,53 @@ def _initialize_directory(milvus_client: MilvusClient, directory: str):
 
 
 class DirectoryWatcher(FileSystemEventHandler):
+    # Watchdog callbacks only enqueue the event. Bursts are coalesced per file by the
+    # queue and handled by its worker pool, off the observer thread.
     def __init__(self, milvus_client: MilvusClient):
         self.milvus_client = milvus_client
-        self.last_event: Tuple[
-            str, str
-        ] = ()  # Tracks the last event type for each file path
+        self.queue = DocumentEventQueue(
+            self.handle_event,
+            config["ingestion"]["watcher_debounce_seconds"],
+            config["ingestion"]["watcher_workers"],
+        )
 
     def on_created(self, event: FileSystemEvent) -> None:
         if not event.is_directory:
-            self.process_unique_event(
-                event.src_path, "created/modified", self.process_file
-            )
+            self.queue.submit(event.src_path, "upsert")
 
     def on_modified(self, event: FileSystemEvent) -> None:
         if not event.is_directory:
-            self.process_unique_event(
-                event.src_path, "created/modified", self.process_file
-            )
+            self.queue.submit(event.src_path, "upsert")
 
     def on_deleted(self, event: FileSystemEvent) -> None:
         if not event.is_directory:
-            self.process_unique_event(event.src_path, "deleted", self.delete_vectors)
-
-    def process_unique_event(
-        self, file_path: str, event_type: str, callback: Callable[[str], None]
-    ) -> None:
-        # Process each event just ones, as windows sometimes logs them multiple time
-        event = (file_path, event_type)
-        # Abort if this file was processed already
-        if self.last_event == event:
-            return
-        self.last_event = event
-        callback(file_path)
+            self.queue.submit(event.src_path, "delete")
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        if not event.is_directory:
+            self.queue.submit(event.src_path, "delete")
+            self.queue.submit(event.dest_path, "upsert")
+
+    def handle_event(self, file_path: str, action: str) -> None:
+        if action == "delete":
+            self.delete_vectors(file_path)
+        else:
+            self.process_file(file_path)
 
     def process_file(self, file_path: str) -> None:
         logger.info(
             f"Processing file for insert: {file_path}",
         )
         try:
-            os.system(f'attrib -h "{file_path}"')
-            file_name = os.path.basename(file_path)
             try:
-                reader = PdfReader(file_path)
+                file_name, chunks = open_pdf_chunks(file_path)
             except:
                 logger.warning(
                     "File not readable. Only pdf files are supported.",
                     exc_info=True,
                 )
                 return
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            text_splitter = RecursiveCharacterTextSplitter()
-            text_chunks = []
-            metadata_list = []
-
-            for text_chunk in text_splitter.split_text(text):
-                text_chunks.append(text_chunk)
-                metadata_list.append(file_name)
-
-            embeddings = embedding_model.embed_documents(text_chunks)
-
-            data = [
-                {"embedding": embedding, "text": text, "metadata": metadata}
-                for embedding, text, metadata in zip(
-                    embeddings, text_chunks, metadata_list
-                )
-            ]
-
-            res = milvus_client.insert(collection_name="collection_rag", data=data)
-            logger.info(
-                f"Inserted RAG document: {res}",
-            )
+            _replace_document(self.milvus_client, file_path, file_name, chunks)
         except Exception as e:
             logger.warning(
                 f"Processing PDF File failed: {e}",
@@ -271,14 +419,15 @@ class DirectoryWatcher(FileSystemEventHandler):
         while attempts < 3:
             try:
                 file_name = os.path.basename(file_path)
-                res = milvus_client.delete(
+                res = self.milvus_client.delete(
                     collection_name="collection_rag",
-                    filter=f'metadata == "{file_name}"',
+                    filter=_document_filter(file_name),
                 )
-                milvus_client.flush("collection_rag")
+                self.milvus_client.flush("collection_rag")
                 logger.info(
                     f"Deleted RAG document: {res}",
                 )
+                _forget_document(file_name)
                 return
             except Exception as e:
                 attempts += 1
@@ -289,7 +438,10 @@ class DirectoryWatcher(FileSystemEventHandler):
 
 
 def _watch_directory(milvus_client: MilvusClient, directory: str) -> None:
+    global directory_watcher
     event_handler: DirectoryWatcher = DirectoryWatcher(milvus_client)
+    directory_watcher = event_handler
+    event_handler.queue.start()
     observer = Observer()
     observer.schedule(event_handler, directory, recursive=False)
     logger.info(
@@ -302,11 +454,18 @@ def _watch_directory(milvus_client: MilvusClient, directory: str) -> None:
     finally:
         observer.stop()
         observer.join()
+        event_handler.queue.stop()
 
 
 def initialize_milvus(config_file: AppConfig):
-    global milvus_client, config, embedding_model, observer_started
+    global milvus_client, config, embedding_model, observer_started, similar_ticket_cache
     config = config_file
+    similar_ticket_cache = LRUCache(
+        max_entries=config["milvus"]["similar_tickets_cache_max_entries"],
+        # Invalidation only sees this process's writes, the TTL bounds staleness
+        # from tickets synced by other workers
+        ttl_seconds=config["milvus"]["similar_tickets_cache_ttl_seconds"],
+    )
     embedding_model = OllamaEmbeddings(model=config["ollama"]["embedding_model"])
     milvus_client = None
     attempts = 0
@@ -392,6 +551,18 @@ def initialize_milvus(config_file: AppConfig):
         raise RuntimeError(f"Milvus initialization failed: {e}") from e
 
 
+def format_document_source(metadata: ChunkMetadata | str) -> str:
+    # Chunks stored before page metadata existed carry the plain file name
+    if not isinstance(metadata, dict):
+        return str(metadata)
+    pages = metadata.get("pages") or []
+    if not pages:
+        return metadata["source"]
+    if len(pages) == 1:
+        return f"{metadata['source']}, page {pages[0]}"
+    return f"{metadata['source']}, pages {pages[0]}-{pages[-1]}"
+
+
 def retrieve_documents_milvus(query: str) -> List[dict]:
     try:
         query_vector = embedding_model.embed_query(query)
@@ -426,60 +597,79 @@ def embed_summary(summary: str) -> List[float]:
     raise RuntimeError(f"Failed to embed summary: {e}") from e
 
 
-def store_ticket_milvus(
-    ticket_id: int, summary_vector: List[float], ticket_title: str
-) -> None:
-    attempts = 0
-    while attempts < 3:
-        try:
-            data = [
-                {"id": ticket_id, "embedding": summary_vector, "title": ticket_title}
-            ]
-            milvus_client.insert(collection_name="collection_ticket", data=data)
-            logger.info(
-                f"Stored ticket with id: {ticket_id} in Milvus database.",
-            )
-            return
-        except Exception as e:
-            attempts += 1
-            logger.error(
-                f"Storing ticket in Milvus failed on attempt {attempts + 1}: {e}",
-                exc_info=True,
-            )
+def upsert_tickets_milvus(tickets: List[Tuple[int, List[float], str]]) -> None:
+    # Upsert by primary key, so replaying the same (ticket_id, summary_vector, title)
+    # leaves exactly one entity. Raises on failure, callers decide about retries
+    if not tickets:
+        return
+    data = [
+        {"id": ticket_id, "embedding": summary_vector, "title": ticket_title}
+        for ticket_id, summary_vector, ticket_title in tickets
+    ]
+    milvus_client.upsert(collection_name="collection_ticket", data=data)
+    logger.info(
+        f"Stored tickets with ids: {[ticket[0] for ticket in tickets]} in Milvus database.",
+    )
+    _on_collection_ticket_changed()
 
 
-def remove_ticket_milvus(ticket_id: int) -> None:
-    attempts = 0
-    while attempts < 3:
-        try:
-            milvus_client.delete(
-                collection_name="collection_ticket",
-                filter=f"id == {ticket_id}",
-            )
-            milvus_client.flush("collection_ticket")
-            logger.info(
-                f"Removed ticket with id: {ticket_id} from Milvus database.",
-            )
-            return
-        except Exception as e:
-            attempts += 1
-            logger.error(
-                f"Removing ticket from Milvus failed on attempt {attempts + 1}: {e}",
-                exc_info=True,
-            )
+def delete_tickets_milvus(ticket_ids: List[int]) -> None:
+    # Deleting absent ids is a no-op, so this is idempotent as well
+    if not ticket_ids:
+        return
+    milvus_client.delete(
+        collection_name="collection_ticket",
+        filter=f"id in {[int(ticket_id) for ticket_id in ticket_ids]}",
+    )
+    milvus_client.flush("collection_ticket")
+    logger.info(
+        f"Removed tickets with ids: {list(ticket_ids)} from Milvus database.",
+    )
+    _on_collection_ticket_changed(removed_ticket_ids=set(ticket_ids))
+
+
+def _on_collection_ticket_changed(removed_ticket_ids: Set[int] | None = None) -> None:
+    global collection_ticket_generation
+    collection_ticket_generation += 1
+    if similar_ticket_cache is None:
+        return
+    if removed_ticket_ids is None:
+        # A new ticket may enter any cached neighbour list
+        similar_ticket_cache.clear()
+        return
+    # Removed tickets only affect the lists that contain them
+    similar_ticket_cache.invalidate_matching(
+        lambda _, similar_tickets: any(
+            item["id"] in removed_ticket_ids for item in similar_tickets
+        )
+    )
 
 
 def retrieve_similar_tickets_milvus(
     summary_vector: List[float], ticket_id: int
 ) -> List[dict]:
+    cache = similar_ticket_cache
+    if cache is not None:
+        similar_tickets = cache.get(ticket_id)
+        if similar_tickets is not None:
+            return similar_tickets
+    # A change to collection_ticket during the search must not be cached over
+    generation = collection_ticket_generation
     try:
-        return milvus_client.search(
+        # Range search, Milvus only returns neighbours within the similarity threshold
+        similar_tickets = milvus_client.search(
             collection_name="collection_ticket",
             anns_field="embedding",
             data=[summary_vector],
-            limit=5,
+            limit=config["milvus"]["similar_tickets_limit"],
             filter=f"id != {ticket_id}",
-            search_params={"metric_type": "COSINE"},
+            search_params={
+                "metric_type": config["milvus"]["metric_type_tickets"],
+                "params": {
+                    "radius": config["milvus"]["similar_tickets_radius"],
+                    "range_filter": config["milvus"]["similar_tickets_range_filter"],
+                },
+            },
             output_fields=["title"],
         )[0]
     except Exception as e:
@@ -488,3 +678,19 @@ def retrieve_similar_tickets_milvus(
             exc_info=True,
         )
         return []
+    similar_tickets = list(similar_tickets)
+    if cache is not None and generation == collection_ticket_generation:
+        cache.set(ticket_id, similar_tickets)
+    return similar_tickets
+
+
+def get_similar_ticket_cache_stats() -> dict:
+    if similar_ticket_cache is None:
+        return {}
+    return similar_ticket_cache.stats()
+
+
+def get_document_queue_stats() -> dict:
+    if directory_watcher is None:
+        return {}
+    return directory_watcher.queue.stats()
@@ -12,13 +12,21 @@ CREATE TABLE tickets (
     ticket_id INT AUTO_INCREMENT PRIMARY KEY,
     title VARCHAR(255) NOT NULL,       
     content TEXT NOT NULL,             
-    summary_vector JSON,                      
+    content_preview VARCHAR(300) GENERATED ALWAYS AS (LEFT(content, 300)) STORED,
+    summary_vector BLOB,
     creation_date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  
     closed_date DATETIME DEFAULT NULL,  
     author_id CHAR(36) NOT NULL,         
     assignee_id CHAR(36) DEFAULT NULL,  
+    version INT UNSIGNED NOT NULL DEFAULT 1,
+    is_open TINYINT(1) GENERATED ALWAYS AS (closed_date IS NULL) STORED,
     FOREIGN KEY (author_id) REFERENCES azure_users(user_id) ON DELETE CASCADE,
-    FOREIGN KEY (assignee_id) REFERENCES azure_users(user_id) ON DELETE SET NULL
+    FOREIGN KEY (assignee_id) REFERENCES azure_users(user_id) ON DELETE SET NULL,
+    FULLTEXT INDEX ft_tickets_title_content (title, content),
+    INDEX idx_tickets_creation (creation_date, ticket_id),
+    INDEX idx_tickets_author_creation (author_id, creation_date, ticket_id),
+    INDEX idx_tickets_assignee_creation (assignee_id, creation_date, ticket_id),
+    INDEX idx_tickets_open_creation (is_open, creation_date, ticket_id)
 );
 
 CREATE TABLE ticket_messages (
@@ -28,5 +36,21 @@ CREATE TABLE ticket_messages (
     message TEXT NOT NULL,                     
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  
     FOREIGN KEY (ticket_id) REFERENCES tickets(ticket_id) ON DELETE CASCADE,
-    FOREIGN KEY (author_id) REFERENCES azure_users(user_id) ON DELETE CASCADE
-);
\ No newline at end of file
+    FOREIGN KEY (author_id) REFERENCES azure_users(user_id) ON DELETE CASCADE,
+    FULLTEXT INDEX ft_ticket_messages_message (message),
+    INDEX idx_ticket_messages_ticket_created (ticket_id, created_at, message_id),
+    INDEX idx_ticket_messages_ticket_message (ticket_id, message_id)
+);
+
+-- Pending collection_ticket changes, drained by backend.milvus_outbox
+CREATE TABLE milvus_outbox (
+    outbox_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    ticket_id INT NOT NULL,
+    created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    last_error VARCHAR(1000) DEFAULT NULL,
+    INDEX idx_milvus_outbox_due (next_attempt_at, outbox_id)
+);
+
+-- Existing databases are upgraded with: python -m backend.migrations upgrade
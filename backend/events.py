@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Dict, Protocol, Set
+from custom_types import TicketEvent
+
+logger = logging.getLogger("EVENTS " + __name__)
+
+
+def ticket_topic(ticket_id: int) -> str:
+    return f"ticket:{ticket_id}"
+
+
+class EventSubscription(Protocol):
+    async def get(self) -> TicketEvent: ...
+
+
+class EventBroker(ABC):
+    # Publish/subscribe interface for ticket events. publish() may be called from any
+    # thread. Replace the in-process broker with one backed by a message broker
+    # (e.g. Redis pub/sub) once the app runs in more than one process
+    @abstractmethod
+    def publish(self, topic: str, event: TicketEvent) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, topic: str) -> AsyncContextManager[EventSubscription]: ...
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class _InProcessSubscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queued_events: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[TicketEvent] = asyncio.Queue(max_queued_events)
+
+    def deliver(self, event: TicketEvent) -> None:
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            # Slow consumer: drop the backlog, the client refetches the ticket instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"type": "resync", "ticket_id": event["ticket_id"], "data": {}}
+        self.queue.put_nowait(event)
+
+    async def get(self) -> TicketEvent:
+        return await self.queue.get()
+
+
+class InProcessEventBroker(EventBroker):
+    def __init__(self, max_queued_events: int = 100):
+        self.max_queued_events = max_queued_events
+        self._subscriptions: Dict[str, Set[_InProcessSubscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, topic: str, event: TicketEvent) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+            self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Event loop already closed, the subscription is removed on exit
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator[EventSubscription]:
+        subscription = _InProcessSubscription(
+            asyncio.get_running_loop(), self.max_queued_events
+        )
+        with self._lock:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                topic_subscriptions = self._subscriptions.get(topic)
+                if topic_subscriptions is not None:
+                    topic_subscriptions.discard(subscription)
+                    if not topic_subscriptions:
+                        del self._subscriptions[topic]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "topics": len(self._subscriptions),
+                "subscribers": sum(map(len, self._subscriptions.values())),
+                "published": self.published,
+            }
+
+
+event_broker: EventBroker = InProcessEventBroker()
+
+
+def get_event_broker() -> EventBroker:
+    return event_broker
+
+
+def set_event_broker(broker: EventBroker) -> None:
+    global event_broker
+    event_broker = broker
+
+
+def publish_ticket_event(ticket_id: int, event_type: str, data: dict) -> None:
+    # Events are best effort, a failed publish must not fail the change itself
+    try:
+        get_event_broker().publish(
+            ticket_topic(ticket_id),
+            {"type": event_type, "ticket_id": ticket_id, "data": data},
+        )
+    except Exception as e:
+        logger.error(f"Publishing {event_type} event for ticket {ticket_id} failed: {e}")
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import httpx
+from custom_types import HttpClientConfig
+
+logger = logging.getLogger("HTTP_CLIENT " + __name__)
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class HTTPClient:
+    # Shared keep-alive connection pool for outbound calls made from async handlers
+    def __init__(
+        self,
+        config: HttpClientConfig,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.config = config
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(
+                config["timeout_seconds"], connect=config["connect_timeout_seconds"]
+            ),
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_keepalive_connections"],
+                keepalive_expiry=config["keepalive_expiry_seconds"],
+            ),
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(
+                self.config["max_connections_per_host"]
+            )
+        return self._host_limits[host]
+
+    async def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        # GET is idempotent, so transport errors and overload responses are retried
+        attempts = 0
+        while True:
+            try:
+                async with self._host_limit(url):
+                    response = await self._client.get(url, headers=headers)
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempts >= self.config["max_retries"]
+                ):
+                    return response
+                logger.warning(
+                    f"GET {url} returned {response.status_code}, retrying.",
+                )
+            except httpx.TransportError as e:
+                if attempts >= self.config["max_retries"]:
+                    raise
+                logger.warning(f"GET {url} failed: {e}, retrying.")
+            attempts += 1
+            await asyncio.sleep(
+                self.config["retry_backoff_seconds"] * 2 ** (attempts - 1)
+            )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+http_client: Optional[HTTPClient] = None
+http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+http_client_config: Optional[HttpClientConfig] = None
+
+
+async def start_http_client(config: HttpClientConfig) -> HTTPClient:
+    global http_client, http_client_loop, http_client_config
+    http_client_config = config
+    http_client = HTTPClient(config)
+    http_client_loop = asyncio.get_running_loop()
+    logger.info("HTTP client started.")
+    return http_client
+
+
+async def stop_http_client() -> None:
+    global http_client, http_client_loop
+    if http_client is not None:
+        await http_client.aclose()
+        logger.info("HTTP client stopped.")
+    http_client = None
+    http_client_loop = None
+
+
+async def get_http_client() -> HTTPClient:
+    global http_client, http_client_loop
+    # Pooled connections belong to the event loop that opened them. The app lifespan
+    # creates the client once, a client is only created here if the app runs without
+    # lifespan (e.g. TestClient used outside of a with block)
+    running_loop = asyncio.get_running_loop()
+    if http_client is None or http_client_loop is not running_loop:
+        if http_client_config is None:
+            raise RuntimeError("HTTP client is not configured")
+        if http_client is not None:
+            # Release the sockets of the previous loop's pool before replacing it
+            try:
+                await http_client.aclose()
+            except Exception as e:
+                logger.warning(f"Closing the previous HTTP client failed: {e}")
+        http_client = HTTPClient(http_client_config)
+        http_client_loop = running_loop
+    return http_client
+
+
+def configure_http_client(config: HttpClientConfig) -> None:
+    global http_client_config
+    http_client_config = config
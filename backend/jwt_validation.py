@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import jwt
+from backend.http_client import get_http_client
+from backend.pydantic_models import User
+
+logger = logging.getLogger("JWT_VALIDATION " + __name__)
+
+
+class JWKSCache:
+    # Signing keys are fetched once and only refetched when a token references an
+    # unknown key id (key rotation), at most once per min_refresh_interval_seconds
+    def __init__(self, jwks_uri: str, min_refresh_interval_seconds: float = 300):
+        self.jwks_uri = jwks_uri
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._last_refresh: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _fetch_jwks(self) -> Dict[str, Any]:
+        # file:// URIs and plain paths allow running against a local key set
+        parsed = urlparse(self.jwks_uri)
+        if parsed.scheme in ("http", "https"):
+            http_client = await get_http_client()
+            response = await http_client.get(self.jwks_uri)
+            response.raise_for_status()
+            return response.json()
+        path = url2pathname(parsed.path) if parsed.scheme == "file" else self.jwks_uri
+        with open(path, "r") as file:
+            return json.load(file)
+
+    async def refresh(self) -> None:
+        jwks = await self._fetch_jwks()
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            if "kid" not in key_data or key_data.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[key_data["kid"]] = jwt.PyJWK(key_data)
+            except jwt.PyJWTError as e:
+                logger.warning(f"Skipping unusable JWKS key {key_data['kid']}: {e}")
+        self._keys = keys
+        self._last_refresh = time.monotonic()
+        logger.info(f"Loaded {len(keys)} signing keys from {self.jwks_uri}")
+
+    async def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        # Lock is created lazily so it binds to the event loop that serves requests
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if (
+                self._last_refresh is None
+                or time.monotonic() - self._last_refresh
+                >= self.min_refresh_interval_seconds
+            ):
+                await self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key id: {kid}")
+        return key
+
+
+async def validate_access_token(
+    token: str,
+    jwks_cache: JWKSCache,
+    audience: str,
+    issuer: str,
+    leeway_seconds: float = 0,
+) -> Dict[str, Any]:
+    header = jwt.get_unverified_header(token)
+    if "kid" not in header:
+        raise jwt.InvalidTokenError("Token header has no key id")
+    signing_key = await jwks_cache.get_signing_key(header["kid"])
+    return jwt.decode(
+        token,
+        key=signing_key.key,
+        algorithms=[signing_key.algorithm_name],
+        audience=audience,
+        issuer=issuer,
+        leeway=leeway_seconds,
+        options={"require": ["exp", "iss", "aud"]},
+    )
+
+
+def user_from_claims(
+    claims: Dict[str, Any], users_group_id: str, technicians_group_id: str
+) -> User:
+    if "groups" not in claims and "_claim_names" in claims:
+        # Group overage: Azure AD omits the groups claim for users in too many groups
+        logger.warning(
+            f"Token of user {claims.get('oid')} has no groups claim (group overage)."
+        )
+    group_ids = claims.get("groups", [])
+
+    # Translate groups into group names for frontend use
+    group = ""
+    if users_group_id in group_ids:
+        group = "users"
+    if technicians_group_id in group_ids:
+        group = "technicians"
+
+    return User(
+        user_id=claims.get("oid"),
+        user_name=claims.get("name"),
+        group=group,
+    )
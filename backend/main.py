@@ -1,41 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
 import logging
 import json
 from logging.handlers import RotatingFileHandler
 import os
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from ai_system.vectordb import initialize_milvus, embed_summary
+from starlette.concurrency import run_in_threadpool
+from ai_system import vectordb
+from ai_system.vectordb import (
+    embed_summary,
+    get_document_queue_stats,
+    get_similar_ticket_cache_stats,
+    initialize_milvus,
+)
 from ai_system.ai_system import initialize_langchain
-from custom_types import WorkflowResponse, AppConfig
+from custom_types import AppConfig, TicketMessageSync, TicketState, WorkflowResponse
 from dotenv import load_dotenv
 from backend.pydantic_models import (
     NewTicketMessage,
     TicketAssignee,
     TicketFilter,
     TicketId,
+    TicketOperations,
     User,
     WorkflowRequestModel,
 )
-from utils import load_json
+from utils import LRUCache, load_json
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.security import OAuth2AuthorizationCodeBearer
-from typing import Annotated, Callable
-import requests
+from typing import Annotated, Callable, Tuple
+import hashlib
+import time
+import uuid
+import httpx
 import jwt
+from backend.events import (
+    InProcessEventBroker,
+    get_event_broker,
+    publish_ticket_event,
+    set_event_broker,
+    ticket_topic,
+)
+from backend.milvus_outbox import (
+    get_milvus_outbox_status,
+    notify_milvus_outbox,
+    start_milvus_outbox_worker,
+    stop_milvus_outbox_worker,
+)
+from backend.http_client import (
+    configure_http_client,
+    get_http_client,
+    start_http_client,
+    stop_http_client,
+)
+from backend.jwt_validation import JWKSCache, user_from_claims, validate_access_token
 from backend.relationaldb import (
+    TICKET_DETAIL_INCLUDES,
+    configure_ticket_count_cache,
+    configure_user_directory,
+    get_connection_pool_status,
+    get_user_directory_stats,
+    is_known_azure_user,
+)
+from backend.relationaldb_async import (
+    apply_ticket_operations,
     assign_ticket,
     close_ticket,
+    configure_db_executor,
+    get_db_executor_status,
     get_filtered_tickets,
     get_technicians,
+    get_ticket_stats,
     get_user_tickets,
     insert_ticket,
-    insert_azure_user,
     insert_ticket_message,
-    is_azure_user_in_db,
     get_ticket,
+    get_ticket_messages,
+    get_ticket_state,
     reopen_ticket,
+    run_in_db_executor,
+    start_db_executor,
+    stop_db_executor,
+    upsert_azure_user,
 )
 
 # Load environment variables
@@ -88,13 +138,53 @@ GRAPH_API_URL = (
 USERS_GROUP_ID = os.getenv("USERS_GROUP_ID")
 TECHNICIANS_GROUP_ID = os.getenv("TECHNICIANS_GROUP_ID")
 
+# Authentication mode: "graph" asks Microsoft Graph for every new token, "local_jwt"
+# validates signature and claims against the cached tenant signing keys
+AUTH_MODE = config["auth"].get("mode", "graph")
+
+
+def _auth_setting(name: str) -> str:
+    return config["auth"][name].format(tenant_id=TENANT_ID, client_id=CLIENT_ID)
+
+
+jwks_cache = None
+if AUTH_MODE == "local_jwt":
+    jwks_cache = JWKSCache(
+        _auth_setting("jwks_uri"),
+        min_refresh_interval_seconds=config["auth"]["jwks_refresh_interval_seconds"],
+    )
+
+# Cache resolved identities per token, so Graph is only asked once per token and ttl
+identity_cache = LRUCache(
+    max_entries=config["auth"]["identity_cache_max_entries"],
+    ttl_seconds=config["auth"]["identity_cache_ttl_seconds"],
+)
+
 # OAuth2 Scheme
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=f"{AUTHORITY}/oauth2/v2.0/authorize", tokenUrl=TOKEN_URL
 )  # Authorisation url is where users authenticate (login with azure account)
 
+configure_http_client(config["http_client"])
+set_event_broker(InProcessEventBroker(config["events"]["max_queued_events"]))
+configure_db_executor(config)
+configure_user_directory(config)
+configure_ticket_count_cache(config)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client(config["http_client"])
+    start_db_executor()
+    start_milvus_outbox_worker(config)
+    yield
+    await stop_milvus_outbox_worker()
+    stop_db_executor()
+    await stop_http_client()
+
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -139,17 +229,58 @@ async def add_security_headers(request: Request, call_next):
 
 
 # Verify Token and Extract Current User and Groups
+def _token_expiry(token: str) -> float | None:
+    # Translate the exp claim into a time.monotonic() timestamp for the identity cache
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    if "exp" not in claims:
+        return None
+    return time.monotonic() + (float(claims["exp"]) - time.time())
+
+
+async def verify_token_locally(token: str) -> User:
+    try:
+        claims = await validate_access_token(
+            token,
+            jwks_cache,
+            audience=_auth_setting("audience"),
+            issuer=_auth_setting("issuer"),
+            leeway_seconds=config["auth"]["leeway_seconds"],
+        )
+        return user_from_claims(claims, USERS_GROUP_ID, TECHNICIANS_GROUP_ID)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except Exception as e:
+        logger.error(f"Loading token signing keys failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error loading token signing keys")
+
+
 async def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
+    if AUTH_MODE == "local_jwt":
+        return await verify_token_locally(token)
+
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    cached_user = identity_cache.get(token_hash)
+    if cached_user is not None:
+        return cached_user
+
     headers = {"Authorization": f"Bearer {token}"}
 
     try:
-        response = requests.get(GRAPH_API_URL, headers=headers)
+        http_client = await get_http_client()
+        response, groups_response = await asyncio.gather(
+            http_client.get(GRAPH_API_URL, headers=headers),
+            http_client.get(f"{GRAPH_API_URL}/memberOf", headers=headers),
+        )
         user_resp = response.json()
 
         if response.status_code != 200:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        groups_response = requests.get(f"{GRAPH_API_URL}/memberOf", headers=headers)
         groups_data = groups_response.json()
 
         group_ids = []
@@ -164,13 +295,19 @@ async def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
         if TECHNICIANS_GROUP_ID in group_ids:
             group = "technicians"
 
-        return User(
+        user = User(
             user_id=user_resp.get("id"),
             user_name=user_resp.get("displayName"),
             group=group,
         )
 
-    except requests.exceptions.RequestException as e:
+        expires_at = _token_expiry(token)
+        if expires_at is None or expires_at > time.monotonic():
+            identity_cache.set(token_hash, user, expires_at=expires_at)
+
+        return user
+
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500, detail="Error connecting to Microsoft Graph API"
         )
@@ -195,8 +332,9 @@ def check_user_group(required_group_id: str) -> Callable[[User], User]:
 @app.get("/api/users/me")
 async def read_users_me(user: Annotated[User, Depends(verify_token)]):
     try:
-        if not is_azure_user_in_db(user.user_id, config):
-            insert_azure_user(user.user_id, user.user_name, user.group, config)
+        # Known users are answered without a database executor round trip
+        if not is_known_azure_user(user.user_id, user.user_name, user.group):
+            await upsert_azure_user(user.user_id, user.user_name, user.group, config)
     except Exception:
         raise HTTPException(status_code=500, detail="Storing user data failed")
     logger.info(f"User logged in and requested account details: {user}")
@@ -239,10 +377,10 @@ async def init_ai_workflow(
                 summary = json.dumps(response["ticket_summary"])
 
                 # Create embedding of the summary
-                summary_vector = embed_summary(summary)
+                summary_vector = await run_in_threadpool(embed_summary, summary)
 
                 # Store ticket in DB
-                ticket_id = insert_ticket(
+                ticket_id = await insert_ticket(
                     title, content, summary_vector, user.user_id, config
                 )
 
@@ -264,23 +402,195 @@ async def init_ai_workflow(
     }
 
 
+def parse_ticket_include(include: str | None) -> frozenset[str]:
+    if include is None:
+        return TICKET_DETAIL_INCLUDES
+    parts = frozenset(part.strip() for part in include.split(",") if part.strip())
+    if not parts <= TICKET_DETAIL_INCLUDES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"include accepts: {', '.join(sorted(TICKET_DETAIL_INCLUDES))}",
+        )
+    return parts
+
+
+# Similar tickets depend on the in-process Milvus collection generation, which only
+# means something within this process
+ETAG_PROCESS_ID = uuid.uuid4().hex[:8]
+
+
+def ticket_etag(state: TicketState, user: User, include: frozenset[str]) -> str:
+    parts = [f"t{state['ticket_id']}", f"v{state['version']}"]
+    if "ticket_messages" in include:
+        parts.append("m")
+    if "similar_tickets" in include and user.group == "technicians":
+        parts.append(f"s{ETAG_PROCESS_ID}.{vectordb.collection_ticket_generation}")
+    return 'W/"' + "-".join(parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as described in RFC 9110
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def ticket_access_error(state: TicketState | None, user: User) -> int | None:
+    # Status code that denies the access, None if the user may read the ticket
+    if state is None:
+        return 404
+    # Only allow the request for the ticket author and technicians
+    if state["author_id"] != user.user_id and user.group != "technicians":
+        logger.warning(
+            "Unauthorized ticket access. User is not the ticket author or part of the technicians group.",
+        )
+        return 403
+    return None
+
+
+TICKET_ACCESS_ERRORS = {404: "Ticket not found", 403: "Unauthorized access"}
+
+
+async def get_accessible_ticket_state(ticket_id: int, user: User) -> TicketState:
+    try:
+        state = await get_ticket_state(ticket_id, config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to retrieve ticket")
+    status_code = ticket_access_error(state, user)
+    if status_code is not None:
+        raise HTTPException(
+            status_code=status_code, detail=TICKET_ACCESS_ERRORS[status_code]
+        )
+    return state
+
+
 @app.get("/api/ticket/{id}")
-async def get_ticket_by_id(user: Annotated[User, Depends(verify_token)], id: int):
+async def get_ticket_by_id(
+    request: Request,
+    response: Response,
+    user: Annotated[User, Depends(verify_token)],
+    id: int,
+    include: str | None = None,
+):
+    ticket_include = parse_ticket_include(include)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Unchanged tickets are answered from the primary key lookup alone
+        state = await get_accessible_ticket_state(id, user)
+        etag = ticket_etag(state, user, ticket_include)
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=304,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+            )
+
     try:
-        ticket = get_ticket(id, user, config)
-        # Only allow the request for the ticket author and technicians
-        if user.user_name != ticket["author_name"]:
-            if user.group != "technicians":
-                logger.warning(
-                    "Unauthorized ticket access. User is not the ticket author or part of the technicians group.",
-                    exc_info=True,
-                )
-                raise PermissionError
-        return ticket
-    except PermissionError as e:
-        raise HTTPException(status_code=403, detail="Unauthorized access")
+        ticket = await get_ticket(id, user, config, ticket_include)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve ticket")
+    # Access and the ETag come from the row that was read, so a plain GET is a
+    # single round trip
+    state = None
+    if ticket is not None:
+        state = {
+            "ticket_id": ticket["ticket_id"],
+            "author_id": ticket.pop("author_id"),
+            "version": ticket["version"],
+        }
+    status_code = ticket_access_error(state, user)
+    if status_code is not None:
+        raise HTTPException(
+            status_code=status_code, detail=TICKET_ACCESS_ERRORS[status_code]
+        )
+    response.headers.update(
+        {
+            "ETag": ticket_etag(state, user, ticket_include),
+            "Cache-Control": "private, no-cache",
+        }
+    )
+    return ticket
+
+
+@app.get("/api/ticket/{id}/messages")
+async def get_new_ticket_messages(
+    user: Annotated[User, Depends(verify_token)],
+    id: int,
+    after: int = 0,
+):
+    state = await get_accessible_ticket_state(id, user)
+    try:
+        messages = await get_ticket_messages(id, config, after_message_id=after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to retrieve ticket messages")
+    ticket_message_sync: TicketMessageSync = {
+        "version": state["version"],
+        "ticket_messages": messages,
+    }
+    return ticket_message_sync
+
+
+def format_sse(event_type: str, data) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@app.get("/api/ticket/{id}/events")
+async def stream_ticket_events(
+    user: Annotated[User, Depends(verify_token)],
+    id: int,
+):
+    await get_accessible_ticket_state(id, user)
+
+    async def read_accessible_state() -> Tuple[TicketState | None, str | None]:
+        # The response has already started, access problems end the stream with an
+        # error event instead of a status code
+        try:
+            state = await get_ticket_state(id, config)
+        except Exception as e:
+            logger.error(f"Reading ticket {id} for its event stream failed: {e}")
+            return None, "Failed to retrieve ticket"
+        status_code = ticket_access_error(state, user)
+        if status_code is not None:
+            return None, TICKET_ACCESS_ERRORS[status_code]
+        return state, None
+
+    async def event_stream():
+        async with get_event_broker().subscribe(ticket_topic(id)) as events:
+            # Read the version after subscribing, so clients can tell whether they
+            # missed a change before the stream was established. The ticket may
+            # have been deleted since the access check.
+            state, error = await read_accessible_state()
+            if error is not None:
+                yield format_sse("error", {"ticket_id": id, "detail": error})
+                return
+            yield format_sse("ready", {"ticket_id": id, "version": state["version"]})
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        events.get(), timeout=config["events"]["keepalive_seconds"]
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing idle streams
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] in ("status", "assignment"):
+                    # Access is re-checked whenever the ticket itself changes
+                    _, error = await read_accessible_state()
+                    if error is not None:
+                        yield format_sse("error", {"ticket_id": id, "detail": error})
+                        return
+                yield format_sse(event["type"], event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/api/insert-ticket-message")
@@ -289,7 +599,10 @@ async def insert_ticket_message_db(
     new_ticket_message: NewTicketMessage,
 ):
     try:
-        insert_ticket_message(new_ticket_message, user, config)
+        message = await insert_ticket_message(new_ticket_message, user, config)
+        publish_ticket_event(
+            new_ticket_message.ticket_id, "message", {"message": message}
+        )
         return
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
@@ -303,7 +616,9 @@ async def close_ticket_db(
     ticket: TicketId,
 ):
     try:
-        close_ticket(ticket.ticket_id, config)
+        await close_ticket(ticket.ticket_id, config)
+        notify_milvus_outbox()
+        publish_ticket_event(ticket.ticket_id, "status", {"closed": True})
         return
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
@@ -317,7 +632,9 @@ async def reopen_ticket_db(
     ticket: TicketId,
 ):
     try:
-        reopen_ticket(ticket.ticket_id, config)
+        await reopen_ticket(ticket.ticket_id, config)
+        notify_milvus_outbox()
+        publish_ticket_event(ticket.ticket_id, "status", {"closed": False})
         return
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
@@ -331,10 +648,12 @@ async def get_tickets(
     filter_data: TicketFilter,
 ):
     try:
-        tickets = get_filtered_tickets(filter_data, config)
+        tickets = await get_filtered_tickets(filter_data, config)
         return tickets
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve tickets")
 
@@ -345,26 +664,44 @@ async def get_my_tickets(
     filter_data: TicketFilter,
 ):
     try:
-        tickets = get_user_tickets(user, filter_data, config)
+        tickets = await get_user_tickets(user, filter_data, config)
         return tickets
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve tickets")
 
 
 @app.get("/api/technicians")
 async def get_technicians_db(
+    request: Request,
+    response: Response,
     user: Annotated[User, Depends(check_user_group("technicians"))],
 ):
     try:
-        technicians = get_technicians(config)
-        return technicians
+        technicians = await get_technicians(config)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve technicians")
 
+    # Derived from the content, so every app process hands out the same tag
+    etag = (
+        'W/"'
+        + hashlib.sha256(json.dumps(technicians).encode()).hexdigest()[:16]
+        + '"'
+    )
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={config['user_directory']['technicians_max_age_seconds']}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return technicians
+
 
 @app.post("/api/assign-ticket")
 async def assign_ticket_db(
@@ -372,7 +709,10 @@ async def assign_ticket_db(
     ticket: TicketAssignee,
 ):
     try:
-        assign_ticket(ticket, config)
+        await assign_ticket(ticket, config)
+        publish_ticket_event(
+            ticket.ticket_id, "assignment", {"assignee_id": ticket.assignee_id}
+        )
         return
     except PermissionError as e:
         raise HTTPException(status_code=403, detail="Unauthorized access")
@@ -380,6 +720,70 @@ async def assign_ticket_db(
         raise HTTPException(status_code=500, detail="Failed to close ticket")
 
 
+@app.get("/api/tickets/stats")
+async def get_ticket_stats_db(
+    user: Annotated[User, Depends(check_user_group("technicians"))],
+):
+    try:
+        return await get_ticket_stats(config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to retrieve ticket statistics")
+
+
+@app.post("/api/tickets/bulk")
+async def apply_ticket_operations_db(
+    user: Annotated[User, Depends(check_user_group("technicians"))],
+    ticket_operations: TicketOperations,
+):
+    operations = ticket_operations.operations
+    if len(operations) > config["mysql"]["bulk_max_operations"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config['mysql']['bulk_max_operations']} operations per request",
+        )
+    try:
+        results = await apply_ticket_operations(operations, config)
+        notify_milvus_outbox()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to apply ticket operations")
+
+    for operation, result in zip(operations, results):
+        if not result["success"]:
+            continue
+        if operation.action == "assign":
+            publish_ticket_event(
+                operation.ticket_id,
+                "assignment",
+                {"assignee_id": operation.assignee_id},
+            )
+        else:
+            publish_ticket_event(
+                operation.ticket_id, "status", {"closed": operation.action == "close"}
+            )
+    return {"results": results}
+
+
+@app.get("/api/metrics")
+async def get_metrics(
+    user: Annotated[User, Depends(check_user_group("technicians"))],
+):
+    try:
+        milvus_outbox = await run_in_db_executor(get_milvus_outbox_status, config)
+    except Exception as e:
+        logger.error(f"Reading the Milvus outbox status failed: {e}")
+        milvus_outbox = None
+    return {
+        "identity_cache": identity_cache.stats(),
+        "db_pool": get_connection_pool_status(),
+        "db_executor": get_db_executor_status(),
+        "similar_tickets_cache": get_similar_ticket_cache_stats(),
+        "events": get_event_broker().stats(),
+        "user_directory": get_user_directory_stats(),
+        "milvus_outbox": milvus_outbox,
+        "document_queue": get_document_queue_stats(),
+    }
+
+
 class NoTimestampStaticFiles(StaticFiles):
     async def get_response(self, path: str, request: Request):
         response = await super().get_response(path, request)
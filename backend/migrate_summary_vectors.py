@@ -0,0 +1,112 @@
+import argparse
+import logging
+import os
+from dotenv import load_dotenv
+from mysql.connector import Error, errorcode
+from custom_types import AppConfig
+from backend.relationaldb import connect_to_mysql
+from backend.vector_codec import decode_vector, encode_vector
+from utils import load_json
+
+logger = logging.getLogger("MIGRATE_SUMMARY_VECTORS " + __name__)
+
+STAGING_COLUMN = "summary_vector_f32"
+
+
+def _column_type(cursor, column: str) -> str | None:
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'tickets' AND COLUMN_NAME = %s",
+        (column,),
+    )
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def _convert_batches(cnx, cursor, batch_size: int) -> int:
+    # Walks the primary key in batches, every batch is its own short transaction
+    converted = 0
+    last_ticket_id = 0
+    while True:
+        cursor.execute(
+            f"SELECT ticket_id, summary_vector FROM tickets WHERE ticket_id > %s AND summary_vector IS NOT NULL AND {STAGING_COLUMN} IS NULL ORDER BY ticket_id LIMIT %s",
+            (last_ticket_id, batch_size),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return converted
+        cursor.executemany(
+            f"UPDATE tickets SET {STAGING_COLUMN} = %s WHERE ticket_id = %s",
+            [
+                (encode_vector(decode_vector(summary_vector)), ticket_id)
+                for ticket_id, summary_vector in rows
+            ],
+        )
+        cnx.commit()
+        converted += len(rows)
+        last_ticket_id = rows[-1][0]
+        logger.info(f"Converted {converted} summary vectors (up to ticket {last_ticket_id}).")
+
+
+def _swap_columns(cursor) -> None:
+    swap = f"ALTER TABLE tickets DROP COLUMN summary_vector, RENAME COLUMN {STAGING_COLUMN} TO summary_vector"
+    try:
+        # MySQL 8.0.29+ drops and renames the columns as a metadata change, the
+        # table lock is only held for the straggler batches
+        cursor.execute(swap + ", ALGORITHM=INSTANT")
+    except Error as e:
+        if e.errno not in (
+            errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED,
+            errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED_REASON,
+        ):
+            raise
+        # Older servers rebuild the table, writes stay blocked until the copy is done
+        logger.warning(
+            f"Instant column swap not supported ({e}), rebuilding tickets. Writes to tickets are blocked until the rebuild has finished."
+        )
+        cursor.execute(swap)
+
+
+def migrate_summary_vectors(config: AppConfig, batch_size: int = 500) -> int:
+    # Converts tickets.summary_vector from JSON text to a packed float32 BLOB.
+    # Safe to re-run: an interrupted migration continues with the remaining rows.
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor()
+    try:
+        column_type = _column_type(cursor, "summary_vector")
+        if column_type == "blob" and _column_type(cursor, STAGING_COLUMN) is None:
+            logger.info("tickets.summary_vector is already stored as BLOB.")
+            return 0
+
+        if _column_type(cursor, STAGING_COLUMN) is None:
+            cursor.execute(
+                f"ALTER TABLE tickets ADD COLUMN {STAGING_COLUMN} BLOB NULL AFTER summary_vector"
+            )
+
+        converted = _convert_batches(cnx, cursor, batch_size)
+
+        # Convert rows written in the meantime and swap the columns while writes are blocked
+        cursor.execute("LOCK TABLES tickets WRITE")
+        try:
+            converted += _convert_batches(cnx, cursor, batch_size)
+            _swap_columns(cursor)
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        logger.info(f"Summary vector migration finished, {converted} rows converted.")
+        return converted
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description="Convert tickets.summary_vector from JSON to float32 BLOB."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    migrate_summary_vectors(
+        load_json(os.path.join(app_path, "config.json")), args.batch_size
+    )
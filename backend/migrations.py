@@ -0,0 +1,380 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from dotenv import load_dotenv
+from custom_types import AppConfig
+from backend.migrate_summary_vectors import migrate_summary_vectors
+from backend.pydantic_models import TicketFilter
+from backend.relationaldb import (
+    NEW_TICKET_MESSAGES_QUERY,
+    TICKET_MESSAGES_QUERY,
+    TICKET_QUERY,
+    TICKET_STATE_QUERY,
+    _query_ticket_list,
+    connect_to_mysql,
+    encode_ticket_cursor,
+)
+from utils import load_json
+
+logger = logging.getLogger("MIGRATIONS " + __name__)
+
+# Versioned schema changes on top of MySQL_Database_Creation_File.sql. Every step checks
+# the current schema first, so databases that were created from the latest creation file
+# or upgraded by hand are only recorded as migrated.
+#
+#   python -m backend.migrations upgrade   apply pending migrations
+#   python -m backend.migrations status    list applied and pending migrations
+#   python -m backend.migrations check     EXPLAIN the hot queries of relationaldb.py
+
+
+def _has_column(cursor, table: str, column: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column),
+    )
+    return cursor.fetchone() is not None
+
+
+def _has_index(cursor, table: str, index: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (table, index),
+    )
+    return cursor.fetchone() is not None
+
+
+def _add_index(cursor, table: str, index: str, definition: str) -> None:
+    if not _has_index(cursor, table, index):
+        logger.info(f"Adding index {index} to {table}.")
+        cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+def _drop_index(cursor, table: str, index: str) -> None:
+    if _has_index(cursor, table, index):
+        logger.info(f"Dropping index {index} from {table}.")
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {index}")
+
+
+def _add_column(cursor, table: str, column: str, definition: str) -> None:
+    if not _has_column(cursor, table, column):
+        logger.info(f"Adding column {column} to {table}.")
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+
+
+def _fulltext_search(cursor, config: AppConfig) -> None:
+    _add_index(
+        cursor,
+        "tickets",
+        "ft_tickets_title_content",
+        "FULLTEXT INDEX ft_tickets_title_content (title, content)",
+    )
+    _add_index(
+        cursor,
+        "ticket_messages",
+        "ft_ticket_messages_message",
+        "FULLTEXT INDEX ft_ticket_messages_message (message)",
+    )
+
+
+def _content_preview(cursor, config: AppConfig) -> None:
+    _add_column(
+        cursor,
+        "tickets",
+        "content_preview",
+        "content_preview VARCHAR(300) GENERATED ALWAYS AS (LEFT(content, 300)) STORED AFTER content",
+    )
+
+
+def _ticket_version(cursor, config: AppConfig) -> None:
+    _add_column(
+        cursor,
+        "tickets",
+        "version",
+        "version INT UNSIGNED NOT NULL DEFAULT 1 AFTER assignee_id",
+    )
+
+
+def _float32_summary_vectors(cursor, config: AppConfig) -> None:
+    # Batched and resumable on its own connection, see migrate_summary_vectors.py
+    migrate_summary_vectors(config)
+
+
+def _ticket_list_indexes(cursor, config: AppConfig) -> None:
+    # Every list filter is an equality (or IS NULL) on the leading column followed by
+    # the (creation_date, ticket_id) sort order, so pages are read in index order. The
+    # open/closed filter uses the index on the is_open flag of migration 7.
+    _add_index(
+        cursor,
+        "tickets",
+        "idx_tickets_creation",
+        "INDEX idx_tickets_creation (creation_date, ticket_id)",
+    )
+    _add_index(
+        cursor,
+        "tickets",
+        "idx_tickets_author_creation",
+        "INDEX idx_tickets_author_creation (author_id, creation_date, ticket_id)",
+    )
+    _add_index(
+        cursor,
+        "tickets",
+        "idx_tickets_assignee_creation",
+        "INDEX idx_tickets_assignee_creation (assignee_id, creation_date, ticket_id)",
+    )
+    # Full message list in created_at order and incremental sync by message_id
+    _add_index(
+        cursor,
+        "ticket_messages",
+        "idx_ticket_messages_ticket_created",
+        "INDEX idx_ticket_messages_ticket_created (ticket_id, created_at, message_id)",
+    )
+    _add_index(
+        cursor,
+        "ticket_messages",
+        "idx_ticket_messages_ticket_message",
+        "INDEX idx_ticket_messages_ticket_message (ticket_id, message_id)",
+    )
+
+
+def _milvus_outbox(cursor, config: AppConfig) -> None:
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS milvus_outbox (outbox_id BIGINT AUTO_INCREMENT PRIMARY KEY, ticket_id INT NOT NULL, created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3), attempts INT NOT NULL DEFAULT 0, next_attempt_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3), last_error VARCHAR(1000) DEFAULT NULL, INDEX idx_milvus_outbox_due (next_attempt_at, outbox_id))"
+    )
+
+
+def _open_flag(cursor, config: AppConfig) -> None:
+    # closed_date IS NOT NULL is a range on idx_tickets_closed_creation, so the closed
+    # list could not be read in creation_date order. An equality on the stored flag
+    # serves the open and the closed list from the same index.
+    _add_column(
+        cursor,
+        "tickets",
+        "is_open",
+        "is_open TINYINT(1) GENERATED ALWAYS AS (closed_date IS NULL) STORED AFTER version",
+    )
+    _add_index(
+        cursor,
+        "tickets",
+        "idx_tickets_open_creation",
+        "INDEX idx_tickets_open_creation (is_open, creation_date, ticket_id)",
+    )
+    _drop_index(cursor, "tickets", "idx_tickets_closed_creation")
+
+
+def _drop_outbox_operation(cursor, config: AppConfig) -> None:
+    # The worker syncs from the ticket's closed_date, the operation was never read
+    if _has_column(cursor, "milvus_outbox", "operation"):
+        logger.info("Dropping column operation from milvus_outbox.")
+        cursor.execute("ALTER TABLE milvus_outbox DROP COLUMN operation")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[..., None]]] = [
+    (1, "Full-text search indexes", _fulltext_search),
+    (2, "Stored content preview column", _content_preview),
+    (3, "Ticket version counter", _ticket_version),
+    (4, "Float32 summary vectors", _float32_summary_vectors),
+    (5, "Composite ticket list and ticket message indexes", _ticket_list_indexes),
+    (6, "Milvus outbox", _milvus_outbox),
+    (7, "Open flag for the ticket state filter", _open_flag),
+    (8, "Drop the unused milvus_outbox operation column", _drop_outbox_operation),
+]
+
+
+def _applied_versions(cursor) -> Dict[int, datetime]:
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (version INT PRIMARY KEY, description VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute("SELECT version, applied_at FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def upgrade(config: AppConfig) -> List[int]:
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor()
+    applied = []
+    try:
+        applied_versions = _applied_versions(cursor)
+        for version, description, migrate in MIGRATIONS:
+            if version in applied_versions:
+                continue
+            logger.info(f"Applying migration {version}: {description}")
+            # MySQL commits DDL implicitly, so every migration is recorded right after it
+            migrate(cursor, config)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description),
+            )
+            cnx.commit()
+            applied.append(version)
+        logger.info(f"Schema is up to date, {len(applied)} migrations applied.")
+        return applied
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def status(config: AppConfig) -> None:
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor()
+    try:
+        applied_versions = _applied_versions(cursor)
+        for version, description, _ in MIGRATIONS:
+            applied_at = applied_versions.get(version)
+            print(f"{version:>4}  {str(applied_at or 'pending'):<20}  {description}")
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+class ExplainCursor:
+    # Stands in for the dictionary cursor of the relationaldb list queries and
+    # explains each statement instead of running it
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.plans: List[Tuple[str, List[dict]]] = []
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        self.cursor.execute("EXPLAIN " + query, params)
+        self.plans.append((query, self.cursor.fetchall()))
+
+    def fetchall(self) -> list:
+        return []
+
+    def fetchone(self) -> None:
+        return None
+
+
+def _plan_problems(plan: List[dict]) -> List[Tuple[str, str]]:
+    problems = []
+    for row in plan:
+        if (row.get("table") or "").startswith(("<derived", "<union")):
+            # Materialized subquery results, e.g. the ids matched by the search
+            # join, only hold the rows found through the index of their subquery
+            continue
+        if row.get("type") == "ALL":
+            problems.append(("full scan", row.get("table")))
+        if "Using filesort" in (row.get("Extra") or ""):
+            problems.append(("filesort", row.get("table")))
+    return problems
+
+
+def _check_cases(cursor) -> List[Tuple[str, Callable[[ExplainCursor], None]]]:
+    # Sample keys from the data, the optimizer picks plans by the actual statistics
+    cursor.execute(
+        "SELECT ticket_id, creation_date, author_id, assignee_id FROM tickets WHERE assignee_id IS NOT NULL ORDER BY ticket_id DESC LIMIT 1"
+    )
+    sample = cursor.fetchone()
+    if sample is None:
+        raise RuntimeError(
+            "The check needs representative data, e.g. the database seeded by benchmarks.bench_ticket_listing"
+        )
+    page_cursor = encode_ticket_cursor(sample, "next")
+    prev_cursor = encode_ticket_cursor(sample, "prev")
+
+    def list_case(filter_data: TicketFilter, author_id: str | None = None):
+        return lambda explain: _query_ticket_list(explain, filter_data, author_id)
+
+    def query_case(query: str, params: tuple):
+        return lambda explain: explain.execute(query, params)
+
+    page = {"page": 1, "page_size": 10}
+    return [
+        ("ticket detail", query_case(TICKET_QUERY, (sample["ticket_id"],))),
+        ("ticket state", query_case(TICKET_STATE_QUERY, (sample["ticket_id"],))),
+        ("ticket messages", query_case(TICKET_MESSAGES_QUERY, (sample["ticket_id"],))),
+        (
+            "new ticket messages",
+            query_case(NEW_TICKET_MESSAGES_QUERY, (sample["ticket_id"], 0)),
+        ),
+        ("tickets, newest first", list_case(TicketFilter(**page))),
+        ("tickets, oldest first", list_case(TicketFilter(**page, order="asc"))),
+        ("open tickets", list_case(TicketFilter(**page, closed=False))),
+        ("closed tickets", list_case(TicketFilter(**page, closed=True))),
+        (
+            "closed tickets, oldest first",
+            list_case(TicketFilter(**page, closed=True, order="asc")),
+        ),
+        (
+            "closed tickets, next page (cursor)",
+            list_case(
+                TicketFilter(pagination="cursor", cursor=page_cursor, closed=True)
+            ),
+        ),
+        (
+            "unassigned tickets",
+            list_case(TicketFilter(**page, assignee_id="unassigned")),
+        ),
+        (
+            "tickets of an assignee",
+            list_case(TicketFilter(**page, assignee_id=sample["assignee_id"])),
+        ),
+        (
+            "my tickets",
+            list_case(TicketFilter(**page), author_id=sample["author_id"]),
+        ),
+        (
+            "tickets, next page (cursor)",
+            list_case(TicketFilter(pagination="cursor", cursor=page_cursor)),
+        ),
+        (
+            "tickets, previous page (cursor)",
+            list_case(TicketFilter(pagination="cursor", cursor=prev_cursor)),
+        ),
+        ("search", list_case(TicketFilter(**page, search="printer"))),
+    ]
+
+
+def check(config: AppConfig) -> bool:
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor(dictionary=True)
+    passed = True
+    try:
+        for name, run in _check_cases(cursor):
+            explain = ExplainCursor(cursor)
+            run(explain)
+            problems = [
+                f"{problem} on {table}"
+                for _, plan in explain.plans
+                for problem, table in _plan_problems(plan)
+            ]
+            if problems:
+                passed = False
+                print(f"FAIL  {name}: {', '.join(problems)}")
+                for query, plan in explain.plans:
+                    print(f"      {query}")
+                    for row in plan:
+                        print(
+                            f"        {row.get('table')}: type={row.get('type')} key={row.get('key')} extra={row.get('Extra')}"
+                        )
+            else:
+                print(f"ok    {name}")
+        return passed
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Manage the MySQL schema.")
+    parser.add_argument("command", choices=["upgrade", "status", "check"])
+    parser.add_argument(
+        "--database", help="Run against another database, e.g. a benchmark copy"
+    )
+    args = parser.parse_args()
+
+    config: AppConfig = load_json(os.path.join(app_path, "config.json"))
+    if args.database:
+        config["mysql"]["database"] = args.database
+
+    if args.command == "upgrade":
+        upgrade(config)
+    elif args.command == "status":
+        status(config)
+    elif not check(config):
+        sys.exit(1)
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+from custom_types import AppConfig
+from ai_system.vectordb import delete_tickets_milvus, upsert_tickets_milvus
+from backend.relationaldb import connect_to_mysql
+from backend.relationaldb_async import run_in_db_executor
+from backend.vector_codec import decode_vector
+
+logger = logging.getLogger("MILVUS_OUTBOX " + __name__)
+
+# close_ticket and reopen_ticket only write an outbox entry in their own transaction
+# (see relationaldb.enqueue_milvus_sync). The worker below applies the entries to
+# collection_ticket in batches, so a slow or unavailable Milvus never holds ticket
+# row locks or technician requests.
+#
+# An entry only says that a ticket needs syncing. What is applied follows from the
+# ticket's current closed_date, read during the drain, so entries claimed by different
+# processes cannot be applied out of order: after applying, the state is read again
+# and the sync repeated until it no longer changes. Any close/reopen committed after
+# that read writes a new entry, whose drain reads and applies the newer state later.
+
+
+outbox_stats = {"synced": 0, "failed_batches": 0, "failed_tickets": 0, "last_drain": None}
+
+
+def _read_ticket_actions(cursor, ticket_ids: List[int]) -> Dict[int, tuple]:
+    # ticket_id -> ("upsert", (ticket_id, vector, title)) for closed tickets,
+    # ("delete", None) for open or deleted tickets, ("skip", None) without a vector
+    placeholders = ", ".join(["%s"] * len(ticket_ids))
+    cursor.execute(
+        f"SELECT ticket_id, title, summary_vector, closed_date FROM tickets WHERE ticket_id IN ({placeholders})",
+        tuple(ticket_ids),
+    )
+    actions = {ticket_id: ("delete", None) for ticket_id in ticket_ids}
+    for row in cursor.fetchall():
+        if row["closed_date"] is None:
+            continue
+        if not row["summary_vector"]:
+            actions[row["ticket_id"]] = ("skip", None)
+            continue
+        actions[row["ticket_id"]] = (
+            "upsert",
+            (row["ticket_id"], decode_vector(row["summary_vector"]), row["title"]),
+        )
+    return actions
+
+
+def _sync_tickets(cursor, ticket_ids: List[int]) -> None:
+    actions = _read_ticket_actions(cursor, ticket_ids)
+    while actions:
+        upsert_tickets_milvus(
+            [ticket for action, ticket in actions.values() if action == "upsert"]
+        )
+        delete_tickets_milvus(
+            [ticket_id for ticket_id, (action, _) in actions.items() if action == "delete"]
+        )
+        # Tickets closed or reopened while syncing are synced again
+        current = _read_ticket_actions(cursor, list(actions))
+        actions = {
+            ticket_id: current[ticket_id]
+            for ticket_id in actions
+            if current[ticket_id][0] != actions[ticket_id][0]
+        }
+
+
+def drain_milvus_outbox(config: AppConfig) -> int:
+    outbox_config = config["milvus_outbox"]
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        # READ COMMITTED locks only the selected entries and no gaps, so new entries
+        # can be written while a batch is synced, and every read sees the latest
+        # committed ticket state. SKIP LOCKED lets several app processes drain the table
+        cnx.start_transaction(isolation_level="READ COMMITTED")
+        cursor.execute(
+            "SELECT outbox_id, ticket_id FROM milvus_outbox WHERE next_attempt_at <= NOW(3) ORDER BY outbox_id LIMIT %s FOR UPDATE SKIP LOCKED",
+            (outbox_config["batch_size"],),
+        )
+        entries = cursor.fetchall()
+        if not entries:
+            cnx.rollback()
+            return 0
+        ticket_ids = list(dict.fromkeys(entry["ticket_id"] for entry in entries))
+
+        errors: Dict[int, Exception] = {}
+        try:
+            _sync_tickets(cursor, ticket_ids)
+        except Exception as e:
+            logger.error(f"Syncing {len(ticket_ids)} tickets to Milvus failed, retrying one by one: {e}")
+            outbox_stats["failed_batches"] += 1
+            # A single bad ticket must not hold back the rest of the batch
+            for ticket_id in ticket_ids:
+                try:
+                    _sync_tickets(cursor, [ticket_id])
+                except Exception as ticket_error:
+                    logger.error(f"Syncing ticket {ticket_id} to Milvus failed: {ticket_error}")
+                    errors[ticket_id] = ticket_error
+
+        for ticket_id, error in errors.items():
+            # Exponential backoff per entry, capped at max_backoff_seconds
+            failed_ids = [entry["outbox_id"] for entry in entries if entry["ticket_id"] == ticket_id]
+            placeholders = ", ".join(["%s"] * len(failed_ids))
+            cursor.execute(
+                f"UPDATE milvus_outbox SET attempts = attempts + 1, last_error = %s, next_attempt_at = NOW(3) + INTERVAL LEAST(%s * POW(2, attempts), %s) SECOND WHERE outbox_id IN ({placeholders})",
+                (
+                    str(error)[:1000],
+                    outbox_config["retry_backoff_seconds"],
+                    outbox_config["max_backoff_seconds"],
+                    *failed_ids,
+                ),
+            )
+        synced_ids = [entry["outbox_id"] for entry in entries if entry["ticket_id"] not in errors]
+        if synced_ids:
+            placeholders = ", ".join(["%s"] * len(synced_ids))
+            cursor.execute(
+                f"DELETE FROM milvus_outbox WHERE outbox_id IN ({placeholders})",
+                tuple(synced_ids),
+            )
+        cnx.commit()
+        outbox_stats["synced"] += len(synced_ids)
+        outbox_stats["failed_tickets"] += len(errors)
+        outbox_stats["last_drain"] = time.time()
+        return len(synced_ids)
+    except Exception:
+        cnx.rollback()
+        raise
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def get_milvus_outbox_status(config: AppConfig) -> dict:
+    cnx = connect_to_mysql(config)
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) AS pending, TIMESTAMPDIFF(MICROSECOND, MIN(created_at), NOW(3)) / 1000000 AS lag_seconds, MAX(attempts) AS max_attempts FROM milvus_outbox"
+        )
+        status = cursor.fetchone()
+        return {
+            "pending": status["pending"],
+            "lag_seconds": float(status["lag_seconds"] or 0),
+            "max_attempts": status["max_attempts"] or 0,
+            **outbox_stats,
+        }
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+class MilvusOutboxWorker:
+    def __init__(self, config: AppConfig):
+        self.config = config
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Milvus outbox worker started.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Milvus outbox worker stopped.")
+
+    def notify(self) -> None:
+        # Called after a commit that wrote outbox entries, skips the poll delay
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        outbox_config = self.config["milvus_outbox"]
+        while True:
+            try:
+                synced = await run_in_db_executor(drain_milvus_outbox, self.config)
+            except Exception as e:
+                logger.error(f"Draining the Milvus outbox failed: {e}", exc_info=True)
+                synced = 0
+            if synced >= outbox_config["batch_size"]:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), outbox_config["poll_interval_seconds"]
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+milvus_outbox_worker: Optional[MilvusOutboxWorker] = None
+
+
+def start_milvus_outbox_worker(config: AppConfig) -> MilvusOutboxWorker:
+    global milvus_outbox_worker
+    milvus_outbox_worker = MilvusOutboxWorker(config)
+    milvus_outbox_worker.start()
+    return milvus_outbox_worker
+
+
+async def stop_milvus_outbox_worker() -> None:
+    global milvus_outbox_worker
+    if milvus_outbox_worker is not None:
+        await milvus_outbox_worker.stop()
+    milvus_outbox_worker = None
+
+
+def notify_milvus_outbox() -> None:
+    if milvus_outbox_worker is not None:
+        milvus_outbox_worker.notify()
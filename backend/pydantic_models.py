@@ -18,10 +18,14 @@ class User(BaseModel):
 class TicketFilter(BaseModel):
     page: Optional[int] = None
     page_size: Optional[int] = None
+    pagination: Optional[str] = None
+    cursor: Optional[str] = None
     assignee_id: Optional[str] = None
     closed: Optional[bool] = None
     order: Optional[str] = None
     search: Optional[str] = None
+    search_mode: Optional[str] = None
+    fields: Optional[List[str]] = None
 
 
 class NewTicketMessage(BaseModel):
@@ -37,3 +41,13 @@ class TicketId(BaseModel):
 class TicketAssignee(BaseModel):
     ticket_id: int
     assignee_id: str
+
+
+class TicketOperation(BaseModel):
+    action: str
+    ticket_id: int
+    assignee_id: Optional[str] = None
+
+
+class TicketOperations(BaseModel):
+    operations: List[TicketOperation]
@@ -1,23 +1,44 @@
-from datetime import timezone
+import base64
+from datetime import datetime, timezone
 import logging
 import json
 import os
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Dict, List, Tuple
 import mysql.connector
 from mysql.connector import errorcode
-from custom_types import AppConfig, Technician, Ticket, TicketList, TicketMessage
-from ai_system.vectordb import (
-    remove_ticket_milvus,
-    retrieve_similar_tickets_milvus,
-    store_ticket_milvus,
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from custom_types import (
+    AppConfig,
+    MySqlPoolConfig,
+    Technician,
+    Ticket,
+    TicketList,
+    TicketMessage,
+    TicketOperationResult,
+    TicketState,
+    TicketStats,
 )
-from backend.pydantic_models import NewTicketMessage, TicketAssignee, TicketFilter, User
+from ai_system.vectordb import retrieve_similar_tickets_milvus
+from backend.pydantic_models import (
+    NewTicketMessage,
+    TicketAssignee,
+    TicketFilter,
+    TicketOperation,
+    User,
+)
+from backend.user_directory import UserDirectory
+from backend.vector_codec import decode_vector, encode_vector
+from utils import LRUCache
 
 logger = logging.getLogger("RELATIONAL_DB " + __name__)
 TESTING = os.getenv("TESTING", "false").lower() in ["true"]
 
 
-def connect_to_mysql(config: AppConfig) -> None:
+def _create_mysql_connection(config: AppConfig):
     try:
         mysql_password = os.getenv("MYSQL_PASSWORD")
         cnx = mysql.connector.connect(
@@ -52,6 +73,88 @@ def connect_to_mysql(config: AppConfig) -> None:
         raise RuntimeError("Database connection failed") from e
 
 
+def _ping_connection(dbapi_connection, connection_record, connection_proxy) -> None:
+    # Health check on checkout, the pool replaces connections that fail the ping
+    try:
+        dbapi_connection.ping(reconnect=False)
+    except Exception as e:
+        logger.warning(f"Discarding stale pooled database connection: {e}")
+        raise DisconnectionError() from e
+
+
+connection_pool: QueuePool | None = None
+connection_pool_config: MySqlPoolConfig | None = None
+connection_pool_lock = threading.Lock()
+
+
+def get_connection_pool(config: AppConfig) -> QueuePool:
+    global connection_pool, connection_pool_config
+    if connection_pool is None:
+        with connection_pool_lock:
+            if connection_pool is None:
+                pool_config = config["mysql"]["pool"]
+                pool = QueuePool(
+                    lambda: _create_mysql_connection(config),
+                    pool_size=pool_config["size"],
+                    max_overflow=pool_config["max_overflow"],
+                    timeout=pool_config["timeout_seconds"],
+                    recycle=pool_config["recycle_seconds"],
+                )
+                if pool_config["pre_ping"]:
+                    event.listen(pool, "checkout", _ping_connection)
+                connection_pool = pool
+                connection_pool_config = pool_config
+                logger.info(
+                    f"Created MySQL connection pool: {pool_config}",
+                )
+    return connection_pool
+
+
+def get_connection_pool_status() -> dict:
+    if connection_pool is None:
+        return {"initialized": False}
+    checked_out = connection_pool.checkedout()
+    capacity = connection_pool_config["size"] + connection_pool_config["max_overflow"]
+    return {
+        "initialized": True,
+        "size": connection_pool.size(),
+        "max_overflow": connection_pool_config["max_overflow"],
+        "checked_in": connection_pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": connection_pool.overflow(),
+        "utilisation": checked_out / capacity if capacity else 0.0,
+    }
+
+
+def connect_to_mysql(config: AppConfig):
+    # Borrow a connection from the pool, cnx.close() hands it back
+    try:
+        return get_connection_pool(config).connect()
+    except PoolTimeoutError as e:
+        logger.error(
+            f"Database connection pool exhausted: {e}",
+            exc_info=True,
+        )
+        raise RuntimeError("Database connection pool exhausted") from e
+
+
+# Migration 4 turns tickets.summary_vector from JSON into a float32 BLOB. Until the
+# column has been swapped, new tickets are written as JSON like every other row the
+# migration converts. Once it is a BLOB it stays one, so the check stops.
+float32_summary_vectors = False
+
+
+def uses_float32_summary_vectors(cursor) -> bool:
+    global float32_summary_vectors
+    if not float32_summary_vectors:
+        cursor.execute(
+            "SELECT DATA_TYPE FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'tickets' AND COLUMN_NAME = 'summary_vector'"
+        )
+        rows = cursor.fetchall()
+        float32_summary_vectors = bool(rows) and rows[0][0].lower() == "blob"
+    return float32_summary_vectors
+
+
 def insert_ticket(
     title: str,
     content: str,
@@ -72,10 +175,13 @@ def insert_ticket(
 
     try:
         cursor = cnx.cursor()
-        summary_json = json.dumps(summary_vector)
+        if uses_float32_summary_vectors(cursor):
+            summary_value = encode_vector(summary_vector)
+        else:
+            summary_value = json.dumps(summary_vector)
 
         query = "INSERT INTO tickets (title, content, summary_vector, author_id) VALUES (%s, %s, %s, %s)"
-        values = (title, content, summary_json, author_id)
+        values = (title, content, summary_value, author_id)
         cursor.execute(query, values)
 
         ticket_id = cursor.lastrowid  # Get auto generated ticket_id
@@ -85,6 +191,7 @@ def insert_ticket(
             logger.info(f"Test insert rolled back for Ticket {ticket_id}")
         else:
             cnx.commit()
+            invalidate_ticket_stats()
             logger.info(
                 "Successfully inserted ticket into MySQL.",
             )
@@ -103,8 +210,22 @@ def insert_ticket(
         cnx.close()
 
 
-def get_ticket_messages(ticket_id: int, config: AppConfig) -> List[TicketMessage]:
-    cnx = connect_to_mysql(config)
+# Read queries of the ticket page, verified with EXPLAIN by backend.migrations check
+TICKET_QUERY = "SELECT ticket_id, t.author_id, title, content, summary_vector, creation_date, closed_date, version, u.user_name as author_name, a.user_name as assignee_name FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE ticket_id = %s"
+TICKET_STATE_QUERY = "SELECT ticket_id, author_id, version FROM tickets WHERE ticket_id = %s"
+TICKET_MESSAGES_QUERY = "SELECT m.message_id, m.message, u.user_name as author_name, u.user_group as `group`, m.created_at FROM ticket_messages m INNER JOIN azure_users u ON m.author_id = u.user_id WHERE m.ticket_id = %s ORDER BY m.created_at ASC, m.message_id ASC"
+# message_id is assigned by the database, unlike created_at which the client sends,
+# so it is the reliable sync cursor
+NEW_TICKET_MESSAGES_QUERY = "SELECT m.message_id, m.message, u.user_name as author_name, u.user_group as `group`, m.created_at FROM ticket_messages m INNER JOIN azure_users u ON m.author_id = u.user_id WHERE m.ticket_id = %s AND m.message_id > %s ORDER BY m.message_id ASC"
+
+
+def get_ticket_messages(
+    ticket_id: int, config: AppConfig, cnx=None, after_message_id: int | None = None
+) -> List[TicketMessage]:
+    # Reuse the caller's connection if given, so one request never holds two pooled connections
+    borrowed_cnx = cnx is None
+    if borrowed_cnx:
+        cnx = connect_to_mysql(config)
 
     if not cnx:
         logger.error(
@@ -116,8 +237,10 @@ def get_ticket_messages(ticket_id: int, config: AppConfig) -> List[TicketMessage
     try:
         cursor = cnx.cursor(dictionary=True)
 
-        query = "SELECT m.message, u.user_name as author_name, u.user_group as `group`, m.created_at FROM ticket_messages m INNER JOIN azure_users u ON m.author_id = u.user_id WHERE ticket_id = %s ORDER BY created_at ASC"
-        cursor.execute(query, (ticket_id,))
+        if after_message_id is None:
+            cursor.execute(TICKET_MESSAGES_QUERY, (ticket_id,))
+        else:
+            cursor.execute(NEW_TICKET_MESSAGES_QUERY, (ticket_id, after_message_id))
         messages = cursor.fetchall() or []
         for row in messages:
             row["created_at"] = row["created_at"].replace(tzinfo=timezone.utc)
@@ -130,12 +253,66 @@ def get_ticket_messages(ticket_id: int, config: AppConfig) -> List[TicketMessage
         )
         raise RuntimeError(f"Database error: {e}") from e
 
+    finally:
+        cursor.close()
+        if borrowed_cnx:
+            cnx.close()
+
+
+def get_ticket_state(ticket_id: int, config: AppConfig) -> TicketState | None:
+    # Primary key lookup for access checks and conditional requests
+    cnx = connect_to_mysql(config)
+
+    if not cnx:
+        logger.error(
+            "Database connection failed",
+            exc_info=True,
+        )
+        raise RuntimeError("Database connection failed") from e
+
+    cursor = cnx.cursor(dictionary=True)
+
+    try:
+        cursor.execute(TICKET_STATE_QUERY, (ticket_id,))
+        return cursor.fetchone()
+
+    except Exception as e:
+        logger.error(
+            f"Database error: {e}",
+            exc_info=True,
+        )
+        raise RuntimeError(f"Database error: {e}") from e
+
     finally:
         cursor.close()
         cnx.close()
 
 
-def get_ticket(ticket_id: int, user: User, config: AppConfig) -> Ticket:
+TICKET_DETAIL_INCLUDES = frozenset({"similar_tickets", "ticket_messages"})
+
+# Runs the Milvus similarity search next to the ticket messages query
+fanout_executor: ThreadPoolExecutor | None = None
+fanout_executor_lock = threading.Lock()
+
+
+def get_fanout_executor(config: AppConfig) -> ThreadPoolExecutor:
+    global fanout_executor
+    if fanout_executor is None:
+        with fanout_executor_lock:
+            if fanout_executor is None:
+                fanout_executor = ThreadPoolExecutor(
+                    max_workers=config["mysql"]["fanout_workers"],
+                    thread_name_prefix="ticket-fanout",
+                )
+    return fanout_executor
+
+
+def get_ticket(
+    ticket_id: int,
+    user: User,
+    config: AppConfig,
+    include: AbstractSet[str] = TICKET_DETAIL_INCLUDES,
+) -> Ticket | None:
     cnx = connect_to_mysql(config)
 
     if not cnx:
@@ -146,31 +323,40 @@ def get_ticket(ticket_id: int, user: User, config: AppConfig) -> Ticket:
         raise RuntimeError("Database connection failed") from e
 
     try:
-        cursor = cnx.cursor(dictionary=True)
+        # Buffered, so the connection is free for the ticket messages query
+        cursor = cnx.cursor(dictionary=True, buffered=True)
 
-        query = "SELECT ticket_id, title, content, summary_vector, creation_date, closed_date, u.user_name as author_name, a.user_name as assignee_name FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE ticket_id = %s"
-        cursor.execute(query, (ticket_id,))
+        cursor.execute(TICKET_QUERY, (ticket_id,))
         ticket = cursor.fetchone()
+        if ticket is None:
+            return None
         ticket["creation_date"] = ticket["creation_date"].astimezone(timezone.utc)
         if ticket["closed_date"]:
             ticket["closed_date"] = ticket["closed_date"].astimezone(timezone.utc)
 
-        ticket["similar_tickets"] = []
-        if "summary_vector" in ticket and user.group == "technicians":
-            # Convert JSON string back to vector list
-            summary_vector = json.loads(ticket["summary_vector"])
-            similar_tickets = retrieve_similar_tickets_milvus(
-                summary_vector, ticket["ticket_id"]
+        summary_vector = ticket.pop("summary_vector", None)  # Not needed on frontend
+
+        # The similarity search runs on the fanout executor while the messages are
+        # read on this connection, so the slower of both determines the latency
+        similar_tickets_future = None
+        if (
+            "similar_tickets" in include
+            and summary_vector
+            and user.group == "technicians"
+        ):
+            similar_tickets_future = get_fanout_executor(config).submit(
+                retrieve_similar_tickets_milvus,
+                decode_vector(summary_vector),
+                ticket["ticket_id"],
             )
-            filtered_similar_tickets = [
-                item for item in similar_tickets if item["distance"] >= 0.7
-            ]
-            ticket["similar_tickets"] = filtered_similar_tickets
 
-        if "summary_vector" in ticket:
-            ticket.pop("summary_vector")  # Field not needed on frontend
+        ticket["ticket_messages"] = []
+        if "ticket_messages" in include:
+            ticket["ticket_messages"] = get_ticket_messages(ticket_id, config, cnx)
 
-        ticket["ticket_messages"] = get_ticket_messages(ticket_id, config)
+        ticket["similar_tickets"] = []
+        if similar_tickets_future is not None:
+            ticket["similar_tickets"] = similar_tickets_future.result()
 
         return ticket
 
@@ -188,7 +374,7 @@ def get_ticket(ticket_id: int, user: User, config: AppConfig) -> Ticket:
 
 def insert_ticket_message(
     new_ticket_message: NewTicketMessage, user: User, config: AppConfig
-) -> None:
+) -> TicketMessage:
     cnx = connect_to_mysql(config)
 
     if not cnx:
@@ -209,6 +395,10 @@ def insert_ticket_message(
             new_ticket_message.created_at,
         )
         cursor.execute(query, values)
+        message_id = cursor.lastrowid
+        # Same transaction, so a new version always comes with its message
+        query = "UPDATE tickets SET version = version + 1 WHERE ticket_id = %s"
+        cursor.execute(query, (new_ticket_message.ticket_id,))
 
         if TESTING:
             cnx.rollback()
@@ -230,7 +420,19 @@ def insert_ticket_message(
         cursor.close()
         cnx.close()
 
-    return None
+    return {
+        "message_id": message_id,
+        "message": new_ticket_message.message,
+        "author_name": user.user_name,
+        "group": user.group,
+        "created_at": new_ticket_message.created_at,
+    }
+
+
+def enqueue_milvus_sync(cursor, ticket_id: int) -> None:
+    # Written in the transaction that changes the ticket. The worker in
+    # backend.milvus_outbox syncs collection_ticket with the ticket's closed_date
+    cursor.execute("INSERT INTO milvus_outbox (ticket_id) VALUES (%s)", (ticket_id,))
 
 
 def close_ticket(ticket_id: int, config: AppConfig) -> None:
@@ -246,22 +448,16 @@ def close_ticket(ticket_id: int, config: AppConfig) -> None:
     cursor = cnx.cursor(dictionary=True)
 
     try:
-        query = "UPDATE tickets SET closed_date = NOW() WHERE ticket_id = (%s);"
+        query = "UPDATE tickets SET closed_date = NOW(), version = version + 1 WHERE ticket_id = (%s);"
         cursor.execute(query, (ticket_id,))
+        enqueue_milvus_sync(cursor, ticket_id)
 
         if TESTING:
             cnx.rollback()
             logger.info(f"Test close Ticket rolled back for Ticket {ticket_id}")
         else:
-            query = "SELECT ticket_id, title, summary_vector FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE ticket_id = %s"
-            cursor.execute(query, (ticket_id,))
-            ticket = cursor.fetchone()
-            if "summary_vector" in ticket:
-                summary_vector = json.loads(ticket["summary_vector"])
-                store_ticket_milvus(
-                    ticket["ticket_id"], summary_vector, ticket["title"]
-                )
             cnx.commit()
+            invalidate_ticket_stats()
             logger.info(
                 f"Ticket {ticket_id}: Closed.",
             )
@@ -293,16 +489,17 @@ def reopen_ticket(ticket_id: int, config: AppConfig) -> None:
     cursor = cnx.cursor()
 
     try:
-        query = "UPDATE tickets SET closed_date = NULL WHERE ticket_id = (%s);"
+        query = "UPDATE tickets SET closed_date = NULL, version = version + 1 WHERE ticket_id = (%s);"
         values = (ticket_id,)
         cursor.execute(query, values)
+        enqueue_milvus_sync(cursor, ticket_id)
 
         if TESTING:
             cnx.rollback()
             logger.info(f"Test reopen rolled back for Ticket {ticket_id}")
         else:
-            remove_ticket_milvus(ticket_id=ticket_id)
             cnx.commit()
+            invalidate_ticket_stats()
             logger.info(
                 f"Ticket {ticket_id}: Reopened.",
             )
@@ -321,92 +518,360 @@ def reopen_ticket(ticket_id: int, config: AppConfig) -> None:
     return None
 
 
-def get_filtered_tickets(filter_data: TicketFilter, config: AppConfig) -> TicketList:
-    cnx = connect_to_mysql(config)
+# Served to the technician dropdown and used to resolve names in ticket lists
+user_directory = UserDirectory()
+user_directory_refresh_lock = threading.Lock()
 
-    if not cnx:
-        logger.error(
-            "Database connection failed",
-            exc_info=True,
+
+def configure_user_directory(config: AppConfig) -> None:
+    user_directory.refresh_interval_seconds = config["user_directory"][
+        "refresh_interval_seconds"
+    ]
+
+
+def _refresh_user_directory(cursor, force: bool = False) -> None:
+    # Expects a dictionary cursor. Concurrent callers wait for one reload
+    with user_directory_refresh_lock:
+        if not force and not user_directory.needs_refresh():
+            return
+        cursor.execute("SELECT user_id, user_name, user_group FROM azure_users")
+        user_directory.replace_all(
+            (row["user_id"], row["user_name"], row["user_group"])
+            for row in cursor.fetchall()
         )
-        raise RuntimeError("Database connection failed") from e
 
-    try:
-        cursor = cnx.cursor(dictionary=True)
 
-        query = "SELECT ticket_id, title, content, creation_date, closed_date, u.user_name as author_name, a.user_name as assignee_name FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE 1=1"
+def get_user_directory_stats() -> dict:
+    return user_directory.stats()
 
-        params = ()
 
-        if filter_data.search is not None:
-            query += " AND (title LIKE %s)"
-            search_term = f"%{filter_data.search}%"
-            params += (search_term,)
-        else:
-            if filter_data.assignee_id is not None:
-                if filter_data.assignee_id == "unassigned":
-                    query += " AND (assignee_id is NULL)"
-                else:
-                    query += " AND (assignee_id = %s)"
-                    params += (filter_data.assignee_id,)
-
-            if filter_data.closed is not None:
-                if filter_data.closed == True:
-                    query += " AND (closed_date is not NULL)"
-                if filter_data.closed == False:
-                    query += " AND (closed_date is NULL)"
-
-        if filter_data.order is not None:
-            if filter_data.closed == "asc":
-                query += " ORDER BY creation_date ASC"
-        else:
-            query += " ORDER BY creation_date DESC"
+# Selectable list fields. Lists ship the stored content_preview column instead of the
+# full ticket text, the array fields are not backed by a column.
+TICKET_LIST_FIELDS = {
+    "ticket_id": "t.ticket_id",
+    "title": "t.title",
+    "content": "t.content_preview AS content",
+    "creation_date": "t.creation_date",
+    "closed_date": "t.closed_date",
+    # Names are resolved from the user directory instead of joining azure_users
+    "author_name": "t.author_id",
+    "assignee_name": "t.assignee_id",
+    "similar_tickets": None,
+    "ticket_messages": None,
+}
+# Always selected, as pagination cursors are built from them
+KEYSET_FIELDS = ("ticket_id", "creation_date")
+DEFAULT_PAGE_SIZE = 10
+
+
+def _ticket_list_fields(filter_data: TicketFilter) -> List[str]:
+    if filter_data.fields is None:
+        return list(TICKET_LIST_FIELDS)
+    unknown_fields = set(filter_data.fields) - TICKET_LIST_FIELDS.keys()
+    if unknown_fields:
+        raise ValueError(f"Invalid fields: {', '.join(sorted(unknown_fields))}")
+    return list(dict.fromkeys(filter_data.fields))
+
+
+# Totals of at least ticket_count_cache_threshold tickets are cached per filter for
+# ticket_count_ttl_seconds, further pages of such a list skip the count. Smaller
+# totals are counted with every page.
+ticket_count_cache = LRUCache(max_entries=1000, ttl_seconds=30)
+ticket_count_cache_threshold = 10000
+
+
+def configure_ticket_count_cache(config: AppConfig) -> None:
+    global ticket_count_cache, ticket_count_cache_threshold
+    ticket_count_cache = LRUCache(
+        max_entries=config["mysql"]["ticket_count_cache_max_entries"],
+        ttl_seconds=config["mysql"]["ticket_count_ttl_seconds"],
+    )
+    ticket_count_cache_threshold = config["mysql"]["ticket_count_cache_threshold"]
+
+
+def _remember_ticket_count(count_key: Tuple[str, tuple], count: int) -> None:
+    if count >= ticket_count_cache_threshold:
+        ticket_count_cache.set(count_key, count)
+
+
+def _build_ticket_list_query(fields: List[str], count_query: str | None) -> str:
+    columns = [TICKET_LIST_FIELDS[field] for field in fields if TICKET_LIST_FIELDS[field]]
+    columns += [TICKET_LIST_FIELDS[field] for field in KEYSET_FIELDS if field not in fields]
+    if count_query is not None:
+        # Uncorrelated, so it runs once over the filtered ids, while the page itself
+        # still stops after LIMIT rows in index order
+        columns.append(f"({count_query}) AS total_count")
+
+    return "SELECT " + ", ".join(columns) + " FROM tickets t"
 
-        if filter_data.page_size is not None and filter_data.page is not None:
-            query += " LIMIT %s"
-            params += (filter_data.page_size,)
-            query += " OFFSET %s"
-            params += ((filter_data.page - 1) * filter_data.page_size,)
 
-        cursor.execute(query, params)
-        tickets = cursor.fetchall()
+def encode_ticket_cursor(ticket: Ticket, direction: str) -> str:
+    # Opaque keyset position: creation_date and ticket_id of the boundary row
+    payload = json.dumps(
+        {
+            "d": ticket["creation_date"].isoformat(),
+            "id": ticket["ticket_id"],
+            "dir": direction,
+        }
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
 
-        for ticket in tickets:
+
+def decode_ticket_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        direction = payload["dir"]
+        if direction not in ("next", "prev"):
+            raise ValueError(f"Invalid cursor direction: {direction}")
+        return datetime.fromisoformat(payload["d"]), int(payload["id"]), direction
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def _build_ticket_filter(
+    filter_data: TicketFilter, author_id: str | None = None
+) -> Tuple[str, tuple]:
+    # Shared WHERE clause of the ticket list queries
+    conditions = []
+    params = ()
+
+    if author_id is not None:
+        conditions.append("t.author_id = %s")
+        params += (author_id,)
+
+    if filter_data.assignee_id is not None:
+        if filter_data.assignee_id == "unassigned":
+            conditions.append("t.assignee_id is NULL")
+        else:
+            conditions.append("t.assignee_id = %s")
+            params += (filter_data.assignee_id,)
+
+    if filter_data.closed is not None:
+        # Equality on the stored flag, idx_tickets_open_creation keeps creation_date order
+        if filter_data.closed == True:
+            conditions.append("t.is_open = 0")
+        if filter_data.closed == False:
+            conditions.append("t.is_open = 1")
+
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(f"({c})" for c in conditions), params
+
+
+def _build_search_join(filter_data: TicketFilter) -> Tuple[str, tuple]:
+    # A search joins the ids matched by the FULLTEXT indexes on tickets(title, content)
+    # and ticket_messages(message). Both lookups run on their own index, an OR of the
+    # two MATCH conditions in the WHERE clause would scan every ticket instead.
+    # s.relevance adds up the title/content score and the scores of matching messages.
+    if filter_data.search is None:
+        return "", ()
+    search_mode = _search_mode(filter_data)
+    return (
+        " INNER JOIN (SELECT ticket_id, SUM(score) AS relevance FROM ("
+        f"SELECT ticket_id, MATCH(title, content) AGAINST (%s IN {search_mode}) AS score FROM tickets WHERE MATCH(title, content) AGAINST (%s IN {search_mode})"
+        " UNION ALL "
+        f"SELECT ticket_id, MATCH(message) AGAINST (%s IN {search_mode}) AS score FROM ticket_messages WHERE MATCH(message) AGAINST (%s IN {search_mode})"
+        ") matches GROUP BY ticket_id) s ON s.ticket_id = t.ticket_id",
+        (filter_data.search,) * 4,
+    )
+
+
+def _search_mode(filter_data: TicketFilter) -> str:
+    if filter_data.search_mode in (None, "natural"):
+        return "NATURAL LANGUAGE MODE"
+    if filter_data.search_mode == "boolean":
+        return "BOOLEAN MODE"
+    raise ValueError(f"Invalid search mode: {filter_data.search_mode}")
+
+
+def _build_ticket_order(ascending: bool) -> str:
+    if ascending:
+        return " ORDER BY t.creation_date ASC, t.ticket_id ASC"
+    return " ORDER BY t.creation_date DESC, t.ticket_id DESC"
+
+
+def _build_relevance_order(filter_data: TicketFilter) -> str:
+    if filter_data.search is None:
+        raise ValueError("Relevance ordering requires a search term")
+    # s.relevance comes from the search join
+    return " ORDER BY s.relevance DESC, t.creation_date DESC, t.ticket_id DESC"
+
+
+def _resolve_user_names(cursor, tickets: List[Ticket], fields: List[str]) -> None:
+    name_fields = [
+        (field, TICKET_LIST_FIELDS[field].removeprefix("t."))
+        for field in ("author_name", "assignee_name")
+        if field in fields
+    ]
+    if not name_fields or not tickets:
+        return
+
+    if user_directory.needs_refresh():
+        _refresh_user_directory(cursor)
+    # Users written by another process since the last reload
+    missing = user_directory.missing(
+        ticket[id_field] for ticket in tickets for _, id_field in name_fields
+    )
+    if missing:
+        placeholders = ", ".join(["%s"] * len(missing))
+        cursor.execute(
+            f"SELECT user_id, user_name, user_group FROM azure_users WHERE user_id IN ({placeholders})",
+            tuple(missing),
+        )
+        for row in cursor.fetchall():
+            user_directory.put(row["user_id"], row["user_name"], row["user_group"])
+
+    for ticket in tickets:
+        for name_field, id_field in name_fields:
+            ticket[name_field] = user_directory.get_name(ticket.pop(id_field))
+
+
+def _finalize_ticket_rows(cursor, tickets: List[Ticket], fields: List[str]) -> None:
+    _resolve_user_names(cursor, tickets, fields)
+    for ticket in tickets:
+        ticket.pop("total_count", None)
+        for field in KEYSET_FIELDS:
+            if field not in fields:
+                ticket.pop(field)
+        if "similar_tickets" in fields:
             ticket["similar_tickets"] = []
+        if "ticket_messages" in fields:
             ticket["ticket_messages"] = []
 
-        query = "SELECT COUNT(t.ticket_id) as count FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE 1=1"
 
-        params = ()
-        if filter_data.search is not None:
-            query += " AND (title LIKE %s)"
-            search_term = f"%{filter_data.search}%"
-            params += (search_term,)
-        else:
-            if filter_data.assignee_id is not None:
-                if filter_data.assignee_id == "unassigned":
-                    query += " AND (assignee_id is NULL)"
-                else:
-                    query += " AND (assignee_id = %s)"
-                    params += (filter_data.assignee_id,)
-
-            if filter_data.closed is not None:
-                if filter_data.closed == True:
-                    query += " AND (closed_date is not NULL)"
-                if filter_data.closed == False:
-                    query += " AND (closed_date is NULL)"
-
-        if filter_data.order is not None:
-            if filter_data.closed == "asc":
-                query += " ORDER BY creation_date ASC"
+def _query_ticket_list(
+    cursor, filter_data: TicketFilter, author_id: str | None = None
+) -> TicketList:
+    if filter_data.pagination == "cursor":
+        return _query_ticket_list_keyset(cursor, filter_data, author_id)
+
+    # Page and total count come from one statement, the count from a subquery over the
+    # bare ticket ids unless it is cached
+    fields = _ticket_list_fields(filter_data)
+    join, join_params = _build_search_join(filter_data)
+    where, where_params = _build_ticket_filter(filter_data, author_id)
+    count_key = (join + where, join_params + where_params)
+    count = ticket_count_cache.get(count_key)
+    count_query = None
+    params = join_params + where_params
+    if count is None:
+        count_query = "SELECT COUNT(*) FROM tickets t" + join + where
+        params = count_key[1] + params
+    query = _build_ticket_list_query(fields, count_query) + join + where
+    if filter_data.order == "relevance":
+        query += _build_relevance_order(filter_data)
+    else:
+        query += _build_ticket_order(filter_data.order == "asc")
+
+    offset = 0
+    if filter_data.page_size is not None and filter_data.page is not None:
+        offset = (filter_data.page - 1) * filter_data.page_size
+        query += " LIMIT %s OFFSET %s"
+        params += (filter_data.page_size, offset)
+
+    cursor.execute(query, params)
+    tickets = cursor.fetchall()
+
+    if count is None:
+        if tickets:
+            count = tickets[0]["total_count"]
+        elif offset > 0:
+            # A page past the end has no rows to carry the count
+            cursor.execute(
+                "SELECT COUNT(*) AS count FROM tickets t" + join + where, count_key[1]
+            )
+            count = cursor.fetchone()["count"]
         else:
-            query += " ORDER BY creation_date DESC"
+            count = 0
+        _remember_ticket_count(count_key, count)
+
+    _finalize_ticket_rows(cursor, tickets, fields)
+
+    return {"count": count, "tickets": tickets}
+
+
+def _query_ticket_list_keyset(
+    cursor, filter_data: TicketFilter, author_id: str | None = None
+) -> TicketList:
+    # Seeks past the (creation_date, ticket_id) of the cursor row instead of walking
+    # and discarding OFFSET rows. The total count is only computed for the first page.
+    if filter_data.order == "relevance":
+        raise ValueError("Cursor pagination requires ordering by creation date")
+    ascending = filter_data.order == "asc"
+    page_size = filter_data.page_size or DEFAULT_PAGE_SIZE
+    fields = _ticket_list_fields(filter_data)
+    join, params = _build_search_join(filter_data)
+    where, where_params = _build_ticket_filter(filter_data, author_id)
+    params += where_params
+
+    count_key = (join + where, params)
+    count = None if filter_data.cursor else ticket_count_cache.get(count_key)
+    count_query = None
+    if not filter_data.cursor and count is None:
+        count_query = "SELECT COUNT(*) FROM tickets t" + join + where
+        params = count_key[1] + params
+
+    forward = True
+    if filter_data.cursor:
+        creation_date, ticket_id, direction = decode_ticket_cursor(filter_data.cursor)
+        forward = direction == "next"
+        # Scanning backwards reverses the sort order, the page is flipped afterwards
+        comparator = ">" if ascending == forward else "<"
+        where += " AND " if where else " WHERE "
+        where += f"(t.creation_date {comparator} %s OR (t.creation_date = %s AND t.ticket_id {comparator} %s))"
+        params += (creation_date, creation_date, ticket_id)
+
+    query = _build_ticket_list_query(fields, count_query)
+    query += join + where + _build_ticket_order(ascending == forward) + " LIMIT %s"
+    params += (page_size + 1,)
+
+    cursor.execute(query, params)
+    tickets = cursor.fetchall()
+
+    if count_query is not None:
+        count = tickets[0]["total_count"] if tickets else 0
+        _remember_ticket_count(count_key, count)
+
+    has_more = len(tickets) > page_size
+    tickets = tickets[:page_size]
+    if not forward:
+        tickets.reverse()
+
+    has_next = has_more if forward else True
+    has_prev = bool(filter_data.cursor) if forward else has_more
+    next_cursor = (
+        encode_ticket_cursor(tickets[-1], "next") if tickets and has_next else None
+    )
+    prev_cursor = (
+        encode_ticket_cursor(tickets[0], "prev") if tickets and has_prev else None
+    )
+
+    _finalize_ticket_rows(cursor, tickets, fields)
+
+    return {
+        "count": count,
+        "tickets": tickets,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
 
-        cursor.execute(query, params)
-        ticketcount = cursor.fetchone()
 
-        return {"count": ticketcount["count"], "tickets": tickets}
+def get_filtered_tickets(filter_data: TicketFilter, config: AppConfig) -> TicketList:
+    cnx = connect_to_mysql(config)
 
+    if not cnx:
+        logger.error(
+            "Database connection failed",
+            exc_info=True,
+        )
+        raise RuntimeError("Database connection failed") from e
+
+    try:
+        cursor = cnx.cursor(dictionary=True)
+        return _query_ticket_list(cursor, filter_data)
+
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(
             f"Database error: {e}",
@@ -433,30 +898,10 @@ def get_user_tickets(
 
     try:
         cursor = cnx.cursor(dictionary=True)
+        return _query_ticket_list(cursor, filter_data, author_id=user.user_id)
 
-        query = "SELECT ticket_id, title, content, creation_date, closed_date, u.user_name as author_name, a.user_name as assignee_name FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE t.author_id = %s ORDER BY creation_date DESC"
-        params = (user.user_id,)
-
-        if filter_data.page_size is not None and filter_data.page is not None:
-            query += " LIMIT %s"
-            params += (filter_data.page_size,)
-            query += " OFFSET %s"
-            params += ((filter_data.page - 1) * filter_data.page_size,)
-
-        cursor.execute(query, params)
-        tickets = cursor.fetchall()
-
-        for ticket in tickets:
-            ticket["similar_tickets"] = []
-            ticket["ticket_messages"] = []
-
-        query = "SELECT COUNT(t.ticket_id) as count FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id WHERE t.author_id = %s"
-
-        cursor.execute(query, (user.user_id,))
-        ticketcount = cursor.fetchone()
-
-        return {"count": ticketcount["count"], "tickets": tickets}
-
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(
             f"Database error: {e}",
@@ -469,7 +914,113 @@ def get_user_tickets(
         cnx.close()
 
 
+# All aggregates come from one grouped query, cached for ticket_stats_ttl_seconds and
+# dropped by every ticket write of this process. Every invalidation bumps the
+# generation, a query that overlapped a write is returned but not cached.
+ticket_stats_cache: LRUCache | None = None
+ticket_stats_lock = threading.Lock()
+ticket_stats_generation = 0
+
+
+def invalidate_ticket_stats() -> None:
+    global ticket_stats_generation
+    ticket_stats_generation += 1
+    if ticket_stats_cache is not None:
+        ticket_stats_cache.clear()
+
+
+def _build_ticket_stats(rows: List[dict]) -> TicketStats:
+    stats: TicketStats = {
+        "total": 0,
+        "open": 0,
+        "closed": 0,
+        "unassigned": 0,
+        "open_unassigned": 0,
+        "by_assignee": [],
+    }
+    by_assignee = {}
+    for row in rows:
+        count = int(row["count"])
+        state = "open" if row["open"] else "closed"
+        stats["total"] += count
+        stats[state] += count
+        if row["assignee_id"] is None:
+            stats["unassigned"] += count
+            if row["open"]:
+                stats["open_unassigned"] += count
+            continue
+        assignee = by_assignee.setdefault(
+            row["assignee_id"],
+            {
+                "assignee_id": row["assignee_id"],
+                "assignee_name": user_directory.get_name(row["assignee_id"]),
+                "open": 0,
+                "closed": 0,
+            },
+        )
+        assignee[state] += count
+    stats["by_assignee"] = sorted(
+        by_assignee.values(), key=lambda assignee: -assignee["open"]
+    )
+    return stats
+
+
+def get_ticket_stats(config: AppConfig) -> TicketStats:
+    global ticket_stats_cache
+    if ticket_stats_cache is None:
+        ticket_stats_cache = LRUCache(
+            max_entries=1, ttl_seconds=config["mysql"]["ticket_stats_ttl_seconds"]
+        )
+    stats = ticket_stats_cache.get("stats")
+    if stats is not None:
+        return stats
+
+    # Concurrent dashboard requests wait for one query instead of running their own
+    with ticket_stats_lock:
+        stats = ticket_stats_cache.get("stats")
+        if stats is not None:
+            return stats
+
+        generation = ticket_stats_generation
+        cnx = connect_to_mysql(config)
+
+        if not cnx:
+            logger.error(
+                "Database connection failed",
+                exc_info=True,
+            )
+            raise RuntimeError("Database connection failed") from e
+
+        try:
+            cursor = cnx.cursor(dictionary=True)
+            query = "SELECT assignee_id, closed_date IS NULL AS open, COUNT(*) AS count FROM tickets GROUP BY assignee_id, open"
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            if user_directory.needs_refresh() or user_directory.missing(
+                row["assignee_id"] for row in rows
+            ):
+                _refresh_user_directory(cursor, force=True)
+            stats = _build_ticket_stats(rows)
+            if generation == ticket_stats_generation:
+                ticket_stats_cache.set("stats", stats)
+            return stats
+
+        except Exception as e:
+            logger.error(
+                f"Database error: {e}",
+                exc_info=True,
+            )
+            raise RuntimeError(f"Database error: {e}") from e
+
+        finally:
+            cursor.close()
+            cnx.close()
+
+
 def get_technicians(config: AppConfig) -> List[Technician]:
+    if not user_directory.needs_refresh():
+        return user_directory.technicians()
+
     cnx = connect_to_mysql(config)
 
     if not cnx:
@@ -481,12 +1032,8 @@ def get_technicians(config: AppConfig) -> List[Technician]:
 
     try:
         cursor = cnx.cursor(dictionary=True)
-
-        query = "SELECT user_id, user_name FROM azure_users WHERE user_group = 'technicians'"
-        cursor.execute(query)
-        technicians = cursor.fetchall()
-
-        return technicians
+        _refresh_user_directory(cursor)
+        return user_directory.technicians()
 
     except Exception as e:
         logger.error(
@@ -515,7 +1062,7 @@ def assign_ticket(ticket: TicketAssignee, config: AppConfig) -> None:
     try:
         if ticket.assignee_id == "Unassigned":
             ticket.assignee_id = None
-        query = "UPDATE tickets SET assignee_id = (%s) WHERE ticket_id = (%s);"
+        query = "UPDATE tickets SET assignee_id = (%s), version = version + 1 WHERE ticket_id = (%s);"
         cursor.execute(query, (ticket.assignee_id, ticket.ticket_id))
 
         if TESTING:
@@ -523,6 +1070,7 @@ def assign_ticket(ticket: TicketAssignee, config: AppConfig) -> None:
             logger.info(f"Test assign rolled back for Ticket {ticket.ticket_id}")
         else:
             cnx.commit()
+            invalidate_ticket_stats()
             logger.info(
                 f"Ticket {ticket.ticket_id}: Assigned to {ticket.assignee_id}.",
             )
@@ -541,9 +1089,34 @@ def assign_ticket(ticket: TicketAssignee, config: AppConfig) -> None:
     return None
 
 
-def insert_azure_user(
-    user_id: str, user_name: str, user_group: str, config: AppConfig
-) -> None:
+TICKET_OPERATION_QUERIES = {
+    "assign": "UPDATE tickets SET assignee_id = %s, version = version + 1 WHERE ticket_id = %s",
+    "close": "UPDATE tickets SET closed_date = NOW(), version = version + 1 WHERE ticket_id = %s",
+    "reopen": "UPDATE tickets SET closed_date = NULL, version = version + 1 WHERE ticket_id = %s",
+}
+
+
+def _apply_ticket_operation(cursor, operation: TicketOperation) -> None:
+    query = TICKET_OPERATION_QUERIES.get(operation.action)
+    if query is None:
+        raise ValueError(f"Unknown action: {operation.action}")
+    if operation.action == "assign":
+        if operation.assignee_id is None:
+            raise ValueError("assignee_id is required")
+        if operation.assignee_id == "Unassigned":
+            operation.assignee_id = None
+        cursor.execute(query, (operation.assignee_id, operation.ticket_id))
+    else:
+        cursor.execute(query, (operation.ticket_id,))
+    if cursor.rowcount == 0:
+        raise ValueError("Ticket not found")
+
+
+def apply_ticket_operations(
+    operations: List[TicketOperation], config: AppConfig
+) -> List[TicketOperationResult]:
+    # All operations share one transaction, a failing operation is rolled back to its
+    # savepoint and reported without affecting the others
     cnx = connect_to_mysql(config)
 
     if not cnx:
@@ -553,27 +1126,43 @@ def insert_azure_user(
         )
         raise RuntimeError("Database connection failed") from e
 
-    cursor = cnx.cursor()
+    cursor = cnx.cursor(dictionary=True)
+    results: List[TicketOperationResult] = []
 
     try:
-        query = "INSERT INTO azure_users (user_id, user_name, user_group) VALUES (%s, %s, %s)"
-        values = (
-            user_id,
-            user_name,
-            user_group,
-        )
-        cursor.execute(query, values)
+        cnx.start_transaction()
+        for operation in operations:
+            result: TicketOperationResult = {
+                "ticket_id": operation.ticket_id,
+                "action": operation.action,
+                "success": True,
+            }
+            cursor.execute("SAVEPOINT ticket_operation")
+            try:
+                _apply_ticket_operation(cursor, operation)
+                if operation.action in ("close", "reopen"):
+                    enqueue_milvus_sync(cursor, operation.ticket_id)
+                cursor.execute("RELEASE SAVEPOINT ticket_operation")
+            except (ValueError, mysql.connector.Error) as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT ticket_operation")
+                result["success"] = False
+                result["error"] = str(e)
+            results.append(result)
 
         if TESTING:
             cnx.rollback()
-            logger.info(f"Test insert rolled back for azure user {user_name}")
-        else:
-            cnx.commit()
-            logger.info(
-                f"Inserted user {user_name} into database",
-            )
+            logger.info(f"Test bulk operations rolled back")
+            return results
+
+        cnx.commit()
+        invalidate_ticket_stats()
+        logger.info(
+            f"Applied {sum(result['success'] for result in results)} of {len(results)} ticket operations.",
+        )
+        return results
 
     except Exception as e:
+        cnx.rollback()
         logger.error(
             f"Database error: {e}",
             exc_info=True,
@@ -584,10 +1173,23 @@ def insert_azure_user(
         cursor.close()
         cnx.close()
 
-    return None
+
+# user_id -> (user_name, user_group) last written by this process, so repeat logins
+# skip the database. Any difference from the latest written value is written again
+known_azure_users: Dict[str, Tuple[str, str]] = {}
+known_azure_users_lock = threading.Lock()
 
 
-def is_azure_user_in_db(user_id: str, config: AppConfig) -> bool:
+def is_known_azure_user(user_id: str, user_name: str, user_group: str) -> bool:
+    return known_azure_users.get(user_id) == (user_name, user_group)
+
+
+def upsert_azure_user(
+    user_id: str, user_name: str, user_group: str, config: AppConfig
+) -> None:
+    if is_known_azure_user(user_id, user_name, user_group):
+        return None
+
     cnx = connect_to_mysql(config)
 
     if not cnx:
@@ -598,13 +1200,30 @@ def is_azure_user_in_db(user_id: str, config: AppConfig) -> bool:
         raise RuntimeError("Database connection failed") from e
 
     cursor = cnx.cursor()
+
     try:
-        query = "SELECT user_id FROM azure_users WHERE user_id = %s"
-        values = (user_id,)
+        # One idempotent statement, concurrent logins of the same user cannot collide
+        query = "INSERT INTO azure_users (user_id, user_name, user_group) VALUES (%s, %s, %s) AS new ON DUPLICATE KEY UPDATE user_name = new.user_name, user_group = new.user_group"
+        values = (
+            user_id,
+            user_name,
+            user_group,
+        )
         cursor.execute(query, values)
 
-        result = cursor.fetchone()
-        return result is not None
+        if TESTING:
+            cnx.rollback()
+            logger.info(f"Test upsert rolled back for azure user {user_name}")
+        else:
+            cnx.commit()
+            user_directory.put(user_id, user_name, user_group)
+            with known_azure_users_lock:
+                known_azure_users[user_id] = (user_name, user_group)
+            # rowcount is 1 for an insert, 2 for an update and 0 if nothing changed
+            if cursor.rowcount:
+                logger.info(
+                    f"Upserted user {user_name} into database",
+                )
 
     except Exception as e:
         logger.error(
@@ -616,3 +1235,5 @@ def is_azure_user_in_db(user_id: str, config: AppConfig) -> bool:
     finally:
         cursor.close()
         cnx.close()
+
+    return None
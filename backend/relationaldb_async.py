@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+from custom_types import AppConfig
+from backend import relationaldb
+
+logger = logging.getLogger("RELATIONAL_DB_ASYNC " + __name__)
+
+T = TypeVar("T")
+
+# mysql.connector and pymilvus are blocking, so every call runs on a dedicated,
+# bounded thread pool instead of the event loop. With one worker per pooled
+# connection (size + max_overflow), workers never queue on the connection pool.
+db_executor: ThreadPoolExecutor | None = None
+db_executor_lock = threading.Lock()
+db_executor_workers = 0
+
+
+def configure_db_executor(config: AppConfig) -> None:
+    global db_executor_workers
+    pool_config = config["mysql"]["pool"]
+    db_executor_workers = config["mysql"].get(
+        "executor_workers", pool_config["size"] + pool_config["max_overflow"]
+    )
+
+
+def start_db_executor() -> ThreadPoolExecutor:
+    global db_executor
+    if db_executor is None:
+        with db_executor_lock:
+            if db_executor is None:
+                if not db_executor_workers:
+                    raise RuntimeError("Database executor is not configured")
+                db_executor = ThreadPoolExecutor(
+                    max_workers=db_executor_workers, thread_name_prefix="db"
+                )
+                logger.info(
+                    f"Started database executor with {db_executor_workers} workers.",
+                )
+    return db_executor
+
+
+def stop_db_executor() -> None:
+    global db_executor
+    with db_executor_lock:
+        if db_executor is not None:
+            db_executor.shutdown(wait=True)
+            logger.info("Stopped database executor.")
+        db_executor = None
+
+
+async def run_in_db_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Started lazily as well, so the app also works without running its lifespan
+    executor = start_db_executor()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def get_db_executor_status() -> Dict[str, Any]:
+    if db_executor is None:
+        return {"initialized": False}
+    return {
+        "initialized": True,
+        "workers": db_executor_workers,
+        "queued": db_executor._work_queue.qsize(),
+    }
+
+
+def _to_async(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_db_executor(func, *args, **kwargs)
+
+    return wrapper
+
+
+insert_ticket = _to_async(relationaldb.insert_ticket)
+get_ticket = _to_async(relationaldb.get_ticket)
+get_ticket_state = _to_async(relationaldb.get_ticket_state)
+get_ticket_messages = _to_async(relationaldb.get_ticket_messages)
+insert_ticket_message = _to_async(relationaldb.insert_ticket_message)
+close_ticket = _to_async(relationaldb.close_ticket)
+reopen_ticket = _to_async(relationaldb.reopen_ticket)
+get_filtered_tickets = _to_async(relationaldb.get_filtered_tickets)
+get_user_tickets = _to_async(relationaldb.get_user_tickets)
+get_technicians = _to_async(relationaldb.get_technicians)
+get_ticket_stats = _to_async(relationaldb.get_ticket_stats)
+assign_ticket = _to_async(relationaldb.assign_ticket)
+apply_ticket_operations = _to_async(relationaldb.apply_ticket_operations)
+upsert_azure_user = _to_async(relationaldb.upsert_azure_user)
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from custom_types import Technician
+
+
+class UserDirectory:
+    # Process-local copy of azure_users for name lookups and the technician list.
+    # Writes of this process go through put(), writes of other processes are picked up
+    # by the periodic reload (replace_all) and by lookups of unknown ids.
+    def __init__(self, refresh_interval_seconds: float = 600):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._users: Dict[str, Tuple[str, str]] = {}
+        self._technicians: Optional[List[Technician]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def needs_refresh(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.refresh_interval_seconds
+        )
+
+    def replace_all(self, users: Iterable[Tuple[str, str, str]]) -> None:
+        directory = {user_id: (user_name, user_group) for user_id, user_name, user_group in users}
+        with self._lock:
+            self._users = directory
+            self._technicians = None
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+
+    def put(self, user_id: str, user_name: str, user_group: str) -> None:
+        with self._lock:
+            previous = self._users.get(user_id)
+            self._users[user_id] = (user_name, user_group)
+            if "technicians" in (user_group, previous and previous[1]):
+                self._technicians = None
+
+    def get_name(self, user_id: Optional[str]) -> Optional[str]:
+        user = self._users.get(user_id) if user_id else None
+        return user[0] if user else None
+
+    def missing(self, user_ids: Iterable[Optional[str]]) -> Set[str]:
+        return {user_id for user_id in user_ids if user_id and user_id not in self._users}
+
+    def technicians(self) -> List[Technician]:
+        with self._lock:
+            if self._technicians is None:
+                self._technicians = sorted(
+                    (
+                        {"user_id": user_id, "user_name": user_name}
+                        for user_id, (user_name, user_group) in self._users.items()
+                        if user_group == "technicians"
+                    ),
+                    key=lambda technician: (technician["user_name"], technician["user_id"]),
+                )
+            return self._technicians
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._users), "reloads": self.reloads}
@@ -0,0 +1,28 @@
+import json
+from typing import List
+import numpy as np
+
+# Summary embeddings are stored as packed little-endian float32 (4 bytes per dimension)
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def encode_vector(vector: List[float] | np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def _is_json_vector(value: str | bytes | bytearray) -> bool:
+    if isinstance(value, str):
+        return True
+    return value[:1] == b"[" and value.rstrip()[-1:] == b"]"
+
+
+def decode_vector(value: str | bytes | bytearray) -> np.ndarray:
+    # Rows that were not migrated yet still hold the legacy JSON text
+    if _is_json_vector(value):
+        try:
+            return np.asarray(json.loads(value), dtype=VECTOR_DTYPE)
+        except ValueError:
+            if isinstance(value, str):
+                raise
+    # Zero-copy view on the fetched buffer
+    return np.frombuffer(value, dtype=VECTOR_DTYPE)
@@ -0,0 +1,79 @@
+"""Concurrent request throughput of blocking vs executor based database calls.
+
+Simulates a database call with a fixed blocking latency and serves it from two
+FastAPI endpoints: one calling it inline inside ``async def`` (the old behaviour)
+and one going through ``run_in_db_executor``. Both are hit with the same number of
+concurrent requests through an in-process ASGI transport.
+
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
+from backend import relationaldb_async
+
+
+def blocking_query(latency: float) -> dict:
+    time.sleep(latency)
+    return {"ticket_id": 1}
+
+
+def create_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/inline")
+    async def inline():
+        return blocking_query(latency)
+
+    @app.get("/executor")
+    async def executor():
+        return await relationaldb_async.run_in_db_executor(blocking_query, latency)
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def request():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=20)
+    args = parser.parse_args()
+
+    relationaldb_async.db_executor_workers = args.workers
+    app = create_app(args.latency)
+
+    inline = asyncio.run(measure(app, "/inline", args.requests, args.concurrency))
+    executor = asyncio.run(measure(app, "/executor", args.requests, args.concurrency))
+    relationaldb_async.stop_db_executor()
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.latency * 1000:.0f} ms per query, {args.workers} executor workers"
+    )
+    print(f"inline (blocking event loop): {inline:8.1f} req/s")
+    print(f"db executor:                  {executor:8.1f} req/s")
+    print(f"speedup:                      {executor / inline:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
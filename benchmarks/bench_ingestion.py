@@ -0,0 +1,188 @@
+"""Cold-start ingestion throughput of the RAG documents folder.
+
+Writes a synthetic PDF corpus (seeded, so runs are reproducible) and ingests it
+twice against a fake embedding model and a fake Milvus insert with fixed latencies:
+once with the old loop (one file at a time, one embedding call and one insert per
+file) and once with ``IngestionPipeline``.
+
+    python -m benchmarks.bench_ingestion --files 40 --pages 20 --workers 4
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from PyPDF2 import PdfReader
+from ai_system.ingestion import IngestionPipeline
+
+WORDS = (
+    "printer network driver reset login password account vpn laptop monitor "
+    "update install restart cable router firmware server backup license email"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_synthetic_pdf(file_path, pages: List[str]) -> None:
+    # Minimal PDF 1.4 writer: one Helvetica text stream per page, one line per "\n"
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for index, text in enumerate(pages):
+        page_id = 4 + 2 * index
+        content_id = page_id + 1
+        lines = " ".join(f"({_escape(line)}) '" for line in text.split("\n"))
+        stream = f"BT /F1 10 Tf 12 TL 72 800 Td {lines} ET"
+        objects[page_id] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        objects[content_id] = (
+            f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+        )
+        kids.append(f"{page_id} 0 R")
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id in sorted(objects):
+        offsets.append(len(output))
+        output += f"{object_id} 0 obj\n{objects[object_id]}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    Path(file_path).write_bytes(output)
+
+
+def synthetic_page(rng: random.Random, lines: int = 50) -> str:
+    return "\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines)
+    )
+
+
+def write_corpus(directory: str, files: int, pages: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"manual_{index:04d}.pdf")
+        write_synthetic_pdf(path, [synthetic_page(rng) for _ in range(pages)])
+        paths.append(path)
+    return paths
+
+
+class FakeEmbeddings:
+    # Fixed cost per call (request round trip) plus per text (model time)
+    def __init__(self, call_latency: float, text_latency: float, dim: int = 8):
+        self.call_latency = call_latency
+        self.text_latency = text_latency
+        self.dim = dim
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.call_latency + self.text_latency * len(texts))
+        return [[0.0] * self.dim for _ in texts]
+
+
+class FakeInsert:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.rows = 0
+
+    def __call__(self, rows: List[dict]) -> None:
+        self.calls += 1
+        self.rows += len(rows)
+        time.sleep(self.latency)
+
+
+def ingest_sequentially(paths: List[str], embeddings: FakeEmbeddings, insert: FakeInsert) -> int:
+    # The previous _initialize_directory loop
+    pages = 0
+    for path in paths:
+        reader = PdfReader(path)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text()
+            pages += 1
+        text_chunks = RecursiveCharacterTextSplitter().split_text(text)
+        vectors = embeddings.embed_documents(text_chunks)
+        insert(
+            [
+                {"embedding": vector, "text": chunk, "metadata": os.path.basename(path)}
+                for vector, chunk in zip(vectors, text_chunks)
+            ]
+        )
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--page-batch-size", type=int, default=50)
+    parser.add_argument("--embedding-batch-size", type=int, default=64)
+    parser.add_argument("--insert-batch-size", type=int, default=512)
+    parser.add_argument("--embed-call-latency", type=float, default=0.02)
+    parser.add_argument("--embed-text-latency", type=float, default=0.001)
+    parser.add_argument("--insert-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_corpus(directory, args.files, args.pages, args.seed)
+        print(
+            f"{args.files} synthetic PDFs x {args.pages} pages, "
+            f"{args.workers} extraction workers"
+        )
+
+        embeddings = FakeEmbeddings(args.embed_call_latency, args.embed_text_latency)
+        insert = FakeInsert(args.insert_latency)
+        start = time.perf_counter()
+        pages = ingest_sequentially(paths, embeddings, insert)
+        sequential = time.perf_counter() - start
+        print(
+            f"sequential: {sequential:7.2f} s {pages / sequential:8.1f} pages/s "
+            f"{insert.rows / sequential:8.1f} chunks/s "
+            f"({embeddings.calls} embedding calls, {insert.calls} inserts)"
+        )
+
+        embeddings = FakeEmbeddings(args.embed_call_latency, args.embed_text_latency)
+        insert = FakeInsert(args.insert_latency)
+        pipeline = IngestionPipeline(
+            embeddings.embed_documents,
+            insert,
+            {
+                "extract_workers": args.workers,
+                "extract_page_batch_size": args.page_batch_size,
+                "queue_max_chunks": 1024,
+                "embedding_batch_size": args.embedding_batch_size,
+                "insert_batch_size": args.insert_batch_size,
+                "progress_interval_seconds": 60,
+            },
+        )
+        stats = pipeline.run(paths)
+        print(
+            f"pipeline:   {stats['seconds']:7.2f} s {stats['pages_per_second']:8.1f} pages/s "
+            f"{stats['chunks_per_second']:8.1f} chunks/s "
+            f"({embeddings.calls} embedding calls, {insert.calls} inserts)"
+        )
+        print(f"speedup:    {sequential / stats['seconds']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
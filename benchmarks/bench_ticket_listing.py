@@ -0,0 +1,156 @@
+"""Ticket list latency of the old page + COUNT query pair vs the single list query.
+
+Creates (or reuses) a separate benchmark database next to the configured one, seeds
+it with synthetic tickets and times the variants for a set of typical technician
+portal filters and pages: the old query pair, the single query with its count
+subquery, and the single query with the total taken from the count cache. Requires
+MySQL 8 and the credentials from config.json/.env.
+
+    python -m benchmarks.bench_ticket_listing --tickets 1000000 --database db_ai_helpdesk_bench
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+import mysql.connector
+from dotenv import load_dotenv
+from backend.pydantic_models import TicketFilter
+from backend import relationaldb
+from backend.relationaldb import _build_ticket_filter, _query_ticket_list
+from utils import load_json
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEGACY_PAGE_QUERY = "SELECT ticket_id, title, content, creation_date, closed_date, u.user_name as author_name, a.user_name as assignee_name FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id"
+LEGACY_COUNT_QUERY = "SELECT COUNT(t.ticket_id) as count FROM tickets t INNER JOIN azure_users u ON t.author_id = u.user_ID LEFT JOIN azure_users a on t.assignee_id = a.user_id"
+
+FILTERS = {
+    "all, page 1": TicketFilter(page=1, page_size=10),
+    "open, page 1": TicketFilter(page=1, page_size=10, closed=False),
+    "unassigned open, page 1": TicketFilter(
+        page=1, page_size=10, closed=False, assignee_id="unassigned"
+    ),
+    "closed, page 500": TicketFilter(page=500, page_size=10, closed=True),
+}
+
+
+def connect(args):
+    return mysql.connector.connect(
+        user=args.user,
+        password=os.getenv("MYSQL_PASSWORD"),
+        host=args.host,
+    )
+
+
+def create_schema(cursor, database: str) -> None:
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+    cursor.execute(f"USE {database}")
+    with open(os.path.join(app_path, "backend", "MySQL_Database_Creation_File.sql")) as file:
+        statements = file.read().split(";")
+    for statement in statements:
+        statement = statement.strip()
+        if statement.startswith("CREATE TABLE"):
+            cursor.execute(statement.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+
+def seed(cnx, cursor, tickets: int, batch_size: int) -> None:
+    cursor.execute("SELECT COUNT(*) FROM tickets")
+    existing = cursor.fetchone()[0]
+    if existing >= tickets:
+        return
+
+    user_ids = [str(uuid.uuid4()) for _ in range(200)]
+    cursor.executemany(
+        "INSERT INTO azure_users (user_id, user_name, user_group) VALUES (%s, %s, %s)",
+        [
+            (user_id, f"User {i}", "technicians" if i < 10 else "users")
+            for i, user_id in enumerate(user_ids)
+        ],
+    )
+    technicians = user_ids[:10]
+    start = datetime(2020, 1, 1)
+    content = "Synthetic ticket content. " * 40
+
+    for offset in range(existing, tickets, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, tickets)):
+            created = start + timedelta(minutes=i)
+            closed = created + timedelta(days=1) if random.random() < 0.7 else None
+            assignee = random.choice(technicians) if random.random() < 0.8 else None
+            rows.append(
+                (f"Ticket {i}", content, created, closed, random.choice(user_ids), assignee)
+            )
+        cursor.executemany(
+            "INSERT INTO tickets (title, content, creation_date, closed_date, author_id, assignee_id) VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+        cnx.commit()
+        print(f"Seeded {min(offset + batch_size, tickets)}/{tickets} tickets", end="\r")
+    print()
+
+
+def legacy_ticket_list(cursor, filter_data: TicketFilter) -> None:
+    where, params = _build_ticket_filter(filter_data)
+    order = " ORDER BY creation_date DESC"
+    offset = (filter_data.page - 1) * filter_data.page_size
+    cursor.execute(
+        LEGACY_PAGE_QUERY + where + order + " LIMIT %s OFFSET %s",
+        params + (filter_data.page_size, offset),
+    )
+    cursor.fetchall()
+    cursor.execute(LEGACY_COUNT_QUERY + where + order, params)
+    cursor.fetchone()
+
+
+def uncached_ticket_list(cursor, filter_data: TicketFilter) -> None:
+    relationaldb.ticket_count_cache.clear()
+    _query_ticket_list(cursor, filter_data)
+
+
+def timed(func, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main() -> None:
+    load_dotenv()
+    config = load_json(os.path.join(app_path, "config.json"))
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--database", default="db_ai_helpdesk_bench")
+    parser.add_argument("--user", default=config["mysql"]["user"])
+    parser.add_argument("--host", default=config["mysql"]["host"])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cnx = connect(args)
+    cursor = cnx.cursor()
+    create_schema(cursor, args.database)
+    seed(cnx, cursor, args.tickets, args.batch_size)
+    cursor.close()
+
+    cursor = cnx.cursor(dictionary=True)
+    # Every total is cached, to time the cached path for each filter
+    relationaldb.ticket_count_cache_threshold = 0
+    print(f"{'filter':<28}{'page+COUNT ms':>16}{'single ms':>12}{'cached ms':>12}")
+    for name, filter_data in FILTERS.items():
+        legacy = timed(lambda: legacy_ticket_list(cursor, filter_data), args.repeat)
+        single = timed(lambda: uncached_ticket_list(cursor, filter_data), args.repeat)
+        _query_ticket_list(cursor, filter_data)
+        cached = timed(lambda: _query_ticket_list(cursor, filter_data), args.repeat)
+        print(f"{name:<28}{legacy:>16.1f}{single:>12.1f}{cached:>12.1f}")
+    cursor.close()
+    cnx.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Row size and decode cost of JSON vs packed float32 summary vectors.
+
+    python -m benchmarks.bench_vector_codec --dim 1024 --rounds 2000
+"""
+
+import argparse
+import json
+import random
+import timeit
+from backend.vector_codec import decode_vector, encode_vector
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    vector = [random.uniform(-1, 1) for _ in range(args.dim)]
+    json_value = json.dumps(vector)
+    blob_value = encode_vector(vector)
+
+    json_us = timeit.timeit(lambda: json.loads(json_value), number=args.rounds)
+    blob_us = timeit.timeit(lambda: decode_vector(blob_value), number=args.rounds)
+    json_us = json_us / args.rounds * 1e6
+    blob_us = blob_us / args.rounds * 1e6
+
+    print(f"{args.dim}-dim summary vector")
+    print(f"{'':<10}{'row bytes':>12}{'decode us':>12}")
+    print(f"{'JSON':<10}{len(json_value.encode()):>12}{json_us:>12.2f}")
+    print(f"{'float32':<10}{len(blob_value):>12}{blob_us:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
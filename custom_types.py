@@ -1,5 +1,37 @@
 from datetime import datetime
-from typing import TypedDict, List, Tuple
+from typing import NotRequired, TypedDict, List, Tuple
+
+
+class AuthConfig(TypedDict):
+    mode: str
+    identity_cache_ttl_seconds: int
+    identity_cache_max_entries: int
+    jwks_uri: str
+    jwks_refresh_interval_seconds: int
+    issuer: str
+    audience: str
+    leeway_seconds: int
+
+
+class HttpClientConfig(TypedDict):
+    timeout_seconds: float
+    connect_timeout_seconds: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry_seconds: float
+    max_connections_per_host: int
+    max_retries: int
+    retry_backoff_seconds: float
+
+
+class EventsConfig(TypedDict):
+    max_queued_events: int
+    keepalive_seconds: float
+
+
+class UserDirectoryConfig(TypedDict):
+    refresh_interval_seconds: float
+    technicians_max_age_seconds: int
 
 
 class OllamaConfig(TypedDict):
@@ -19,19 +51,65 @@ class MilvusConfig(TypedDict):
     metric_type_tickets: str
     index_type_tickets: str
     number_of_retrieved_documents: int
+    similar_tickets_limit: int
+    similar_tickets_radius: float
+    similar_tickets_range_filter: float
+    similar_tickets_cache_max_entries: int
+    similar_tickets_cache_ttl_seconds: float
     rag_documents_folder_absolute_path: str
 
 
+class MilvusOutboxConfig(TypedDict):
+    batch_size: int
+    poll_interval_seconds: float
+    retry_backoff_seconds: float
+    max_backoff_seconds: float
+
+
+class IngestionConfig(TypedDict):
+    extract_workers: int
+    extract_page_batch_size: int
+    queue_max_chunks: int
+    embedding_batch_size: int
+    insert_batch_size: int
+    progress_interval_seconds: float
+    manifest_path: str
+    watcher_debounce_seconds: float
+    watcher_workers: int
+
+
+class MySqlPoolConfig(TypedDict):
+    size: int
+    max_overflow: int
+    timeout_seconds: float
+    recycle_seconds: int
+    pre_ping: bool
+
+
 class MySqlConfig(TypedDict):
     user: str
     host: str
     database: str
+    executor_workers: int
+    fanout_workers: int
+    bulk_max_operations: int
+    ticket_stats_ttl_seconds: float
+    ticket_count_cache_threshold: int
+    ticket_count_cache_max_entries: int
+    ticket_count_ttl_seconds: float
+    pool: MySqlPoolConfig
 
 
 class AppConfig(TypedDict):
+    auth: AuthConfig
+    http_client: HttpClientConfig
+    events: EventsConfig
+    user_directory: UserDirectoryConfig
     ollama: OllamaConfig
     workflow: WorkflowConfig
     milvus: MilvusConfig
+    milvus_outbox: MilvusOutboxConfig
+    ingestion: IngestionConfig
     mysql: MySqlConfig
 
 
@@ -71,6 +149,7 @@ class SimilarTicket(TypedDict):
 
 
 class TicketMessage(TypedDict):
+    message_id: int
     message: str
     author_name: str
     group: str
@@ -85,15 +164,100 @@ class Ticket(TypedDict):
     closed_date: datetime | None
     author_name: str
     assignee_name: str | None
+    author_id: NotRequired[str]
+    version: NotRequired[int]
     similar_tickets: List[SimilarTicket]
     ticket_messages: List[TicketMessage]
 
 
+class TicketState(TypedDict):
+    ticket_id: int
+    author_id: str
+    version: int
+
+
+class TicketOperationResult(TypedDict):
+    ticket_id: int
+    action: str
+    success: bool
+    error: NotRequired[str]
+
+
+class TicketEvent(TypedDict):
+    type: str
+    ticket_id: int
+    data: dict
+
+
+class TicketMessageSync(TypedDict):
+    version: int
+    ticket_messages: List[TicketMessage]
+
+
 class TicketList(TypedDict):
-    count: int
+    count: int | None
     tickets: List[Ticket]
+    next_cursor: NotRequired[str | None]
+    prev_cursor: NotRequired[str | None]
+
+
+class AssigneeTicketStats(TypedDict):
+    assignee_id: str
+    assignee_name: str | None
+    open: int
+    closed: int
+
+
+class TicketStats(TypedDict):
+    total: int
+    open: int
+    closed: int
+    unassigned: int
+    open_unassigned: int
+    by_assignee: List[AssigneeTicketStats]
 
 
 class Technician(TypedDict):
     user_id: str
     user_name: str
+
+
+class ChunkMetadata(TypedDict):
+    source: str
+    pages: List[int]
+    start: int
+    end: int
+
+
+class DocumentChunk(TypedDict):
+    text: str
+    metadata: ChunkMetadata
+
+
+class DocumentManifestEntry(TypedDict):
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[int]
+    chunk_hashes: NotRequired[List[str]]
+
+
+class IngestionStats(TypedDict):
+    files: int
+    failed_files: int
+    pages: int
+    chunks: int
+    seconds: float
+    pages_per_second: float
+    chunks_per_second: float
+
+
+class DocumentQueueStats(TypedDict):
+    pending: int
+    in_flight: int
+    events: int
+    coalesced: int
+    processed: int
+    failed: int
+    latency_avg_seconds: float
+    latency_max_seconds: float
@@ -1,6 +1,9 @@
 export interface Filter {
   page?: number;
   page_size?: number;
+  pagination?: "offset" | "cursor";
+  cursor?: string;
+  fields?: string[];
 }
 
 export interface TicketFilter extends Filter {
@@ -5,6 +5,7 @@ export interface SimilarTicket {
 }
 
 export interface TicketMessage {
+  message_id?: number;
   message: string;
   author_name: string;
   group: string;
@@ -19,6 +20,12 @@ export interface Ticket {
   closed_date?: Date | null;
   author_name: string;
   assignee_name?: string | null;
+  version: number;
   similar_tickets: SimilarTicket[];
   ticket_messages: TicketMessage[];
 }
+
+export interface TicketMessageSync {
+  version: number;
+  ticket_messages: TicketMessage[];
+}
@@ -1,6 +1,8 @@
 import { Ticket } from "./Ticket";
 
 export interface TicketList {
-  count: number;
+  count: number | null;
   tickets: Ticket[];
+  next_cursor?: string | null;
+  prev_cursor?: string | null;
 }
@@ -0,0 +1,15 @@
+export interface AssigneeTicketStats {
+  assignee_id: string;
+  assignee_name: string | null;
+  open: number;
+  closed: number;
+}
+
+export interface TicketStats {
+  total: number;
+  open: number;
+  closed: number;
+  unassigned: number;
+  open_unassigned: number;
+  by_assignee: AssigneeTicketStats[];
+}
@@ -1,14 +1,17 @@
 import { useQuery } from "@tanstack/react-query";
 import APIClient from "../services/apiClient";
 import { Ticket } from "@/entities/Ticket";
+import useTicketEvents from "./useTicketEvents";
 
 const ticketClient = new APIClient<Ticket>("/api/ticket");
 
 const useTicket = (id: string, accessToken: string) => {
+  /* Changes are pushed, polling is only a fallback */
+  useTicketEvents(id, accessToken);
   return useQuery<Ticket>({
     queryKey: ["ticket", id],
     queryFn: () => ticketClient.getByID(id, accessToken),
-    refetchInterval: 5000,
+    refetchInterval: 60000,
     retry: 2,
     staleTime: 1000,
     gcTime: 0,
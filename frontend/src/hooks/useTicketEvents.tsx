@@ -0,0 +1,48 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+
+/* Listens to the ticket event stream and refetches the ticket when it changes.
+   fetch is used instead of EventSource, because EventSource cannot send the access token */
+const useTicketEvents = (id: string, accessToken: string) => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!accessToken) return;
+    const controller = new AbortController();
+    let retryTimeout: ReturnType<typeof setTimeout>;
+
+    const connect = async () => {
+      try {
+        const response = await fetch(`/api/ticket/${id}/events`, {
+          headers: { Authorization: `Bearer ${accessToken}` },
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) throw new Error("Stream failed");
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          const events = buffer.split("\n\n");
+          buffer = events.pop() || "";
+          /* Every event, including ready after a reconnect, triggers a conditional refetch */
+          if (events.some((event) => event.startsWith("event:"))) {
+            queryClient.invalidateQueries({ queryKey: ["ticket", id] });
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+      }
+      retryTimeout = setTimeout(connect, 5000);
+    };
+
+    connect();
+    return () => {
+      controller.abort();
+      clearTimeout(retryTimeout);
+    };
+  }, [id, accessToken, queryClient]);
+};
+
+export default useTicketEvents;
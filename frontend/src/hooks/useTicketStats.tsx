@@ -0,0 +1,16 @@
+import { useQuery } from "@tanstack/react-query";
+import APIClient from "../services/apiClient";
+import { TicketStats } from "@/entities/TicketStats";
+
+const ticketStatsClient = new APIClient<TicketStats>("/api/tickets/stats");
+
+const useTicketStats = (accessToken: string) => {
+  return useQuery<TicketStats>({
+    queryKey: ["ticketStats"],
+    queryFn: () => ticketStatsClient.get(accessToken),
+    retry: 2,
+    staleTime: 30 * 1000,
+  });
+};
+
+export default useTicketStats;
@@ -0,0 +1,71 @@
+import pytest
+from backend import relationaldb
+from utils import load_json
+import os
+
+app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+config = load_json(os.path.join(app_path, "config.json"))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("MySQL server has gone away")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    created = []
+
+    def create_connection(config):
+        cnx = FakeConnection()
+        created.append(cnx)
+        return cnx
+
+    monkeypatch.setattr(relationaldb, "_create_mysql_connection", create_connection)
+    monkeypatch.setattr(relationaldb, "connection_pool", None)
+    yield created
+    if relationaldb.connection_pool is not None:
+        relationaldb.connection_pool.dispose()
+
+
+def test_connections_are_reused(fake_pool):
+    cnx = relationaldb.connect_to_mysql(config)
+    cnx.close()
+    cnx = relationaldb.connect_to_mysql(config)
+    cnx.close()
+
+    assert len(fake_pool) == 1
+
+
+def test_stale_connection_is_replaced_on_checkout(fake_pool):
+    cnx = relationaldb.connect_to_mysql(config)
+    cnx.close()
+    fake_pool[0].alive = False
+
+    cnx = relationaldb.connect_to_mysql(config)
+    cnx.close()
+
+    assert len(fake_pool) == 2
+    assert fake_pool[0].closed
+
+
+def test_connection_pool_status(fake_pool):
+    cnx = relationaldb.connect_to_mysql(config)
+    status = relationaldb.get_connection_pool_status()
+    cnx.close()
+
+    assert status["initialized"]
+    assert status["checked_out"] == 1
+    assert status["size"] == config["mysql"]["pool"]["size"]
+    assert relationaldb.get_connection_pool_status()["checked_out"] == 0
@@ -0,0 +1,276 @@
+import ast
+import os
+import pytest
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent
+from ai_system import vectordb
+from ai_system.document_manifest import DocumentManifest, fingerprint_file
+from benchmarks.bench_ingestion import write_synthetic_pdf
+
+INGESTION_CONFIG = {
+    "extract_workers": 1,
+    "extract_page_batch_size": 2,
+    "queue_max_chunks": 16,
+    "embedding_batch_size": 8,
+    "insert_batch_size": 8,
+    "progress_interval_seconds": 60,
+    "watcher_debounce_seconds": 0.01,
+    "watcher_workers": 2,
+}
+
+
+def write_manual(directory, name, text):
+    write_synthetic_pdf(directory / name, [text])
+
+
+def test_diff_detects_added_changed_and_deleted_files(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    write_manual(documents, "kept.pdf", "kept")
+    write_manual(documents, "touched.pdf", "touched")
+    write_manual(documents, "edited.pdf", "edited")
+    manifest = DocumentManifest(str(tmp_path / "manifest.json"))
+    for name in ("kept.pdf", "touched.pdf", "edited.pdf"):
+        manifest.set(name, fingerprint_file(documents / name, [1], ["hash"]))
+    manifest.set("gone.pdf", {"size": 1, "mtime": 1.0, "sha256": "x", "chunk_ids": [2]})
+    write_manual(documents, "new.pdf", "new")
+    os.utime(documents / "touched.pdf", (1, 1))
+    write_manual(documents, "edited.pdf", "edited again")
+    os.utime(documents / "edited.pdf", (2, 2))
+
+    diff = manifest.diff(str(documents))
+
+    assert [path.name for path in diff.added] == ["new.pdf"]
+    assert [path.name for path in diff.changed] == ["edited.pdf"]
+    assert diff.deleted == ["gone.pdf"]
+    # Same content, only the mtime is refreshed
+    assert manifest.get("touched.pdf")["mtime"] == 1
+
+
+def test_manifest_round_trip_and_corrupt_file(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = DocumentManifest(path)
+    manifest.set("a.pdf", {"size": 1, "mtime": 2.0, "sha256": "abc", "chunk_ids": [3, 4]})
+    manifest.save()
+
+    assert DocumentManifest.load(path).files == manifest.files
+    with open(path, "w") as file:
+        file.write("{")
+    assert DocumentManifest.load(path).files == {}
+
+
+class FakeMilvusClient:
+    def __init__(self):
+        self.rows = {}
+        self.deletes = []
+        self.operations = []
+        self.next_id = 1
+
+    def query(self, collection_name, filter, limit=None, output_fields=None):
+        if filter.startswith("id in "):
+            ids = ast.literal_eval(filter[len("id in ") :])
+            return [{"id": id, **self.rows[id]} for id in ids if id in self.rows]
+        return list(self.rows.values())[:limit]
+
+    def insert(self, collection_name, data):
+        ids = []
+        for row in data:
+            self.rows[self.next_id] = row
+            ids.append(self.next_id)
+            self.next_id += 1
+        self.operations.append(("insert", ids))
+        return {"insert_count": len(ids), "ids": ids}
+
+    def delete(self, collection_name, filter):
+        self.deletes.append(filter)
+        self.operations.append(("delete", filter))
+        if filter.startswith("id in "):
+            for id in ast.literal_eval(filter[len("id in ") :]):
+                self.rows.pop(id, None)
+
+    def flush(self, collection_name):
+        pass
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.texts = 0
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        vectors = [[float(self.texts + index)] for index in range(len(texts))]
+        self.texts += len(texts)
+        return vectors
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(vectordb, "embedding_model", embeddings, raising=False)
+    monkeypatch.setattr(
+        vectordb,
+        "config",
+        {
+            "ingestion": {
+                **INGESTION_CONFIG,
+                "manifest_path": str(tmp_path / "manifest.json"),
+            }
+        },
+        raising=False,
+    )
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    return documents, embeddings
+
+
+def test_restart_only_ingests_the_difference(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    write_manual(documents, "a.pdf", "manual a")
+    write_manual(documents, "b.pdf", "manual b")
+
+    vectordb._initialize_directory(client, str(documents))
+    assert embeddings.texts == 2
+    assert set(vectordb.document_manifest.files) == {"a.pdf", "b.pdf"}
+    old_b_chunk_ids = vectordb.document_manifest.get("b.pdf")["chunk_ids"]
+
+    # Unchanged folder: nothing is embedded or deleted
+    vectordb._initialize_directory(client, str(documents))
+    assert embeddings.texts == 2
+    assert client.deletes == []
+
+    write_manual(documents, "b.pdf", "manual b, second edition")
+    os.utime(documents / "b.pdf", (5, 5))
+    os.remove(documents / "a.pdf")
+    write_manual(documents, "c.pdf", "manual c")
+    vectordb._initialize_directory(client, str(documents))
+
+    assert embeddings.texts == 4
+    assert vectordb._document_filter("a.pdf") in client.deletes
+    assert f"id in {old_b_chunk_ids}" in client.deletes
+    assert set(vectordb.document_manifest.files) == {"b.pdf", "c.pdf"}
+
+
+def long_page(label):
+    # About 3000 characters, so every page ends up in a chunk of its own
+    return "\n".join(f"{label} line {line} " + "text " * 30 for line in range(20))
+
+
+def test_modified_document_only_embeds_changed_chunks(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    pages = [long_page(label) for label in ("intro", "setup", "faq")]
+    write_synthetic_pdf(documents / "manual.pdf", pages)
+    vectordb._initialize_directory(client, str(documents))
+    old_entry = vectordb.document_manifest.get("manual.pdf")
+    assert len(old_entry["chunk_ids"]) == 3
+    embeddings.calls = embeddings.texts = 0
+    client.operations.clear()
+
+    # Same length, the chunks after it keep their offsets
+    pages[1] = pages[1].replace("setup line 7", "setup line X")
+    write_synthetic_pdf(documents / "manual.pdf", pages)
+    vectordb.DirectoryWatcher(client).process_file(str(documents / "manual.pdf"))
+
+    new_entry = vectordb.document_manifest.get("manual.pdf")
+    assert (embeddings.calls, embeddings.texts) == (1, 1)
+    assert new_entry["chunk_ids"][0] == old_entry["chunk_ids"][0]
+    assert new_entry["chunk_ids"][2] == old_entry["chunk_ids"][2]
+    new_id = new_entry["chunk_ids"][1]
+    # The replacement is stored before the outdated chunk is removed
+    assert client.operations == [
+        ("insert", [new_id]),
+        ("delete", f"id in [{old_entry['chunk_ids'][1]}]"),
+    ]
+
+
+def test_moved_chunks_keep_their_vectors(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    pages = [long_page(label) for label in ("intro", "setup", "faq")]
+    write_synthetic_pdf(documents / "manual.pdf", pages)
+    vectordb._initialize_directory(client, str(documents))
+    old_ids = vectordb.document_manifest.get("manual.pdf")["chunk_ids"]
+    old_faq = client.rows[old_ids[2]]
+    embeddings.calls = embeddings.texts = 0
+
+    pages[1] = pages[1].replace("setup line 7", "setup line 7 (fixed)")
+    write_synthetic_pdf(documents / "manual.pdf", pages)
+    vectordb.DirectoryWatcher(client).process_file(str(documents / "manual.pdf"))
+
+    new_ids = vectordb.document_manifest.get("manual.pdf")["chunk_ids"]
+    new_faq = client.rows[new_ids[2]]
+    # Only the edited chunk is embedded, the following one is stored again with its
+    # old vector and the shifted offsets
+    assert embeddings.texts == 1
+    assert new_ids[0] == old_ids[0]
+    assert new_faq["text"] == old_faq["text"]
+    assert new_faq["embedding"] == old_faq["embedding"]
+    assert new_faq["metadata"]["start"] == old_faq["metadata"]["start"] + 8
+    assert new_faq["metadata"]["pages"] == [3]
+    assert set(client.rows) == set(new_ids)
+
+
+def test_unchanged_save_embeds_nothing(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    write_manual(documents, "a.pdf", "manual a")
+    vectordb._initialize_directory(client, str(documents))
+    client.operations.clear()
+
+    vectordb.DirectoryWatcher(client).process_file(str(documents / "a.pdf"))
+
+    assert embeddings.texts == 1
+    assert client.operations == []
+
+
+def test_watcher_coalesces_a_save_storm(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    vectordb._initialize_directory(client, str(documents))
+    watcher = vectordb.DirectoryWatcher(client)
+    watcher.queue.start()
+    try:
+        path = str(documents / "a.pdf")
+        write_manual(documents, "a.pdf", "manual a")
+        watcher.on_created(FileCreatedEvent(path))
+        for _ in range(3):
+            watcher.on_modified(FileModifiedEvent(path))
+        assert watcher.queue.join(timeout=5)
+        assert embeddings.calls == 1
+
+        os.remove(path)
+        watcher.on_deleted(FileDeletedEvent(path))
+        assert watcher.queue.join(timeout=5)
+    finally:
+        watcher.queue.stop()
+
+    assert client.deletes[-1] == vectordb._document_filter("a.pdf")
+    assert vectordb.document_manifest.get("a.pdf") is None
+
+
+def test_failed_replacement_keeps_the_stored_document(rag):
+    documents, embeddings = rag
+    client = FakeMilvusClient()
+    pages = [long_page(label) for label in ("intro", "setup", "faq")]
+    write_synthetic_pdf(documents / "manual.pdf", pages)
+    vectordb._initialize_directory(client, str(documents))
+    old_entry = vectordb.document_manifest.get("manual.pdf")
+    old_rows = dict(client.rows)
+
+    def damaged_chunks():
+        # One full embedding batch is stored before the extraction fails
+        for index in range(INGESTION_CONFIG["embedding_batch_size"]):
+            yield {
+                "text": f"new chunk {index}",
+                "metadata": {"source": "manual.pdf", "pages": [1], "start": 0, "end": 1},
+            }
+        raise ValueError("damaged page")
+
+    with pytest.raises(ValueError, match="damaged page"):
+        vectordb._replace_document(
+            client, str(documents / "manual.pdf"), "manual.pdf", damaged_chunks()
+        )
+
+    assert client.rows == old_rows
+    assert vectordb.document_manifest.get("manual.pdf") == old_entry
@@ -0,0 +1,97 @@
+import threading
+import time
+from ai_system.document_queue import DocumentEventQueue
+
+
+def test_burst_is_coalesced_into_the_final_action():
+    handled = []
+    queue = DocumentEventQueue(
+        lambda path, action: handled.append((path, action)), 0.05, workers=2
+    )
+    queue.start()
+    try:
+        for _ in range(5):
+            queue.submit("a.pdf", "upsert")
+        queue.submit("b.pdf", "upsert")
+        queue.submit("b.pdf", "delete")
+        queue.submit("c.pdf", "delete")
+        queue.submit("c.pdf", "upsert")
+        assert queue.join(timeout=5)
+    finally:
+        queue.stop()
+
+    assert sorted(handled) == [
+        ("a.pdf", "upsert"),
+        ("b.pdf", "delete"),
+        ("c.pdf", "upsert"),
+    ]
+    stats = queue.stats()
+    assert stats["events"] == 9
+    assert stats["coalesced"] == 6
+    assert stats["processed"] == 3
+    assert stats["pending"] == stats["in_flight"] == 0
+    assert stats["latency_max_seconds"] >= 0.05
+
+
+def test_each_event_restarts_the_debounce_window():
+    handled = []
+    queue = DocumentEventQueue(lambda path, action: handled.append(path), 0.1, workers=1)
+    queue.start()
+    try:
+        for _ in range(4):
+            queue.submit("a.pdf", "upsert")
+            time.sleep(0.05)
+        assert handled == []
+        assert queue.join(timeout=5)
+    finally:
+        queue.stop()
+    assert handled == ["a.pdf"]
+
+
+def test_same_path_is_never_handled_concurrently():
+    running = set()
+    overlaps = []
+    first_started = threading.Event()
+    release = threading.Event()
+    handled = []
+
+    def handle(path, action):
+        if path in running:
+            overlaps.append(path)
+        running.add(path)
+        first_started.set()
+        release.wait(5)
+        handled.append((path, action))
+        running.discard(path)
+
+    queue = DocumentEventQueue(handle, 0, workers=4)
+    queue.start()
+    try:
+        queue.submit("a.pdf", "upsert")
+        assert first_started.wait(5)
+        # Arrives while the first run is in progress, runs after it
+        queue.submit("a.pdf", "delete")
+        queue.submit("b.pdf", "upsert")
+        time.sleep(0.05)
+        release.set()
+        assert queue.join(timeout=5)
+    finally:
+        queue.stop()
+
+    assert overlaps == []
+    assert [action for path, action in handled if path == "a.pdf"] == ["upsert", "delete"]
+    assert ("b.pdf", "upsert") in handled
+
+
+def test_failed_action_is_counted():
+    def handle(path, action):
+        raise OSError("disk gone")
+
+    queue = DocumentEventQueue(handle, 0, workers=1)
+    queue.start()
+    try:
+        queue.submit("a.pdf", "upsert")
+        assert queue.join(timeout=5)
+    finally:
+        queue.stop()
+    assert queue.stats()["failed"] == 1
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import pytest
+from backend.events import EventBroker, InProcessEventBroker, ticket_topic
+
+
+def event(ticket_id, event_type="message"):
+    return {"type": event_type, "ticket_id": ticket_id, "data": {}}
+
+
+def test_publish_from_other_thread_reaches_subscriber():
+    broker = InProcessEventBroker()
+
+    async def run():
+        async with broker.subscribe(ticket_topic(1)) as events:
+            publisher = threading.Thread(
+                target=broker.publish, args=(ticket_topic(1), event(1))
+            )
+            publisher.start()
+            publisher.join()
+            return await asyncio.wait_for(events.get(), timeout=1)
+
+    assert asyncio.run(run()) == event(1)
+    assert broker.stats() == {"topics": 0, "subscribers": 0, "published": 1}
+
+
+def test_subscribers_only_receive_their_topic():
+    broker = InProcessEventBroker()
+
+    async def run():
+        async with broker.subscribe(ticket_topic(1)) as first, broker.subscribe(
+            ticket_topic(2)
+        ) as second:
+            broker.publish(ticket_topic(2), event(2))
+            received = await asyncio.wait_for(second.get(), timeout=1)
+            await asyncio.sleep(0)
+            return received, first.queue.empty()
+
+    received, first_empty = asyncio.run(run())
+
+    assert received == event(2)
+    assert first_empty
+
+
+def test_slow_subscriber_gets_resync():
+    broker = InProcessEventBroker(max_queued_events=2)
+
+    async def run():
+        async with broker.subscribe(ticket_topic(1)) as events:
+            for _ in range(3):
+                broker.publish(ticket_topic(1), event(1))
+            await asyncio.sleep(0)
+            return await events.get(), events.queue.empty()
+
+    received, empty = asyncio.run(run())
+
+    assert received["type"] == "resync"
+    assert empty
+
+
+def test_broker_interface_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        EventBroker()
@@ -38,6 +38,7 @@ def test_get_ticket_by_id(ticket_id=VALID_TICKET_ID):
     )
     assert isinstance(ticket.get("similar_tickets"), list)
     assert isinstance(ticket.get("ticket_messages"), list)
+    assert "author_id" not in ticket
 
     try:
         datetime.fromisoformat(ticket["creation_date"])
@@ -49,3 +50,64 @@ def test_get_ticket_by_id(ticket_id=VALID_TICKET_ID):
             datetime.fromisoformat(ticket["closed_date"])
         except ValueError:
             pytest.fail("Invalid datetime format for closed_date")
+
+
+def test_get_ticket_by_id_include(ticket_id=VALID_TICKET_ID):
+
+    response = client.get(
+        f"/api/ticket/{ticket_id}?include=ticket_messages",
+        headers={"Authorization": f"Bearer {AZURE_TECHNICIAN_TESTING_ACCESS_TOKEN}"},
+    )
+
+    assert response.status_code == 200, f"Unexpected response: {response.json()}"
+    ticket = response.json()
+    assert ticket.get("similar_tickets") == []
+    assert isinstance(ticket.get("ticket_messages"), list)
+
+    response = client.get(
+        f"/api/ticket/{ticket_id}?include=attachments",
+        headers={"Authorization": f"Bearer {AZURE_TECHNICIAN_TESTING_ACCESS_TOKEN}"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_ticket_by_id_not_modified(ticket_id=VALID_TICKET_ID):
+
+    headers = {"Authorization": f"Bearer {AZURE_TECHNICIAN_TESTING_ACCESS_TOKEN}"}
+    response = client.get(f"/api/ticket/{ticket_id}", headers=headers)
+
+    assert response.status_code == 200, f"Unexpected response: {response.json()}"
+    etag = response.headers.get("etag")
+    assert etag
+
+    response = client.get(
+        f"/api/ticket/{ticket_id}", headers={**headers, "If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers.get("etag") == etag
+
+
+def test_get_new_ticket_messages(ticket_id=VALID_TICKET_ID):
+
+    headers = {"Authorization": f"Bearer {AZURE_TECHNICIAN_TESTING_ACCESS_TOKEN}"}
+    ticket = client.get(f"/api/ticket/{ticket_id}", headers=headers).json()
+
+    response = client.get(f"/api/ticket/{ticket_id}/messages", headers=headers)
+
+    assert response.status_code == 200, f"Unexpected response: {response.json()}"
+    sync = response.json()
+    assert sync["version"] == ticket["version"]
+    assert [m["message_id"] for m in sync["ticket_messages"]] == sorted(
+        m["message_id"] for m in ticket["ticket_messages"]
+    )
+
+    if sync["ticket_messages"]:
+        last_message_id = sync["ticket_messages"][-1]["message_id"]
+        response = client.get(
+            f"/api/ticket/{ticket_id}/messages?after={last_message_id}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["ticket_messages"] == []
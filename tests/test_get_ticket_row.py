@@ -0,0 +1,68 @@
+from datetime import datetime
+from backend import relationaldb
+from backend.relationaldb import TICKET_QUERY
+from backend.pydantic_models import User
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return self.rows.get(self.executed[-1][1][0])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, dictionary=False, buffered=False):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+USER = User(user_id="author", user_name="Author", group="users")
+
+
+def test_missing_ticket_returns_none(monkeypatch):
+    cursor = FakeCursor({})
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(cursor)
+    )
+
+    assert relationaldb.get_ticket(404, USER, {}, include=frozenset()) is None
+    assert cursor.executed == [(TICKET_QUERY, (404,))]
+
+
+def test_ticket_includes_author_id_for_the_access_check(monkeypatch):
+    row = {
+        "ticket_id": 1,
+        "author_id": "author",
+        "title": "Printer",
+        "content": "Out of paper",
+        "summary_vector": None,
+        "creation_date": datetime(2026, 1, 1),
+        "closed_date": None,
+        "version": 3,
+        "author_name": "Author",
+        "assignee_name": None,
+    }
+    cursor = FakeCursor({1: row})
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(cursor)
+    )
+
+    ticket = relationaldb.get_ticket(1, USER, {}, include=frozenset())
+
+    assert ticket["author_id"] == "author"
+    assert ticket["version"] == 3
+    assert len(cursor.executed) == 1
@@ -0,0 +1,81 @@
+import asyncio
+import httpx
+from backend import http_client
+from backend.http_client import HTTPClient
+
+HTTP_CLIENT_CONFIG = {
+    "timeout_seconds": 1,
+    "connect_timeout_seconds": 1,
+    "max_connections": 10,
+    "max_keepalive_connections": 5,
+    "keepalive_expiry_seconds": 5,
+    "max_connections_per_host": 2,
+    "max_retries": 2,
+    "retry_backoff_seconds": 0,
+}
+
+
+def run_get(handler, url="https://graph.example/v1.0/me"):
+    async def get():
+        client = HTTPClient(HTTP_CLIENT_CONFIG, transport=httpx.MockTransport(handler))
+        try:
+            return await client.get(url)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(get())
+
+
+def test_get_retries_overload_responses():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"id": "user"})
+
+    response = run_get(handler)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_get_returns_last_response_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429)
+
+    response = run_get(handler)
+
+    assert response.status_code == 429
+    assert len(calls) == HTTP_CLIENT_CONFIG["max_retries"] + 1
+
+
+def test_get_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(401)
+
+    response = run_get(handler)
+
+    assert response.status_code == 401
+    assert len(calls) == 1
+
+
+def test_client_from_a_previous_loop_is_closed_when_replaced(monkeypatch):
+    monkeypatch.setattr(http_client, "http_client", None)
+    monkeypatch.setattr(http_client, "http_client_loop", None)
+    monkeypatch.setattr(http_client, "http_client_config", HTTP_CLIENT_CONFIG)
+
+    first = asyncio.run(http_client.get_http_client())
+    second = asyncio.run(http_client.get_http_client())
+
+    assert second is not first
+    assert first._client.is_closed
+    assert not second._client.is_closed
+    asyncio.run(second.aclose())
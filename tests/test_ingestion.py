@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import pytest
+from ai_system import ingestion
+from ai_system.ingestion import (
+    PAGE_SEPARATOR,
+    IngestionPipeline,
+    extract_pdf_page_batch,
+    open_pdf_chunks,
+    split_pages,
+)
+from benchmarks.bench_ingestion import write_synthetic_pdf
+
+INGESTION_CONFIG = {
+    "extract_workers": 2,
+    "extract_page_batch_size": 1,
+    "queue_max_chunks": 4,
+    "embedding_batch_size": 3,
+    "insert_batch_size": 5,
+    "progress_interval_seconds": 0,
+}
+
+
+def thread_pool(workers):
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    for index in range(3):
+        write_synthetic_pdf(
+            tmp_path / f"manual_{index}.pdf",
+            [f"manual {index} page {page}\n" + "word " * 400 for page in range(2)],
+        )
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    return sorted(tmp_path.glob("*.pdf"))
+
+
+def test_open_pdf_chunks(corpus):
+    file_name, chunks = open_pdf_chunks(str(corpus[1]))
+    chunks = list(chunks)
+    assert file_name == "manual_0.pdf"
+    assert "manual 0 page 0" in chunks[0]["text"]
+    assert chunks[0]["metadata"]["source"] == "manual_0.pdf"
+    assert chunks[0]["metadata"]["pages"][0] == 1
+    assert chunks[-1]["metadata"]["pages"][-1] == 2
+
+
+def test_pipeline_batches_embeddings_and_inserts(corpus):
+    embedding_batches = []
+    inserts = []
+
+    def embed_documents(texts):
+        embedding_batches.append(len(texts))
+        return [[float(len(text))] for text in texts]
+
+    pipeline = IngestionPipeline(
+        embed_documents, inserts.append, INGESTION_CONFIG, executor_factory=thread_pool
+    )
+    stats = pipeline.run(corpus)
+
+    rows = [row for insert in inserts for row in insert]
+    assert stats["files"] == 3
+    assert stats["failed_files"] == 1
+    assert stats["pages"] == 6
+    assert stats["chunks"] == len(rows) == sum(embedding_batches)
+    assert all(size == 3 for size in embedding_batches[:-1])
+    assert all(len(insert) == 5 for insert in inserts[:-1])
+    assert {row["metadata"]["source"] for row in rows} == {
+        "manual_0.pdf",
+        "manual_1.pdf",
+        "manual_2.pdf",
+    }
+    assert all(row["embedding"] == [float(len(row["text"]))] for row in rows)
+
+
+def test_page_batches_match_the_whole_document(tmp_path):
+    path = str(tmp_path / "manual.pdf")
+    write_synthetic_pdf(
+        path, [f"page {page}\n" + "word " * 300 * (page % 4) for page in range(1, 10)]
+    )
+    chunks = []
+    first_page, splitter = 1, None
+    while True:
+        batch = extract_pdf_page_batch(path, first_page, 2, splitter)
+        chunks.extend(batch.chunks)
+        if batch.splitter is None:
+            break
+        # The state travels between worker processes
+        first_page, splitter = first_page + batch.pages, pickle.loads(
+            pickle.dumps(batch.splitter)
+        )
+
+    assert first_page + batch.pages == 10
+    assert chunks == list(open_pdf_chunks(path)[1])
+
+
+def test_pipeline_drops_documents_that_fail_after_the_first_pages(tmp_path, monkeypatch):
+    corpus = []
+    for index in range(3):
+        corpus.append(tmp_path / f"manual_{index}.pdf")
+        # Long pages, so the first page range already yields chunks
+        write_synthetic_pdf(corpus[-1], ["word " * 2000 for _ in range(3)])
+    extract = ingestion.extract_pdf_page_batch
+
+    def failing_extract(file_path, first_page, page_count, splitter=None):
+        if file_path.endswith("manual_1.pdf") and first_page > 1:
+            raise ValueError("damaged page")
+        return extract(file_path, first_page, page_count, splitter)
+
+    monkeypatch.setattr(ingestion, "extract_pdf_page_batch", failing_extract)
+    inserts = []
+    ingested = []
+    failed = {}
+
+    def insert_rows(rows):
+        start = sum(len(insert) for insert in inserts)
+        inserts.append(rows)
+        return list(range(start, start + len(rows)))
+
+    pipeline = IngestionPipeline(
+        lambda texts: [[0.0] for _ in texts],
+        insert_rows,
+        INGESTION_CONFIG,
+        executor_factory=thread_pool,
+        on_document_ingested=lambda file_name, chunk_ids, hashes: ingested.append(file_name),
+        on_document_failed=lambda file_name, chunk_ids: failed.update({file_name: chunk_ids}),
+    )
+    stats = pipeline.run(corpus)
+
+    assert stats["files"] == 2
+    assert stats["failed_files"] == 1
+    assert sorted(ingested) == ["manual_0.pdf", "manual_2.pdf"]
+    rows = [row for insert in inserts for row in insert]
+    assert list(failed) == ["manual_1.pdf"]
+    assert failed["manual_1.pdf"]
+    assert failed["manual_1.pdf"] == [
+        index for index, row in enumerate(rows) if row["metadata"]["source"] == "manual_1.pdf"
+    ]
+
+
+def test_pipeline_stops_on_embedding_failure(corpus):
+    def embed_documents(texts):
+        raise ConnectionError("ollama unavailable")
+
+    pipeline = IngestionPipeline(
+        embed_documents, lambda rows: None, INGESTION_CONFIG, executor_factory=thread_pool
+    )
+    with pytest.raises(RuntimeError, match="ollama unavailable"):
+        pipeline.run(corpus)
+
+
+def test_split_pages_streams_with_page_metadata():
+    pages = [f"page {number}\n" + "word " * 300 * number for number in range(1, 13)]
+    consumed = []
+
+    def page_stream():
+        for number, text in enumerate(pages, start=1):
+            consumed.append(number)
+            yield number, text
+
+    chunks = split_pages(page_stream(), "manual.pdf")
+    first = next(chunks)
+    # The first chunk is available before the whole document has been read
+    assert len(consumed) < len(pages)
+    chunks = [first, *chunks]
+
+    document = PAGE_SEPARATOR.join(pages)
+    page_starts = [document.index(f"page {number}\n") for number in range(1, 13)]
+    for chunk in chunks:
+        metadata = chunk["metadata"]
+        assert document[metadata["start"] : metadata["end"]] == chunk["text"]
+        assert metadata["source"] == "manual.pdf"
+        assert metadata["pages"] == [
+            number
+            for number, start in enumerate(page_starts, start=1)
+            if start < metadata["end"]
+            and (number == len(pages) or page_starts[number] > metadata["start"])
+        ]
+    assert chunks[-1]["metadata"]["pages"][-1] == 12
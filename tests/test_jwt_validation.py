@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from backend.jwt_validation import JWKSCache, user_from_claims, validate_access_token
+
+AUDIENCE = "api://ai-helpdesk-test"
+ISSUER = "https://login.microsoftonline.com/test-tenant/v2.0"
+USERS_GROUP_ID = "users-group"
+TECHNICIANS_GROUP_ID = "technicians-group"
+
+
+def generate_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    public_jwk.update({"kid": kid, "use": "sig"})
+    return private_key, public_jwk
+
+
+def write_jwks(path, *jwks):
+    path.write_text(json.dumps({"keys": list(jwks)}))
+
+
+def create_token(private_key, kid, **claims):
+    payload = {
+        "aud": AUDIENCE,
+        "iss": ISSUER,
+        "exp": int(time.time()) + 3600,
+        "oid": "00000000-0000-0000-0000-000000000001",
+        "name": "Test User",
+        "groups": [TECHNICIANS_GROUP_ID],
+    }
+    payload.update(claims)
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def validate(token, jwks_cache, audience, issuer):
+    return asyncio.run(validate_access_token(token, jwks_cache, audience, issuer))
+
+
+@pytest.fixture
+def key_set(tmp_path):
+    private_key, public_jwk = generate_key("key-1")
+    jwks_path = tmp_path / "jwks.json"
+    write_jwks(jwks_path, public_jwk)
+    return private_key, public_jwk, jwks_path
+
+
+def test_validate_access_token(key_set):
+    private_key, _, jwks_path = key_set
+    jwks_cache = JWKSCache(jwks_path.as_uri())
+
+    claims = validate(
+        create_token(private_key, "key-1"), jwks_cache, AUDIENCE, ISSUER
+    )
+    user = user_from_claims(claims, USERS_GROUP_ID, TECHNICIANS_GROUP_ID)
+
+    assert user.user_id == "00000000-0000-0000-0000-000000000001"
+    assert user.user_name == "Test User"
+    assert user.group == "technicians"
+
+
+def test_validate_access_token_rejects_invalid_claims(key_set):
+    private_key, _, jwks_path = key_set
+    jwks_cache = JWKSCache(str(jwks_path))
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        validate(
+            create_token(private_key, "key-1", exp=int(time.time()) - 60),
+            jwks_cache,
+            AUDIENCE,
+            ISSUER,
+        )
+    with pytest.raises(jwt.InvalidAudienceError):
+        validate(
+            create_token(private_key, "key-1", aud="api://other"),
+            jwks_cache,
+            AUDIENCE,
+            ISSUER,
+        )
+    with pytest.raises(jwt.InvalidIssuerError):
+        validate(
+            create_token(private_key, "key-1", iss="https://evil.example"),
+            jwks_cache,
+            AUDIENCE,
+            ISSUER,
+        )
+
+
+def test_validate_access_token_rejects_foreign_signature(key_set):
+    _, _, jwks_path = key_set
+    foreign_key, _ = generate_key("key-1")
+    jwks_cache = JWKSCache(str(jwks_path))
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        validate(
+            create_token(foreign_key, "key-1"), jwks_cache, AUDIENCE, ISSUER
+        )
+
+
+def test_jwks_refresh_on_key_rotation(key_set):
+    _, public_jwk, jwks_path = key_set
+    jwks_cache = JWKSCache(str(jwks_path), min_refresh_interval_seconds=0)
+    asyncio.run(jwks_cache.refresh())
+
+    rotated_key, rotated_jwk = generate_key("key-2")
+    write_jwks(jwks_path, public_jwk, rotated_jwk)
+
+    claims = validate(
+        create_token(rotated_key, "key-2"), jwks_cache, AUDIENCE, ISSUER
+    )
+    assert claims["oid"] == "00000000-0000-0000-0000-000000000001"
+
+
+def test_jwks_refresh_is_rate_limited(key_set):
+    _, public_jwk, jwks_path = key_set
+    jwks_cache = JWKSCache(str(jwks_path), min_refresh_interval_seconds=3600)
+    asyncio.run(jwks_cache.refresh())
+
+    rotated_key, rotated_jwk = generate_key("key-2")
+    write_jwks(jwks_path, public_jwk, rotated_jwk)
+
+    with pytest.raises(jwt.InvalidKeyError):
+        validate(
+            create_token(rotated_key, "key-2"), jwks_cache, AUDIENCE, ISSUER
+        )
+
+
+def test_user_from_claims_users_group():
+    user = user_from_claims(
+        {"oid": "id", "name": "Name", "groups": [USERS_GROUP_ID]},
+        USERS_GROUP_ID,
+        TECHNICIANS_GROUP_ID,
+    )
+    assert user.group == "users"
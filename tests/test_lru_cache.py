@@ -0,0 +1,54 @@
+import time
+from utils import LRUCache
+
+
+def test_lru_cache_hit_and_miss():
+    cache = LRUCache(max_entries=2)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expiry():
+    cache = LRUCache(max_entries=10, ttl_seconds=60)
+
+    # Explicit expiry wins if it is earlier than the ttl
+    cache.set("expired", 1, expires_at=time.monotonic() - 1)
+    assert cache.get("expired") is None
+
+    # The ttl caps an expiry that lies further in the future
+    cache.set("capped", 2, expires_at=time.monotonic() + 3600)
+    _, expires_at = cache._entries["capped"]
+    assert expires_at <= time.monotonic() + 60
+
+
+def test_lru_cache_invalidate_matching():
+    cache = LRUCache(max_entries=10)
+    cache.set(1, [2, 3])
+    cache.set(2, [4])
+    cache.set(3, [2])
+
+    removed = cache.invalidate_matching(lambda key, value: 2 in value)
+
+    assert removed == 2
+    assert cache.get(1) is None
+    assert cache.get(2) == [4]
@@ -0,0 +1,104 @@
+import pytest
+from backend import migrations
+
+
+class FakeCursor:
+    def __init__(self, applied_versions, existing):
+        self.applied_versions = applied_versions
+        self.existing = existing
+        self.executed = []
+        self.result = None
+
+    def execute(self, query, params=()):
+        self.executed.append(query)
+        if query.startswith("SELECT version"):
+            self.result = [(version, "2025-01-01") for version in self.applied_versions]
+        elif query.startswith("SELECT 1"):
+            self.result = (1,) if params[1] in self.existing else None
+
+    def fetchone(self):
+        return self.result
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    def create(applied_versions=(), existing=()):
+        cursor = FakeCursor(applied_versions, existing)
+        monkeypatch.setattr(
+            migrations, "connect_to_mysql", lambda config: FakeConnection(cursor)
+        )
+        return cursor
+
+    monkeypatch.setattr(migrations, "migrate_summary_vectors", lambda config: 0)
+    return create
+
+
+def test_upgrade_skips_applied_migrations(database):
+    cursor = database(applied_versions=[1, 2, 3, 4, 6, 7, 8])
+
+    assert migrations.upgrade(config={}) == [5]
+    assert not any("ft_tickets_title_content" in query for query in cursor.executed)
+    assert any("idx_tickets_author_creation" in query for query in cursor.executed)
+
+
+def test_upgrade_only_records_existing_schema(database):
+    cursor = database(
+        applied_versions=[1, 2, 4, 5, 6, 7, 8], existing={"version", "content_preview"}
+    )
+
+    assert migrations.upgrade(config={}) == [3]
+    assert not any(query.startswith("ALTER") for query in cursor.executed)
+
+
+
+def test_open_flag_replaces_the_closed_date_index(database):
+    cursor = database(
+        applied_versions=[1, 2, 3, 4, 5, 6, 8], existing={"idx_tickets_closed_creation"}
+    )
+
+    assert migrations.upgrade(config={}) == [7]
+    alters = [query for query in cursor.executed if query.startswith("ALTER")]
+    assert alters == [
+        "ALTER TABLE tickets ADD COLUMN is_open TINYINT(1) GENERATED ALWAYS AS (closed_date IS NULL) STORED AFTER version",
+        "ALTER TABLE tickets ADD INDEX idx_tickets_open_creation (is_open, creation_date, ticket_id)",
+        "ALTER TABLE tickets DROP INDEX idx_tickets_closed_creation",
+    ]
+
+def test_plan_problems():
+    plan = [
+        {"table": "t", "type": "ALL", "Extra": "Using where; Using filesort"},
+        {"table": "u", "type": "eq_ref", "Extra": None},
+    ]
+
+    assert migrations._plan_problems(plan) == [("full scan", "t"), ("filesort", "t")]
+
+
+def test_plan_problems_ignore_materialized_subqueries():
+    plan = [
+        {"table": "<derived2>", "type": "ALL", "Extra": "Using temporary; Using filesort"},
+        {"table": "t", "type": "eq_ref", "Extra": None},
+        {"table": "tickets", "type": "fulltext", "Extra": "Using where; Ft_hints: no_ranking"},
+        {"table": "<union3,4>", "type": "ALL", "Extra": "Using temporary"},
+    ]
+
+    assert migrations._plan_problems(plan) == []
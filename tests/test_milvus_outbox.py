@@ -0,0 +1,159 @@
+import pytest
+from backend import milvus_outbox
+from backend.vector_codec import encode_vector
+
+CONFIG = {
+    "milvus_outbox": {
+        "batch_size": 10,
+        "poll_interval_seconds": 1,
+        "retry_backoff_seconds": 1,
+        "max_backoff_seconds": 300,
+    }
+}
+
+
+class FakeCursor:
+    def __init__(self, entries, ticket_snapshots):
+        # Every read of tickets returns the next snapshot, the last one repeats
+        self.entries = entries
+        self.ticket_snapshots = ticket_snapshots
+        self.executed = []
+        self.result = None
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if query.startswith("SELECT") and "FROM milvus_outbox" in query:
+            self.result = self.entries
+        elif query.startswith("SELECT"):
+            snapshot = self.ticket_snapshots[0]
+            if len(self.ticket_snapshots) > 1:
+                self.ticket_snapshots.pop(0)
+            self.result = [ticket for ticket in snapshot if ticket["ticket_id"] in params]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def start_transaction(self, isolation_level=None):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    def create(entries, tickets=(), fail=(), snapshots=None):
+        cursor = FakeCursor(entries, snapshots or [list(tickets)])
+        milvus = {"upserted": [], "deleted": []}
+
+        def upsert(tickets):
+            if any(ticket[0] in fail for ticket in tickets):
+                raise ConnectionError("Milvus unavailable")
+            if tickets:
+                milvus["upserted"].append([ticket[0] for ticket in tickets])
+
+        def delete(ticket_ids):
+            if ticket_ids:
+                milvus["deleted"].append(ticket_ids)
+
+        monkeypatch.setattr(milvus_outbox, "upsert_tickets_milvus", upsert)
+        monkeypatch.setattr(milvus_outbox, "delete_tickets_milvus", delete)
+        monkeypatch.setattr(
+            milvus_outbox, "connect_to_mysql", lambda config: FakeConnection(cursor)
+        )
+        return cursor, milvus
+
+    return create
+
+
+def entry(outbox_id, ticket_id):
+    return {"outbox_id": outbox_id, "ticket_id": ticket_id}
+
+
+def ticket(ticket_id, closed=True):
+    return {
+        "ticket_id": ticket_id,
+        "title": "title",
+        "summary_vector": encode_vector([1.0]),
+        "closed_date": "2024-01-01" if closed else None,
+    }
+
+
+def test_drain_applies_current_ticket_state(outbox):
+    cursor, milvus = outbox(
+        [entry(1, 7), entry(2, 8), entry(3, 7)],
+        tickets=[ticket(7, closed=False), ticket(8)],
+    )
+
+    assert milvus_outbox.drain_milvus_outbox(CONFIG) == 3
+
+    assert milvus["upserted"] == [[8]]
+    assert milvus["deleted"] == [[7]]
+    delete_query, delete_params = cursor.executed[-1]
+    assert delete_query.startswith("DELETE FROM milvus_outbox")
+    assert delete_params == (1, 2, 3)
+
+
+def test_ticket_reopened_during_sync_is_synced_again(outbox):
+    cursor, milvus = outbox(
+        [entry(1, 7)],
+        snapshots=[[ticket(7)], [ticket(7, closed=False)]],
+    )
+
+    assert milvus_outbox.drain_milvus_outbox(CONFIG) == 1
+
+    assert milvus["upserted"] == [[7]]
+    assert milvus["deleted"] == [[7]]
+
+
+def test_failed_ticket_does_not_block_the_batch(outbox):
+    cursor, milvus = outbox(
+        [entry(1, 7), entry(2, 8), entry(3, 7)],
+        tickets=[ticket(7), ticket(8)],
+        fail={7},
+    )
+
+    assert milvus_outbox.drain_milvus_outbox(CONFIG) == 1
+
+    assert milvus["upserted"] == [[8]]
+    update_query, update_params = cursor.executed[-2]
+    assert update_query.startswith("UPDATE milvus_outbox SET attempts = attempts + 1")
+    assert update_params == ("Milvus unavailable", 1, 300, 1, 3)
+    delete_query, delete_params = cursor.executed[-1]
+    assert delete_query.startswith("DELETE FROM milvus_outbox")
+    assert delete_params == (2,)
+
+
+def test_failed_sync_is_retried_later(outbox):
+    cursor, milvus = outbox([entry(1, 7)], tickets=[ticket(7)], fail={7})
+
+    assert milvus_outbox.drain_milvus_outbox(CONFIG) == 0
+
+    query, params = cursor.executed[-1]
+    assert query.startswith("UPDATE milvus_outbox SET attempts = attempts + 1")
+    assert params == ("Milvus unavailable", 1, 300, 1)
+
+
+def test_empty_outbox(outbox):
+    cursor, milvus = outbox([])
+
+    assert milvus_outbox.drain_milvus_outbox(CONFIG) == 0
+    assert milvus["deleted"] == []
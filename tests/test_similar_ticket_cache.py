@@ -0,0 +1,119 @@
+import pytest
+from ai_system import vectordb
+from utils import LRUCache
+
+MILVUS_CONFIG = {
+    "milvus": {
+        "metric_type_tickets": "COSINE",
+        "similar_tickets_limit": 5,
+        "similar_tickets_radius": 0.7,
+        "similar_tickets_range_filter": 1.0,
+    }
+}
+
+
+class FakeMilvusClient:
+    def __init__(self, results):
+        self.results = results
+        self.searches = []
+
+    def search(self, **kwargs):
+        self.searches.append(kwargs)
+        return [self.results[kwargs["filter"]]]
+
+    def upsert(self, collection_name, data):
+        pass
+
+    def delete(self, collection_name, filter):
+        pass
+
+    def flush(self, collection_name):
+        pass
+
+
+@pytest.fixture
+def milvus(monkeypatch):
+    client = FakeMilvusClient(
+        {
+            "id != 1": [{"id": 10, "distance": 0.9, "entity": {"title": "a"}}],
+            "id != 2": [{"id": 11, "distance": 0.8, "entity": {"title": "b"}}],
+        }
+    )
+    monkeypatch.setattr(vectordb, "milvus_client", client, raising=False)
+    monkeypatch.setattr(vectordb, "config", MILVUS_CONFIG, raising=False)
+    monkeypatch.setattr(vectordb, "similar_ticket_cache", LRUCache(max_entries=10))
+    return client
+
+
+def test_similar_tickets_are_cached(milvus):
+    first = vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    second = vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+
+    assert first == second == [{"id": 10, "distance": 0.9, "entity": {"title": "a"}}]
+    assert len(milvus.searches) == 1
+    assert milvus.searches[0]["search_params"] == {
+        "metric_type": "COSINE",
+        "params": {"radius": 0.7, "range_filter": 1.0},
+    }
+    assert vectordb.get_similar_ticket_cache_stats()["hits"] == 1
+
+
+def test_closing_a_ticket_invalidates_all_entries(milvus):
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    generation = vectordb.collection_ticket_generation
+
+    vectordb.upsert_tickets_milvus([(12, [0.1], "title")])
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+
+    assert len(milvus.searches) == 2
+    assert vectordb.collection_ticket_generation == generation + 1
+
+
+def test_reopening_a_ticket_only_invalidates_lists_containing_it(milvus):
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    vectordb.retrieve_similar_tickets_milvus([0.1], 2)
+
+    vectordb.delete_tickets_milvus([10])
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    vectordb.retrieve_similar_tickets_milvus([0.1], 2)
+
+    assert [search["filter"] for search in milvus.searches] == [
+        "id != 1",
+        "id != 2",
+        "id != 1",
+    ]
+
+
+def test_change_during_search_is_not_cached(milvus):
+    search = milvus.search
+
+    def search_while_a_ticket_closes(**kwargs):
+        results = search(**kwargs)
+        vectordb.upsert_tickets_milvus([(12, [0.1], "title")])
+        return results
+
+    milvus.search = search_while_a_ticket_closes
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    milvus.search = search
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+
+    assert len(milvus.searches) == 2
+
+
+def test_entries_expire_after_the_ttl(milvus, monkeypatch):
+    monkeypatch.setattr(
+        vectordb, "similar_ticket_cache", LRUCache(max_entries=10, ttl_seconds=0)
+    )
+
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+    vectordb.retrieve_similar_tickets_milvus([0.1], 1)
+
+    assert len(milvus.searches) == 2
+
+
+def test_search_works_before_milvus_is_initialized(milvus, monkeypatch):
+    monkeypatch.setattr(vectordb, "similar_ticket_cache", None)
+
+    assert vectordb.retrieve_similar_tickets_milvus([0.1], 1) == [
+        {"id": 10, "distance": 0.9, "entity": {"title": "a"}}
+    ]
@@ -0,0 +1,102 @@
+import json
+import mysql.connector
+import pytest
+from mysql.connector import errorcode
+from backend import migrate_summary_vectors, relationaldb
+from backend.vector_codec import encode_vector
+
+
+class FakeCursor:
+    def __init__(self, column_type="json", instant=True):
+        self.column_type = column_type
+        self.instant = instant
+        self.executed = []
+        self.lastrowid = 1
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if query.endswith("ALGORITHM=INSTANT") and not self.instant:
+            raise mysql.connector.Error(
+                errno=errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED_REASON
+            )
+
+    def fetchall(self):
+        return [(self.column_type,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def insert(monkeypatch):
+    monkeypatch.setattr(relationaldb, "float32_summary_vectors", False)
+    monkeypatch.setattr(relationaldb, "invalidate_ticket_stats", lambda: None)
+
+    def run(column_type):
+        cursor = FakeCursor(column_type)
+        monkeypatch.setattr(
+            relationaldb, "connect_to_mysql", lambda config: FakeConnection(cursor)
+        )
+        relationaldb.insert_ticket("title", "content", [0.5, 1.0], "author", config={})
+        query, params = cursor.executed[-1]
+        assert query.startswith("INSERT INTO tickets")
+        return params[2]
+
+    return run
+
+
+def test_vectors_are_written_as_json_until_the_column_is_migrated(insert):
+    assert insert("json") == json.dumps([0.5, 1.0])
+    assert insert("blob") == encode_vector([0.5, 1.0])
+
+
+def test_migrated_column_is_only_checked_once(insert, monkeypatch):
+    insert("blob")
+    cursor = FakeCursor("json")
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(cursor)
+    )
+
+    relationaldb.insert_ticket("title", "content", [0.5], "author", config={})
+
+    assert len(cursor.executed) == 1
+
+
+def test_column_swap_is_instant_where_supported():
+    cursor = FakeCursor()
+
+    migrate_summary_vectors._swap_columns(cursor)
+
+    assert len(cursor.executed) == 1
+    assert cursor.executed[0][0].endswith("ALGORITHM=INSTANT")
+
+
+def test_column_swap_falls_back_to_a_rebuild():
+    cursor = FakeCursor(instant=False)
+
+    migrate_summary_vectors._swap_columns(cursor)
+
+    assert [query.endswith("ALGORITHM=INSTANT") for query, _ in cursor.executed] == [
+        True,
+        False,
+    ]
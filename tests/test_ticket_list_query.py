@@ -0,0 +1,315 @@
+from datetime import datetime
+import pytest
+from backend import relationaldb
+from backend.pydantic_models import TicketFilter
+from backend.user_directory import UserDirectory
+from utils import LRUCache
+from backend.relationaldb import (
+    _build_ticket_filter,
+    _query_ticket_list,
+    decode_ticket_cursor,
+    encode_ticket_cursor,
+)
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+
+def ticket_row(ticket_id, total_count):
+    return {
+        "ticket_id": ticket_id,
+        "title": "title",
+        "content": "content",
+        "creation_date": datetime(2025, 1, 1),
+        "closed_date": None,
+        "author_id": "author-id",
+        "assignee_id": None,
+        "total_count": total_count,
+    }
+
+
+@pytest.fixture(autouse=True)
+def ticket_count_cache(monkeypatch):
+    cache = LRUCache(max_entries=10)
+    monkeypatch.setattr(relationaldb, "ticket_count_cache", cache)
+    monkeypatch.setattr(relationaldb, "ticket_count_cache_threshold", 10)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def user_directory(monkeypatch):
+    directory = UserDirectory()
+    directory.replace_all([("author-id", "author", "users")])
+    monkeypatch.setattr(relationaldb, "user_directory", directory)
+    return directory
+
+
+def test_build_ticket_filter():
+    where, params = _build_ticket_filter(
+        TicketFilter(assignee_id="unassigned", closed=False), author_id="author"
+    )
+
+    assert where == (
+        " WHERE (t.author_id = %s) AND (t.assignee_id is NULL)"
+        " AND (t.is_open = 1)"
+    )
+    assert params == ("author",)
+    assert _build_ticket_filter(TicketFilter()) == ("", ())
+
+
+def test_ticket_list_uses_single_query():
+    cursor = FakeCursor([[ticket_row(2, 12), ticket_row(1, 12)]])
+
+    ticket_list = _query_ticket_list(cursor, TicketFilter(page=2, page_size=2))
+
+    assert len(cursor.executed) == 1
+    query, params = cursor.executed[0]
+    # Counted over the bare ticket ids, not over the selected page columns
+    assert "(SELECT COUNT(*) FROM tickets t) AS total_count" in query
+    assert query.endswith("ORDER BY t.creation_date DESC, t.ticket_id DESC LIMIT %s OFFSET %s")
+    assert params == (2, 2)
+    assert ticket_list["count"] == 12
+    assert [t["ticket_id"] for t in ticket_list["tickets"]] == [2, 1]
+    assert "total_count" not in ticket_list["tickets"][0]
+
+
+def test_ticket_list_page_past_the_end_counts_separately():
+    cursor = FakeCursor([[], {"count": 3}])
+
+    ticket_list = _query_ticket_list(
+        cursor, TicketFilter(page=5, page_size=10, closed=True)
+    )
+
+    assert len(cursor.executed) == 2
+    count_query, count_params = cursor.executed[1]
+    assert count_query.startswith("SELECT COUNT(*) AS count FROM tickets t WHERE")
+    assert count_params == ()
+    assert ticket_list == {"count": 3, "tickets": []}
+
+
+
+def test_large_totals_are_cached_per_filter():
+    cursor = FakeCursor([[ticket_row(2, 12)], [ticket_row(1, 12)], [ticket_row(3, 4)]])
+
+    _query_ticket_list(cursor, TicketFilter(page=1, page_size=1, closed=False))
+    ticket_list = _query_ticket_list(
+        cursor, TicketFilter(page=2, page_size=1, closed=False)
+    )
+    _query_ticket_list(cursor, TicketFilter(page=1, page_size=1, closed=True))
+
+    first_query, _ = cursor.executed[0]
+    cached_query, cached_params = cursor.executed[1]
+    assert "total_count" in first_query
+    # 12 is above the threshold, the next page reuses it
+    assert "total_count" not in cached_query
+    assert cached_params == (1, 1)
+    assert ticket_list["count"] == 12
+    # Another filter is counted on its own
+    assert "total_count" in cursor.executed[2][0]
+
+def keyset_rows(*ticket_ids, total_count=None):
+    rows = []
+    for ticket_id in ticket_ids:
+        row = ticket_row(ticket_id, total_count)
+        row["creation_date"] = datetime(2025, 1, ticket_id)
+        if total_count is None:
+            row.pop("total_count")
+        rows.append(row)
+    return rows
+
+
+def test_keyset_first_page():
+    cursor = FakeCursor([keyset_rows(9, 8, 7, total_count=9)])
+
+    ticket_list = _query_ticket_list(
+        cursor, TicketFilter(pagination="cursor", page_size=2)
+    )
+
+    query, params = cursor.executed[0]
+    assert "OFFSET" not in query
+    assert params == (3,)
+    assert ticket_list["count"] == 9
+    assert [t["ticket_id"] for t in ticket_list["tickets"]] == [9, 8]
+    assert ticket_list["prev_cursor"] is None
+    assert decode_ticket_cursor(ticket_list["next_cursor"]) == (
+        datetime(2025, 1, 8),
+        8,
+        "next",
+    )
+
+
+def test_keyset_next_page_seeks_past_cursor():
+    next_cursor = encode_ticket_cursor(keyset_rows(8)[0], "next")
+    cursor = FakeCursor([keyset_rows(7, 6)])
+
+    ticket_list = _query_ticket_list(
+        cursor,
+        TicketFilter(pagination="cursor", page_size=2, cursor=next_cursor),
+    )
+
+    query, params = cursor.executed[0]
+    assert "total_count" not in query
+    assert "t.creation_date < %s OR (t.creation_date = %s AND t.ticket_id < %s)" in query
+    assert params == (datetime(2025, 1, 8), datetime(2025, 1, 8), 8, 3)
+    assert ticket_list["count"] is None
+    assert [t["ticket_id"] for t in ticket_list["tickets"]] == [7, 6]
+    assert ticket_list["next_cursor"] is None
+    assert ticket_list["prev_cursor"] is not None
+
+
+def test_keyset_prev_page_is_returned_in_display_order():
+    prev_cursor = encode_ticket_cursor(keyset_rows(5)[0], "prev")
+    # Backward scan returns rows in ascending order, including one extra row
+    cursor = FakeCursor([keyset_rows(6, 7, 8)])
+
+    ticket_list = _query_ticket_list(
+        cursor,
+        TicketFilter(pagination="cursor", page_size=2, cursor=prev_cursor),
+    )
+
+    query, _ = cursor.executed[0]
+    assert "t.creation_date > %s" in query
+    assert query.endswith("ORDER BY t.creation_date ASC, t.ticket_id ASC LIMIT %s")
+    assert [t["ticket_id"] for t in ticket_list["tickets"]] == [7, 6]
+    assert ticket_list["next_cursor"] is not None
+    assert ticket_list["prev_cursor"] is not None
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        _query_ticket_list(
+            FakeCursor([]),
+            TicketFilter(pagination="cursor", cursor="not-a-cursor"),
+        )
+
+
+def test_search_combines_with_other_filters():
+    cursor = FakeCursor([[ticket_row(1, 1)]])
+
+    _query_ticket_list(
+        cursor,
+        TicketFilter(search="printer", assignee_id="tech", closed=True, page=1, page_size=10),
+    )
+
+    query, params = cursor.executed[0]
+    page_query = query.split(") AS total_count FROM tickets t", 1)[1]
+    join, where = page_query.split(" WHERE (t.assignee_id", 1)
+    # Each MATCH runs on its own FULLTEXT index, no OR between them in the WHERE clause
+    assert "MATCH" not in where
+    assert "FROM tickets WHERE MATCH(title, content) AGAINST (%s IN NATURAL LANGUAGE MODE)" in join
+    assert " UNION ALL " in join
+    assert "FROM ticket_messages WHERE MATCH(message) AGAINST (%s IN NATURAL LANGUAGE MODE)" in join
+    assert join.endswith("s ON s.ticket_id = t.ticket_id")
+    assert "(t.is_open = 0)" in where
+    # The count subquery repeats the search and the filters
+    assert params == (("printer",) * 4 + ("tech",)) * 2 + (10, 0)
+
+
+def test_search_boolean_mode_and_relevance_order():
+    cursor = FakeCursor([[ticket_row(1, 1)]])
+
+    _query_ticket_list(
+        cursor,
+        TicketFilter(
+            search="+printer -scanner",
+            search_mode="boolean",
+            order="relevance",
+            page=1,
+            page_size=10,
+        ),
+    )
+
+    query, params = cursor.executed[0]
+    assert "IN BOOLEAN MODE" in query
+    # Matches in the messages count towards the relevance as well
+    assert "SUM(score) AS relevance" in query
+    assert "ORDER BY s.relevance DESC, t.creation_date DESC, t.ticket_id DESC" in query
+    assert params == ("+printer -scanner",) * 8 + (10, 0)
+
+
+def test_invalid_search_options():
+    with pytest.raises(ValueError):
+        _query_ticket_list(
+            FakeCursor([]), TicketFilter(search="printer", search_mode="regex")
+        )
+    with pytest.raises(ValueError):
+        _query_ticket_list(FakeCursor([]), TicketFilter(order="relevance"))
+    with pytest.raises(ValueError):
+        _query_ticket_list(
+            FakeCursor([]),
+            TicketFilter(search="printer", order="relevance", pagination="cursor"),
+        )
+
+
+def test_list_selects_content_preview():
+    cursor = FakeCursor([[ticket_row(1, 1)]])
+
+    ticket_list = _query_ticket_list(cursor, TicketFilter())
+
+    query, _ = cursor.executed[0]
+    assert "t.content_preview AS content" in query
+    assert "t.content," not in query
+    assert set(ticket_list["tickets"][0]) == {
+        "ticket_id",
+        "title",
+        "content",
+        "creation_date",
+        "closed_date",
+        "author_name",
+        "assignee_name",
+        "similar_tickets",
+        "ticket_messages",
+    }
+
+
+def test_field_selection():
+    row = {"title": "title", "ticket_id": 1, "creation_date": datetime(2025, 1, 1)}
+    row["total_count"] = 1
+    cursor = FakeCursor([[row]])
+
+    ticket_list = _query_ticket_list(cursor, TicketFilter(fields=["title"]))
+
+    query, _ = cursor.executed[0]
+    assert query.startswith(
+        "SELECT t.title, t.ticket_id, t.creation_date, (SELECT COUNT(*) FROM tickets t) AS total_count FROM tickets t ORDER BY"
+    )
+    assert "azure_users" not in query
+    assert ticket_list["tickets"] == [{"title": "title"}]
+
+
+def test_invalid_field_selection():
+    with pytest.raises(ValueError):
+        _query_ticket_list(FakeCursor([]), TicketFilter(fields=["summary_vector"]))
+
+
+def test_names_are_resolved_from_user_directory():
+    row = ticket_row(1, 1)
+    row["assignee_id"] = "technician-id"
+    cursor = FakeCursor(
+        [
+            [row],
+            [{"user_id": "technician-id", "user_name": "technician", "user_group": "technicians"}],
+        ]
+    )
+
+    ticket_list = _query_ticket_list(cursor, TicketFilter())
+
+    assert "azure_users" not in cursor.executed[0][0]
+    # Only the id unknown to the directory is looked up
+    assert cursor.executed[1][1] == ("technician-id",)
+    ticket = ticket_list["tickets"][0]
+    assert ticket["author_name"] == "author"
+    assert ticket["assignee_name"] == "technician"
+    assert "author_id" not in ticket and "assignee_id" not in ticket
@@ -0,0 +1,95 @@
+import mysql.connector
+import pytest
+from backend import relationaldb
+from backend.pydantic_models import TicketOperation
+
+
+class FakeCursor:
+    def __init__(self, missing_ticket_ids, unknown_assignees):
+        self.missing_ticket_ids = missing_ticket_ids
+        self.unknown_assignees = unknown_assignees
+        self.executed = []
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        if query.startswith("UPDATE"):
+            if "assignee_id" in query and params[0] in self.unknown_assignees:
+                raise mysql.connector.IntegrityError("foreign key constraint fails")
+            self.rowcount = 0 if params[-1] in self.missing_ticket_ids else 1
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    cursor = FakeCursor(missing_ticket_ids={404}, unknown_assignees={"nobody"})
+    cnx = FakeConnection(cursor)
+    monkeypatch.setattr(relationaldb, "connect_to_mysql", lambda config: cnx)
+    monkeypatch.setattr(relationaldb, "TESTING", False)
+    return cursor, cnx
+
+
+def outbox_entries(cursor):
+    return [params for query, params in cursor.executed if "milvus_outbox" in query]
+
+
+def test_operations_share_one_transaction(database):
+    cursor, cnx = database
+
+    results = relationaldb.apply_ticket_operations(
+        [
+            TicketOperation(action="close", ticket_id=1),
+            TicketOperation(action="reopen", ticket_id=2),
+            TicketOperation(action="assign", ticket_id=3, assignee_id="Unassigned"),
+        ],
+        config={},
+    )
+
+    assert [result["success"] for result in results] == [True, True, True]
+    assert cnx.committed
+    # Milvus is synced through outbox entries written in the same transaction
+    assert outbox_entries(cursor) == [(1,), (2,)]
+    assert ("UPDATE tickets SET assignee_id = %s, version = version + 1 WHERE ticket_id = %s", (None, 3)) in cursor.executed
+
+
+def test_failed_operations_roll_back_to_savepoint(database):
+    cursor, cnx = database
+
+    results = relationaldb.apply_ticket_operations(
+        [
+            TicketOperation(action="close", ticket_id=404),
+            TicketOperation(action="assign", ticket_id=1, assignee_id="nobody"),
+            TicketOperation(action="delete", ticket_id=1),
+            TicketOperation(action="reopen", ticket_id=1),
+        ],
+        config={},
+    )
+
+    assert [result["success"] for result in results] == [False, False, False, True]
+    assert results[0]["error"] == "Ticket not found"
+    rollbacks = [q for q, _ in cursor.executed if q.startswith("ROLLBACK TO SAVEPOINT")]
+    assert len(rollbacks) == 3
+    assert outbox_entries(cursor) == [(1,)]
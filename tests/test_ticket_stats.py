@@ -0,0 +1,100 @@
+import pytest
+from backend import relationaldb
+from backend.user_directory import UserDirectory
+
+CONFIG = {"mysql": {"ticket_stats_ttl_seconds": 30}}
+
+ROWS = [
+    {"assignee_id": None, "open": 1, "count": 4},
+    {"assignee_id": None, "open": 0, "count": 1},
+    {"assignee_id": "tech-1", "open": 1, "count": 2},
+    {"assignee_id": "tech-1", "open": 0, "count": 10},
+    {"assignee_id": "tech-2", "open": 1, "count": 5},
+]
+
+
+class FakeCursor:
+    def __init__(self, executed, on_execute=None):
+        self.executed = executed
+        self.on_execute = on_execute
+
+    def execute(self, query, params=()):
+        self.executed.append(query)
+        if self.on_execute is not None:
+            self.on_execute()
+
+    def fetchall(self):
+        return ROWS
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, executed, on_execute=None):
+        self.executed = executed
+        self.on_execute = on_execute
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.executed, self.on_execute)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    executed = []
+    directory = UserDirectory()
+    directory.replace_all(
+        [("tech-1", "Technician 1", "technicians"), ("tech-2", "Technician 2", "technicians")]
+    )
+    monkeypatch.setattr(relationaldb, "user_directory", directory)
+    monkeypatch.setattr(relationaldb, "ticket_stats_cache", None)
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(executed)
+    )
+    return executed
+
+
+def test_stats_from_one_grouped_query(executed):
+    stats = relationaldb.get_ticket_stats(CONFIG)
+
+    assert len(executed) == 1
+    assert "GROUP BY" in executed[0]
+    assert stats["total"] == 22
+    assert stats["open"] == 11
+    assert stats["closed"] == 11
+    assert stats["unassigned"] == 5
+    assert stats["open_unassigned"] == 4
+    assert stats["by_assignee"] == [
+        {"assignee_id": "tech-2", "assignee_name": "Technician 2", "open": 5, "closed": 0},
+        {"assignee_id": "tech-1", "assignee_name": "Technician 1", "open": 2, "closed": 10},
+    ]
+
+
+def test_stats_are_cached_until_a_write(executed):
+    relationaldb.get_ticket_stats(CONFIG)
+    relationaldb.get_ticket_stats(CONFIG)
+    assert len(executed) == 1
+
+    relationaldb.invalidate_ticket_stats()
+    relationaldb.get_ticket_stats(CONFIG)
+    assert len(executed) == 2
+
+
+def test_write_during_the_query_is_not_cached_over(executed, monkeypatch):
+    # A ticket is closed while the grouped query runs
+    monkeypatch.setattr(
+        relationaldb,
+        "connect_to_mysql",
+        lambda config: FakeConnection(executed, relationaldb.invalidate_ticket_stats),
+    )
+    relationaldb.get_ticket_stats(CONFIG)
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(executed)
+    )
+
+    relationaldb.get_ticket_stats(CONFIG)
+    relationaldb.get_ticket_stats(CONFIG)
+    assert len(executed) == 2
@@ -0,0 +1,82 @@
+import pytest
+from backend import relationaldb
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+        self.rowcount = 1
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    executed = []
+    monkeypatch.setattr(
+        relationaldb, "connect_to_mysql", lambda config: FakeConnection(executed)
+    )
+    monkeypatch.setattr(relationaldb, "TESTING", False)
+    monkeypatch.setattr(relationaldb, "known_azure_users", {})
+    return executed
+
+
+def test_upsert_is_single_statement(executed):
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+
+    assert len(executed) == 1
+    query, params = executed[0]
+    assert "ON DUPLICATE KEY UPDATE" in query
+    assert params == ("id", "Jane Doe", "users")
+    assert relationaldb.is_known_azure_user("id", "Jane Doe", "users")
+
+
+def test_known_user_skips_database(executed):
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+
+    assert len(executed) == 1
+
+
+def test_changed_group_is_written_again(executed):
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+    relationaldb.upsert_azure_user("id", "Jane Doe", "technicians", config={})
+
+    assert len(executed) == 2
+    assert executed[1][1] == ("id", "Jane Doe", "technicians")
+
+
+def test_promote_then_demote_is_written_again(executed):
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+    relationaldb.upsert_azure_user("id", "Jane Doe", "technicians", config={})
+    relationaldb.upsert_azure_user("id", "Jane Doe", "users", config={})
+
+    assert len(executed) == 3
+    assert executed[2][1] == ("id", "Jane Doe", "users")
+    assert not relationaldb.is_known_azure_user("id", "Jane Doe", "technicians")
+
+
+def test_name_change_back_is_written_again(executed):
+    relationaldb.upsert_azure_user("id", "A", "users", config={})
+    relationaldb.upsert_azure_user("id", "B", "users", config={})
+    relationaldb.upsert_azure_user("id", "A", "users", config={})
+
+    assert len(executed) == 3
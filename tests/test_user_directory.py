@@ -0,0 +1,32 @@
+from backend.user_directory import UserDirectory
+
+
+def test_technicians_follow_writes():
+    directory = UserDirectory()
+    directory.replace_all([("1", "Bob", "technicians"), ("2", "Alice", "users")])
+
+    assert directory.technicians() == [{"user_id": "1", "user_name": "Bob"}]
+
+    directory.put("2", "Alice", "technicians")
+    assert [t["user_name"] for t in directory.technicians()] == ["Alice", "Bob"]
+
+    directory.put("1", "Bob", "users")
+    assert directory.technicians() == [{"user_id": "2", "user_name": "Alice"}]
+
+
+def test_refresh_interval():
+    directory = UserDirectory(refresh_interval_seconds=0)
+    assert directory.needs_refresh()
+
+    directory = UserDirectory(refresh_interval_seconds=600)
+    directory.replace_all([])
+    assert not directory.needs_refresh()
+
+
+def test_lookup_and_missing_ids():
+    directory = UserDirectory()
+    directory.replace_all([("1", "Bob", "technicians")])
+
+    assert directory.get_name("1") == "Bob"
+    assert directory.get_name(None) is None
+    assert directory.missing(["1", "2", None]) == {"2"}
@@ -0,0 +1,39 @@
+import json
+import numpy as np
+from backend.vector_codec import decode_vector, encode_vector
+
+
+def test_vector_roundtrip():
+    vector = [0.1 * i for i in range(1024)]
+
+    encoded = encode_vector(vector)
+    decoded = decode_vector(encoded)
+
+    assert len(encoded) == 4 * 1024
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, vector)
+
+
+def test_decode_is_zero_copy():
+    encoded = encode_vector([1.0, 2.0, 3.0])
+
+    decoded = decode_vector(encoded)
+
+    assert not decoded.flags.owndata
+    assert np.shares_memory(decoded, np.frombuffer(encoded, dtype=np.uint8))
+
+
+def test_decode_legacy_json():
+    vector = [0.25, -1.5, 3.0]
+
+    assert np.array_equal(decode_vector(json.dumps(vector)), vector)
+    assert np.array_equal(decode_vector(json.dumps(vector).encode()), vector)
+
+
+def test_decode_binary_that_looks_like_json_brackets():
+    # 0x5b ("[") as first and 0x5d ("]") as last byte, but not valid JSON
+    encoded = bytes([0x5B, 0, 0, 0, 0, 0, 0, 0x5D])
+
+    decoded = decode_vector(encoded)
+
+    assert decoded.shape == (2,)
@@ -1,7 +1,82 @@
 import json
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
 
 
 def load_json(json_file: str) -> dict[str, Any]:
     with open(json_file, "r") as file:
         return json.load(file)
+
+
+class LRUCache:
+    # Thread safe, size bounded LRU cache with per entry expiry and hit/miss counters
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[Any, Optional[float]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, expires_at: Optional[float] = None
+    ) -> None:
+        # expires_at is a time.monotonic() timestamp, the configured ttl caps it
+        if self.ttl_seconds is not None:
+            ttl_expiry = time.monotonic() + self.ttl_seconds
+            expires_at = ttl_expiry if expires_at is None else min(expires_at, ttl_expiry)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        with self._lock:
+            keys = [
+                key for key, (value, _) in self._entries.items() if predicate(key, value)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }